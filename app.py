@@ -1,17 +1,33 @@
+import os
 import dash
 from dash import html
 from layout import create_layout
 from callbacks import register_callbacks
+import metrics
+import persistence
+import shared_cache
+
+# Workers gunicorn : lecture du cache publié par le watcher (voir gunicorn.conf.py)
+if os.environ.get(shared_cache.SHARED_CACHE_ENV):
+    shared_cache.attach(os.environ[shared_cache.SHARED_CACHE_ENV])
+# Processus unique : cache persisté sur disque si FREELENS_SNAPSHOT_DIR est défini
+else:
+    persistence.enable_from_environment()
 
 # Initialisation de l'application Dash
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
+# Application WSGI pour un serveur de production (gunicorn app:server)
+server = app.server
 
-# Création de la mise en page
-app.layout = create_layout()
+# Création de la mise en page (fonction : un identifiant de session par chargement de page)
+app.layout = create_layout
 
 # Enregistrement des callbacks
 register_callbacks(app)
 
+# Route /metrics (format Prometheus) et profilage à la demande
+metrics.install(app)
+
 # CSS personnalisé pour l'application
 app.index_string = '''
 <!DOCTYPE html>
@@ -0,0 +1,412 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Faux apiserver Kubernetes pour les benchmarks : pods, déploiements, namespaces,
+# événements (events.k8s.io/v1) et relevés metrics-server synthétiques, LIST
+# paginés (limit/continue), GET unitaires et flux watch alimentés par un taux
+# de churn configurable. Lancé dans un processus à part
+# pour ne pas fausser la mesure de mémoire de l'application.
+
+# Nombre d'événements gardés pour reprendre un watch ; au-delà : 410 Gone
+EVENT_LOG_SIZE = 50000
+# Durée maximale d'un watch côté serveur
+MAX_WATCH_SECONDS = 60
+# Lignes de logs écrites par seconde et par flux follow
+LOG_LINES_PER_SECOND = 20
+CREATION_TIMESTAMP = "2024-01-01T00:00:00Z"
+
+def _pod(index, deployment, namespace, resource_version, restarts=0, phase="Running"):
+    name = f"{deployment}-{index:06d}"
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"pod-{index}",
+            "resourceVersion": str(resource_version),
+            "creationTimestamp": CREATION_TIMESTAMP,
+            "labels": {"app": deployment, "tier": ("web", "api", "worker")[index % 3]},
+            "annotations": {"bench/index": str(index)},
+            "ownerReferences": [{"apiVersion": "apps/v1", "kind": "ReplicaSet", "name": f"{deployment}-rs",
+                                 "uid": f"rs-{deployment}", "controller": True}],
+        },
+        "spec": {
+            "containers": [
+                {"name": "app", "image": "nginx:1.25", "resources": {"limits": {"cpu": "500m", "memory": "256Mi"}}},
+                {"name": "sidecar", "image": "envoy:1.29", "resources": {"limits": {"cpu": "100m", "memory": "64Mi"}}},
+            ],
+            "nodeName": f"node-{index % 50:02d}",
+            "serviceAccountName": "default",
+        },
+        "status": {
+            "phase": phase,
+            "qosClass": ("BestEffort", "Burstable", "Guaranteed")[index % 3],
+            "podIP": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+            "conditions": [{"type": "Ready", "status": "True" if phase == "Running" else "False"}],
+            "containerStatuses": [
+                {"name": "app", "image": "nginx:1.25", "imageID": "", "ready": phase == "Running",
+                 "restartCount": restarts},
+                {"name": "sidecar", "image": "envoy:1.29", "imageID": "", "ready": True, "restartCount": 0},
+            ],
+        },
+    }
+
+def _deployment(name, namespace, replicas, resource_version):
+    labels = {"app": name}
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"deploy-{name}",
+            "resourceVersion": str(resource_version),
+            "creationTimestamp": CREATION_TIMESTAMP,
+            "labels": labels,
+        },
+        "spec": {
+            "replicas": replicas,
+            "selector": {"matchLabels": labels},
+            "strategy": {"type": "RollingUpdate"},
+            "template": {"metadata": {"labels": labels},
+                         "spec": {"containers": [{"name": "app", "image": "nginx:1.25"}]}},
+        },
+        "status": {"replicas": replicas, "readyReplicas": replicas, "updatedReplicas": replicas,
+                   "availableReplicas": replicas},
+    }
+
+def _namespace(name, resource_version):
+    return {
+        "apiVersion": "v1",
+        "kind": "Namespace",
+        "metadata": {
+            "name": name,
+            "uid": f"namespace-{name}",
+            "resourceVersion": str(resource_version),
+            "creationTimestamp": CREATION_TIMESTAMP,
+        },
+        "status": {"phase": "Active"},
+    }
+
+def _event(pod, reason, note, resource_version, event_type="Normal", count=None):
+    metadata = pod["metadata"]
+    event = {
+        "apiVersion": "events.k8s.io/v1",
+        "kind": "Event",
+        "metadata": {
+            "name": f"{metadata['name']}.{reason.lower()}",
+            "namespace": metadata["namespace"],
+            "uid": f"event-{metadata['name']}-{reason}",
+            "resourceVersion": str(resource_version),
+            "creationTimestamp": CREATION_TIMESTAMP,
+        },
+        "eventTime": time.strftime("%Y-%m-%dT%H:%M:%S.000000Z", time.gmtime()),
+        "reportingController": "kubelet",
+        "reportingInstance": metadata.get("uid"),
+        "action": reason,
+        "reason": reason,
+        "note": note,
+        "type": event_type,
+        "regarding": {"kind": "Pod", "namespace": metadata["namespace"], "name": metadata["name"]},
+    }
+    if count:
+        event["series"] = {"count": count, "lastObservedTime": event["eventTime"]}
+    return event
+
+class FakeCluster:
+    def __init__(self, pods, deployments, namespaces, churn=0.0, seed=0):
+        self._lock = threading.Condition()
+        self._random = random.Random(seed)
+        self._resource_version = 1
+        self._events = {kind: deque(maxlen=EVENT_LOG_SIZE) for kind in ("pods", "deployments", "namespaces", "events")}
+        self._objects = {"pods": {}, "deployments": {}, "namespaces": {}, "events": {}}
+        self.churn = churn if pods else 0.0
+        deployment_names = []
+        for index in range(max(1, deployments)):
+            name = f"app-{index:05d}"
+            namespace = f"ns-{index % namespaces:03d}"
+            deployment_names.append((name, namespace))
+        for index in range(pods):
+            name, namespace = deployment_names[index % len(deployment_names)]
+            pod = _pod(index, name, namespace, self._next_version())
+            self._store("pods", pod)
+            self._store("events", _event(pod, "Scheduled", f"Successfully assigned {namespace}/{pod['metadata']['name']}",
+                                         self._next_version()))
+        replicas = max(1, pods // len(deployment_names))
+        for name, namespace in deployment_names:
+            self._store("deployments", _deployment(name, namespace, replicas, self._next_version()))
+        for index in range(namespaces):
+            self._store("namespaces", _namespace(f"ns-{index:03d}", self._next_version()))
+        self._next_index = pods
+        self._pod_keys = list(self._objects["pods"])
+        self._deployment_names = deployment_names
+
+    def _next_version(self):
+        self._resource_version += 1
+        return self._resource_version
+
+    def _store(self, kind, obj):
+        metadata = obj["metadata"]
+        self._objects[kind][(metadata.get("namespace"), metadata["name"])] = obj
+
+    def _emit(self, kind, event_type, obj):
+        self._events[kind].append((int(obj["metadata"]["resourceVersion"]), event_type, obj))
+        self._lock.notify_all()
+
+    def tick(self, count):
+        # Churn : surtout des modifications de pods (redémarrages, phase), plus
+        # quelques suppressions/recréations
+        with self._lock:
+            pods = self._objects["pods"]
+            keys = self._pod_keys
+            for _ in range(count):
+                position = self._random.randrange(len(keys))
+                key = keys[position]
+                pod = pods[key]
+                if self._random.random() < 0.8:
+                    index = int(pod["metadata"]["uid"].split("-")[1])
+                    restarts = pod["status"]["containerStatuses"][0]["restartCount"] + 1
+                    phase = self._random.choice(("Running", "Running", "Running", "Pending", "Failed"))
+                    pod = _pod(index, pod["metadata"]["labels"]["app"], key[0], self._next_version(), restarts, phase)
+                    pods[key] = pod
+                    self._emit("pods", "MODIFIED", pod)
+                    # Redémarrage : événement BackOff répété (series.count croissant)
+                    exists = (key[0], f"{key[1]}.backoff") in self._objects["events"]
+                    event = _event(pod, "BackOff", "Back-off restarting failed container app", self._next_version(),
+                                   "Warning", restarts)
+                    self._store("events", event)
+                    self._emit("events", "MODIFIED" if exists else "ADDED", event)
+                else:
+                    del pods[key]
+                    deleted = dict(pod, metadata=dict(pod["metadata"], resourceVersion=str(self._next_version())))
+                    self._emit("pods", "DELETED", deleted)
+                    name, namespace = self._deployment_names[self._next_index % len(self._deployment_names)]
+                    created = _pod(self._next_index, name, namespace, self._next_version())
+                    self._next_index += 1
+                    self._store("pods", created)
+                    keys[position] = (namespace, created["metadata"]["name"])
+                    self._emit("pods", "ADDED", created)
+
+    def run_churn(self, stop):
+        # churn : événements par seconde, appliqués par tranches de 100 ms
+        pending = 0.0
+        while not stop.wait(0.1):
+            pending += self.churn * 0.1
+            if pending >= 1:
+                self.tick(int(pending))
+                pending -= int(pending)
+
+    def list(self, kind, namespace, limit, start):
+        with self._lock:
+            items = [obj for (ns, _), obj in self._objects[kind].items() if namespace is None or ns == namespace]
+            resource_version = self._resource_version
+        page = items[start:start + limit] if limit else items[start:]
+        metadata = {"resourceVersion": str(resource_version)}
+        if limit and start + limit < len(items):
+            metadata["continue"] = str(start + limit)
+        return {"kind": "List", "apiVersion": "v1", "metadata": metadata, "items": page}
+
+    def usage(self, plural):
+        # Relevé metrics.k8s.io/v1beta1 synthétique : valeurs tirées à chaque appel
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with self._lock:
+            pods = list(self._objects["pods"].values())
+        if plural == "nodes":
+            nodes = sorted({pod["spec"]["nodeName"] for pod in pods})
+            items = [{"metadata": {"name": node}, "timestamp": now, "window": "15s",
+                      "usage": {"cpu": f"{self._random.randrange(100, 8000)}m",
+                                "memory": f"{self._random.randrange(1, 32) * 2 ** 20}Ki"}} for node in nodes]
+        else:
+            items = [{"metadata": {"name": pod["metadata"]["name"], "namespace": pod["metadata"]["namespace"]},
+                      "timestamp": now, "window": "15s",
+                      "containers": [{"name": container["name"],
+                                      "usage": {"cpu": f"{self._random.randrange(1, 600) * 10 ** 6}n",
+                                                "memory": f"{self._random.randrange(1024, 300 * 1024)}Ki"}}
+                                     for container in pod["spec"]["containers"]]} for pod in pods]
+        return {"kind": f"{plural[:-1].capitalize()}MetricsList", "apiVersion": "metrics.k8s.io/v1beta1",
+                "metadata": {}, "items": items}
+
+    def get(self, kind, namespace, name):
+        with self._lock:
+            return self._objects[kind].get((namespace, name))
+
+    def events_since(self, kind, resource_version, timeout):
+        # Retourne (événements, trop ancien ?) ; attend au plus timeout secondes
+        with self._lock:
+            events = self._events[kind]
+            if events and resource_version < events[0][0] - 1 and resource_version < self._resource_version:
+                return [], True
+            pending = [event for event in events if event[0] > resource_version]
+            if not pending:
+                self._lock.wait(timeout)
+                pending = [event for event in events if event[0] > resource_version]
+            return pending, False
+
+def _route(path):
+    # (type, namespace, nom, sous-ressource) pour les URL servies, None sinon
+    parts = [part for part in path.split("/") if part]
+    if parts[:2] == ["api", "v1"]:
+        parts = parts[2:]
+    elif parts[:3] in (["apis", "apps", "v1"], ["apis", "events.k8s.io", "v1"]):
+        parts = parts[3:]
+    else:
+        return None
+    namespace = None
+    if len(parts) >= 3 and parts[0] == "namespaces":
+        namespace, parts = parts[1], parts[2:]
+    if not parts or parts[0] not in ("pods", "deployments", "namespaces", "events"):
+        return None
+    return parts[0], namespace, parts[1] if len(parts) > 1 else None, parts[2] if len(parts) > 2 else None
+
+def make_handler(cluster, stop):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _watch(self, kind, query):
+            resource_version = int(query.get("resourceVersion", ["0"])[0] or 0)
+            deadline = time.monotonic() + min(int(query.get("timeoutSeconds", [MAX_WATCH_SECONDS])[0]), MAX_WATCH_SECONDS)
+            bookmarks = query.get("allowWatchBookmarks", [""])[0].lower() == "true"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                while not stop.is_set() and time.monotonic() < deadline:
+                    events, expired = cluster.events_since(kind, resource_version, max(0, min(1, deadline - time.monotonic())))
+                    if expired:
+                        status = {"kind": "Status", "code": 410, "reason": "Expired", "message": "too old resource version"}
+                        self._write_chunk(json.dumps({"type": "ERROR", "object": status}).encode() + b"\n")
+                        break
+                    for version, event_type, obj in events:
+                        self._write_chunk(json.dumps({"type": event_type, "object": obj}).encode() + b"\n")
+                        resource_version = version
+                    if not events and bookmarks:
+                        bookmark = {"kind": kind, "metadata": {"resourceVersion": str(resource_version)}}
+                        self._write_chunk(json.dumps({"type": "BOOKMARK", "object": bookmark}).encode() + b"\n")
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def _logs(self, namespace, name, query):
+            # Logs synthétiques : tail_lines lignes d'historique, puis une
+            # ligne toutes les 1/LOG_LINES_PER_SECOND s tant que follow=true
+            if cluster.get("pods", namespace, name) is None:
+                self._send_json(404, {"kind": "Status", "code": 404, "reason": "NotFound", "message": f"pods {name} not found"})
+                return
+            container = query.get("container", ["app"])[0]
+            timestamps = query.get("timestamps", [""])[0].lower() == "true"
+            tail = min(int(query.get("tailLines", ["100"])[0] or 0), 1000)
+
+            def line(number, at):
+                text = f"{container} {name} ligne {number}"
+                stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(at)) + f".{int(at % 1 * 1e9):09d}Z"
+                return (f"{stamp} {text}" if timestamps else text).encode() + b"\n"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            now = time.time()
+            try:
+                self._write_chunk(b"".join(line(number, now - (tail - number)) for number in range(tail)))
+                number = tail
+                while query.get("follow", [""])[0].lower() == "true" and not stop.wait(1 / LOG_LINES_PER_SECOND):
+                    self._write_chunk(line(number, time.time()))
+                    number += 1
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path.rstrip("/") in ("/apis/metrics.k8s.io/v1beta1/pods", "/apis/metrics.k8s.io/v1beta1/nodes"):
+                self._send_json(200, cluster.usage(url.path.rstrip("/").rsplit("/", 1)[1]))
+                return
+            route = _route(url.path)
+            if route is None:
+                self._send_json(404, {"kind": "Status", "code": 404, "reason": "NotFound"})
+                return
+            kind, namespace, name, subresource = route
+            if subresource == "log" and kind == "pods":
+                self._logs(namespace, name, query)
+            elif subresource is not None:
+                self._send_json(404, {"kind": "Status", "code": 404, "reason": "NotFound"})
+            elif name is not None:
+                obj = cluster.get(kind, namespace, name)
+                if obj is None:
+                    self._send_json(404, {"kind": "Status", "code": 404, "reason": "NotFound", "message": f"{kind} {name} not found"})
+                else:
+                    self._send_json(200, obj)
+            elif query.get("watch", [""])[0].lower() == "true":
+                self._watch(kind, query)
+            else:
+                limit = int(query.get("limit", ["0"])[0] or 0)
+                start = int(query.get("continue", ["0"])[0] or 0)
+                self._send_json(200, cluster.list(kind, namespace, limit, start))
+    return Handler
+
+def kubeconfig(port):
+    # kubeconfig minimal pointant vers le faux apiserver (HTTP, jeton factice)
+    return {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "clusters": [{"name": "bench", "cluster": {"server": f"http://127.0.0.1:{port}"}}],
+        "users": [{"name": "bench", "user": {"token": "bench"}}],
+        "contexts": [{"name": "bench", "context": {"cluster": "bench", "user": "bench"}}],
+        "current-context": "bench",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux apiserver Kubernetes pour les benchmarks")
+    parser.add_argument("--pods", type=int, default=1000)
+    parser.add_argument("--deployments", type=int, default=None, help="par défaut : un pour 10 pods")
+    parser.add_argument("--namespaces", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.0, help="événements de pods par seconde")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    deployments = args.deployments if args.deployments is not None else max(1, args.pods // 10)
+    cluster = FakeCluster(args.pods, deployments, args.namespaces, args.churn, args.seed)
+    stop = threading.Event()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(cluster, stop))
+    server.daemon_threads = True
+    if args.churn:
+        threading.Thread(target=cluster.run_churn, args=(stop,), daemon=True).start()
+    # Première ligne de sortie : le port, lu par run.py
+    print(server.server_address[1], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
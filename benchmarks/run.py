@@ -0,0 +1,253 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark reproductible de l'application contre le faux apiserver
+# (benchmarks/fake_apiserver.py), sans cluster ni navigateur :
+#
+#   python benchmarks/run.py --pods 10000 --namespaces 50 --churn 20
+#   python benchmarks/run.py --scale 50k --compare benchmarks/results/<ancien>.json
+#
+# Mesure les fonctions de kubernetes_api et les callbacks Dash (via le client
+# de test Flask) : percentiles de latence, RSS maximal du processus et octets
+# envoyés au navigateur. Les résultats sont enregistrés en JSON.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES = {"1k": 1000, "10k": 10000, "50k": 50000}
+SESSION_ID = "benchmark-session"
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _summary(samples):
+    latencies = sorted(duration for duration, _ in samples)
+    sizes = [size for _, size in samples if size is not None]
+    summary = {
+        "count": len(latencies),
+        "p50_ms": _percentile(latencies, 0.5) * 1000,
+        "p90_ms": _percentile(latencies, 0.9) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+    }
+    if sizes:
+        summary["bytes_total"] = sum(sizes)
+        summary["bytes_mean"] = sum(sizes) / len(sizes)
+    return summary
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+
+    def measure(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.samples.setdefault(name, []).append((time.perf_counter() - start, None))
+        return result
+
+    def callback(self, client, name, output, inputs, state=(), changed=None):
+        # Appel d'un callback tel que le ferait le navigateur ; la taille
+        # mesurée est celle de la réponse HTTP effectivement envoyée
+        def props(items):
+            return [{"id": ident.split(".")[0], "property": ident.split(".")[1], "value": value} for ident, value in items]
+        outputs = [{"id": o.split(".")[0], "property": o.split(".")[1]} for o in output]
+        payload = {
+            "output": f"..{'...'.join(output)}.." if len(output) > 1 else output[0],
+            "outputs": outputs if len(output) > 1 else outputs[0],
+            "inputs": props(inputs),
+            "state": props(state),
+            "changedPropIds": changed or [inputs[0][0]],
+        }
+        start = time.perf_counter()
+        response = client.post("/_dash-update-component", json=payload)
+        duration = time.perf_counter() - start
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {response.get_data(as_text=True)[:500]}")
+        body = response.get_data()
+        self.samples.setdefault(name, []).append((duration, len(body)))
+        return json.loads(body)["response"] if response.status_code == 200 else None
+
+    def results(self):
+        return {name: _summary(samples) for name, samples in self.samples.items()}
+
+def _start_apiserver(args, pods):
+    command = [sys.executable, os.path.join(ROOT, "benchmarks", "fake_apiserver.py"),
+               "--pods", str(pods), "--namespaces", str(args.namespaces), "--churn", str(args.churn),
+               "--seed", str(args.seed)]
+    if args.deployments is not None:
+        command += ["--deployments", str(args.deployments)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    port = int(process.stdout.readline())
+    from fake_apiserver import kubeconfig
+    handle, path = tempfile.mkstemp(prefix="bench-kubeconfig-", suffix=".json")
+    with os.fdopen(handle, "w") as f:
+        json.dump(kubeconfig(port), f)
+    return process, path
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def _pick(rows, count):
+    step = max(1, len(rows) // count)
+    return rows[::step][:count]
+
+def run_benchmark(args, pods):
+    recorder = Recorder()
+    import kubernetes_api
+    import app as dash_app
+    from views import data_kinds
+    from client_manager import current_context
+
+    # Synchronisation initiale des informers (LIST paginé complet)
+    recorder.measure("sync_pods", kubernetes_api.get_pods, "all")
+    recorder.measure("sync_deployments", kubernetes_api.get_deployments, "all")
+    if args.churn:
+        time.sleep(args.warmup)
+
+    rows, status = kubernetes_api.get_pods("all")
+    deployments, _ = kubernetes_api.get_deployments("all")
+    if status != "Connecté" or not rows:
+        raise RuntimeError(f"Cache des pods indisponible : {status}")
+    namespace = rows[0]["namespace"]
+    app_label = deployments[0]["name"]
+    for _ in range(args.iterations):
+        recorder.measure("get_pods_all", kubernetes_api.get_pods, "all")
+        recorder.measure("get_pods_namespace", kubernetes_api.get_pods, namespace)
+        recorder.measure("get_pods_search_name", kubernetes_api.get_pods, "all", "0001")
+        recorder.measure("get_pods_search_selector", kubernetes_api.get_pods, "all", f"app={app_label},tier in (web,api)")
+        recorder.measure("get_deployments_all", kubernetes_api.get_deployments, "all")
+        recorder.measure("get_deployments_namespace", kubernetes_api.get_deployments, namespace)
+
+    sample_pods = _pick(rows, args.iterations)
+    sample_deployments = _pick(deployments, args.iterations)
+    for row in sample_pods:
+        recorder.measure("get_pod_details_cold", kubernetes_api.get_pod_details, row["name"], row["namespace"])
+    for row in sample_pods:
+        recorder.measure("get_pod_details_warm", kubernetes_api.get_pod_details, row["name"], row["namespace"])
+    for row in sample_deployments:
+        recorder.measure("get_deployment_details_cold", kubernetes_api.get_deployment_details, row["name"], row["namespace"])
+
+    # Callbacks Dash, de bout en bout à travers Flask
+    client = dash_app.app.server.test_client()
+    data_outputs = [f"{kind}-data-store.data" for kind in data_kinds()] + ["connection-status.children", "auto-refresh-interval.disabled"]
+    context = current_context()
+    data_inputs = [("connect-button.n_clicks", 1), ("refresh-button.n_clicks", None),
+                   ("context-dropdown.value", context), ("namespace-dropdown.value", "all"), ("search-input.value", ""),
+                   ("auto-refresh-interval.n_intervals", 0), ("active-view.data", "workloads-pods")]
+    session = [("session-id.data", SESSION_ID)]
+    table_outputs = ["pods-table.data", "pods-table.page_count", "pods-table.page_current"]
+    sort_by = [{"column_id": "restarts", "direction": "desc"}]
+    for iteration in range(args.iterations):
+        response = recorder.callback(client, "update_resources_data_full", data_outputs, data_inputs, session,
+                                     ["connect-button.n_clicks"])
+        token = response["pods-data-store"]["data"]
+        recorder.callback(client, "filter_pods_first_page", table_outputs,
+                          [("pods-data-store.data", token), ("pods-table.page_current", 0), ("pods-table.page_size", 15),
+                           ("pods-table.sort_by", []), ("pods-table.filter_query", "")], session)
+        recorder.callback(client, "filter_pods_sorted", table_outputs,
+                          [("pods-data-store.data", token), ("pods-table.page_current", 0), ("pods-table.page_size", 15),
+                           ("pods-table.sort_by", sort_by), ("pods-table.filter_query", "")], session,
+                          ["pods-table.sort_by"])
+        recorder.callback(client, "filter_pods_filtered", table_outputs,
+                          [("pods-data-store.data", token), ("pods-table.page_current", 3), ("pods-table.page_size", 15),
+                           ("pods-table.sort_by", sort_by),
+                           ("pods-table.filter_query", "{status} = Running && {restarts} >= 1")], session,
+                          ["pods-table.filter_query"])
+        incremental_inputs = list(data_inputs)
+        incremental_inputs[5] = ("auto-refresh-interval.n_intervals", iteration + 1)
+        response = recorder.callback(client, "update_resources_data_incremental", data_outputs, incremental_inputs,
+                                     session, ["auto-refresh-interval.n_intervals"])
+        if response and "pods-data-store" in response:
+            token = response["pods-data-store"]["data"]
+            recorder.callback(client, "filter_pods_refresh", table_outputs,
+                              [("pods-data-store.data", token), ("pods-table.page_current", 0),
+                               ("pods-table.page_size", 15), ("pods-table.sort_by", sort_by),
+                               ("pods-table.filter_query", "")], session)
+    for row in sample_pods:
+        pod_id = f"{row['namespace']}/{row['name']}"
+        recorder.callback(client, "update_pod_details", ["pod-details.children"],
+                          [("pods-table.selected_row_ids", [pod_id])], [("context-dropdown.value", context)])
+
+    results = recorder.results()
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {"pods": pods, "deployments": len(deployments), "namespaces": args.namespaces,
+                   "churn": args.churn, "iterations": args.iterations, "seed": args.seed},
+        # ru_maxrss est en kio sous Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "bytes_sent": sum(result.get("bytes_total", 0) for result in results.values()),
+        "results": results,
+    }
+
+def _print_report(report, baseline=None):
+    print(f"commit {report['commit']} - {report['params']} - RSS max {report['peak_rss_mb']:.1f} Mio - "
+          f"{report['bytes_sent']} octets envoyés")
+    print(f"{'opération':38} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'octets/appel':>13}")
+    for name, result in report["results"].items():
+        line = (f"{name:38} {result['count']:>5} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result.get('bytes_mean', 0):>13.0f}")
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous and previous["p50_ms"]:
+            line += f"   p50 x{result['p50_ms'] / previous['p50_ms']:.2f} vs {baseline['commit']}"
+        print(line)
+    if baseline:
+        print(f"RSS max : {baseline['peak_rss_mb']:.1f} -> {report['peak_rss_mb']:.1f} Mio")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'application contre un faux apiserver")
+    parser.add_argument("--scale", choices=sorted(SCALES), help="raccourci pour --pods")
+    parser.add_argument("--pods", type=int, default=1000)
+    parser.add_argument("--deployments", type=int, default=None, help="par défaut : un pour 10 pods")
+    parser.add_argument("--namespaces", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.0, help="événements de pods par seconde")
+    parser.add_argument("--warmup", type=float, default=2.0, help="secondes de churn avant les mesures")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON (défaut : benchmarks/results/<commit>-<pods>pods.json)")
+    parser.add_argument("--compare", help="résultats JSON précédents à comparer")
+    args = parser.parse_args()
+    pods = SCALES[args.scale] if args.scale else args.pods
+
+    sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+    process, kubeconfig_path = _start_apiserver(args, pods)
+    os.environ["KUBECONFIG"] = kubeconfig_path
+    # Mesures à froid : pas de cache persisté d'une exécution précédente
+    os.environ["FREELENS_SNAPSHOT_DIR"] = ""
+    try:
+        report = run_benchmark(args, pods)
+    finally:
+        process.terminate()
+        process.wait()
+        os.unlink(kubeconfig_path)
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{report['commit']}-{pods}pods.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print_report(report, baseline)
+    print(f"Résultats enregistrés dans {output}")
+    # Les threads des informers (watch en cours) ne doivent pas retenir le processus
+    os._exit(0)
+
+if __name__ == "__main__":
+    main()
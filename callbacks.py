@@ -1,12 +1,27 @@
-from dash import Input, Output, State
+from dash import Input, Output, State, Patch, no_update
 from dash import html
-from kubernetes_api import get_pods, get_pod_details, get_deployments, get_deployment_details
+from kubernetes_api import get_pods_changes, get_pod_details, get_deployments_changes, get_deployment_details
+from kubernetes_api import get_resource_changes, get_resource_details, get_all_pods_changes, get_namespaces
+from kubernetes_api import get_events_changes, get_pod_containers, get_pod_events, get_pod_usage, warm_contexts
+from kubernetes_api import get_overview
+from log_stream import open_logs, read_logs, close_logs
 from dash import callback_context
+from client_manager import client_stats
+from table_query import dataset_since, store_changes, query_dataset, page_update
+from scheduler import fetch_all, run
+from views import VIEWS, DEFAULT_VIEW, build_view, data_kinds, resolve_view
+from metrics import inc, instrumented_callback
+from resources import RESOURCES
+
+# Délai accordé à chaque type de ressource lors d'un rafraîchissement
+FETCH_TIMEOUTS = {'pods': 20, 'deployments': 10, 'allpods': 30, 'events': 20}
 
 def register_callbacks(app):
+    # Tous les callbacks passent par ce décorateur chronométré (voir /metrics)
+    callback = instrumented_callback(app)
     # Liste de tous les IDs des sous-éléments
     all_subitem_ids = [
-        "workloads-overview", "workloads-pods", "workloads-deployments", "workloads-daemonsets",
+        "workloads-overview", "workloads-pods", "workloads-allpods", "workloads-deployments", "workloads-daemonsets",
         "workloads-statefulsets", "workloads-replicasets", "workloads-replicationcontrollers",
         "workloads-jobs", "workloads-cronjobs",
         "config-configmaps", "config-secrets", "config-resourcequotas", "config-limitranges",
@@ -14,120 +29,301 @@ def register_callbacks(app):
         "config-leases", "config-mutatingwebhookconfigs", "config-validatingwebhookconfigs",
         "network-services", "network-endpoints", "network-ingresses", "network-ingressclasses",
         "network-networkpolicies", "network-portforwarding",
-        "storage-persistentvolumeclaims", "storage-persistentvolumes", "storage-storageclasses"
+        "storage-persistentvolumeclaims", "storage-persistentvolumes", "storage-storageclasses",
+        "events"
     ]
+    # Entrées de premier niveau qui ont leur propre vue
+    sidebar_items = {"events"}
+
+    # Lecture incrémentale du cache pour chaque type de ressource affiché ;
+    # les types de resources.py passent par le fetcher générique
+    resource_fetchers = {
+        'pods': get_pods_changes,
+        'deployments': get_deployments_changes,
+        'events': get_events_changes,
+    }
 
-    # Callback pour mettre à jour la classe active et basculer entre les vues
-    @app.callback(
+    def fetch_task(kind, context, namespace, search_term, since):
+        # La vue « tous les clusters » ignore le contexte sélectionné
+        if kind == 'allpods':
+            return get_all_pods_changes, (namespace, search_term, since)
+        if kind in resource_fetchers:
+            return resource_fetchers[kind], (namespace, search_term, since, context)
+        return get_resource_changes, (kind, namespace, search_term, since, context)
+
+    # Callback pour mettre à jour la classe active et basculer entre les vues :
+    # une vue n'est construite qu'à sa première activation, les vues déjà
+    # construites sont seulement masquées ou réaffichées.
+    @callback(
         [Output(id, 'className') for id in all_subitem_ids] +
-        [Output('pods-view', 'style'),
-         Output('deployments-view', 'style'),
+        [Output('views-container', 'children'),
+         Output('built-views', 'data'),
+         Output('active-view', 'data'),
          Output('page-title', 'children')],
         [Input(id, 'n_clicks') for id in all_subitem_ids],
+        State('built-views', 'data'),
         prevent_initial_call=False
     )
     def update_active_subitem_and_view(*args):
-        ctx = callback_context
-        if not ctx.triggered:
-            # Par défaut : "Pods" actif et vue des pods affichée
-            return ["sidebar-subitem active" if id == "workloads-pods" else "sidebar-subitem" for id in all_subitem_ids] + [{'display': 'block'}, {'display': 'none'}, "Pods"]
-        else:
-            triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
-            if triggered_id == "workloads-pods":
-                return ["sidebar-subitem active" if id == "workloads-pods" else "sidebar-subitem" for id in all_subitem_ids] + [{'display': 'block'}, {'display': 'none'}, "Pods"]
-            elif triggered_id == "workloads-deployments":
-                return ["sidebar-subitem active" if id == "workloads-deployments" else "sidebar-subitem" for id in all_subitem_ids] + [{'display': 'none'}, {'display': 'block'}, "Deployments"]
-            else:
-                # Pour les autres sous-menus, garder la vue des pods par défaut
-                return ["sidebar-subitem active" if id == triggered_id else "sidebar-subitem" for id in all_subitem_ids] + [{'display': 'block'}, {'display': 'none'}, "Pods"]
+        built_views = args[-1] or []
+        # Par défaut : "Pods" actif et vue des pods affichée
+        triggered_id = callback_context.triggered_id or DEFAULT_VIEW
+        view = resolve_view(triggered_id)
+        children = Patch()
+        for index, built_view in enumerate(built_views):
+            children[index]['props']['style'] = {'display': 'block' if built_view == view else 'none'}
+        if view not in built_views:
+            children.append(build_view(view))
+            built_views = built_views + [view]
+        classes = [("sidebar-item" if id in sidebar_items else "sidebar-subitem") + (" active" if id == triggered_id else "")
+                   for id in all_subitem_ids]
+        return classes + [children, built_views, view, VIEWS[view]["title"]]
 
     # Callback pour afficher un message dans la console
-    @app.callback(
+    @callback(
         Output('dummy-output', 'children'),
         Input('connect-button', 'n_clicks'),
         prevent_initial_call=False
     )
     def log_connection_attempt(n_clicks):
         if n_clicks:
-            print(f"Bouton de connexion cliqué! (clic #{n_clicks})")
+            print(f"Bouton de connexion cliqué! (clic #{n_clicks}) - client: {client_stats()}")
         return None
 
-    # Mise à jour des données des pods
-    @app.callback(
-        [Output('pods-data-store', 'data'),
-         Output('connection-status', 'children')],
+    # Mise à jour des données de toutes les ressources (le jeu complet reste
+    # côté serveur) : les lectures sont lancées en parallèle, chacune avec son
+    # délai, et un type en échec n'empêche pas l'affichage des autres.
+    # Seuls les types de la vue affichée sont lus : les vues masquées suspendent
+    # leur rafraîchissement et reprennent par delta quand on y revient.
+    @callback(
+        [Output(f'{kind}-data-store', 'data') for kind in data_kinds()] +
+        [Output('connection-status', 'children'),
+         Output('auto-refresh-interval', 'disabled')],
         [Input('connect-button', 'n_clicks'),
          Input('refresh-button', 'n_clicks'),
-         Input('namespace-dropdown', 'value')],
+         Input('context-dropdown', 'value'),
+         Input('namespace-dropdown', 'value'),
+         Input('search-input', 'value'),
+         Input('auto-refresh-interval', 'n_intervals'),
+         Input('active-view', 'data')],
+        State('session-id', 'data'),
         prevent_initial_call=True
     )
-    def update_pods_data(connect_clicks, refresh_clicks, namespace):
-        return get_pods(namespace)
+    def update_resources_data(connect_clicks, refresh_clicks, context, namespace, search_term, n_intervals, active_view, session_id):
+        # Rafraîchissement, auto-refresh et retour sur une vue : seul le delta
+        # depuis le dernier envoi est appliqué. Changer de contexte relit le
+        # jeu complet depuis le cache de ce cluster, sans requête s'il est chaud.
+        if not connect_clicks:
+            # Rien n'est chargé avant la première connexion
+            return [no_update] * len(data_kinds()) + [no_update, no_update]
+        incremental = callback_context.triggered_id in ('refresh-button', 'auto-refresh-interval', 'active-view')
+        params = (context, namespace, search_term)
+        active_kinds = VIEWS[resolve_view(active_view)]["kinds"]
+        if callback_context.triggered_id == 'connect-button':
+            # Caches des autres clusters chargés en arrière-plan, en parallèle
+            warm_contexts(active_kinds, context)
+        tasks = {
+            kind: fetch_task(kind, context, namespace, search_term, dataset_since(session_id, kind, params, incremental))
+            for kind in active_kinds
+        }
+        results, errors = fetch_all(tasks, FETCH_TIMEOUTS)
+        tokens, failures, status_changed = [], [], bool(errors)
+        for kind in data_kinds():
+            if kind not in tasks:
+                tokens.append(no_update)
+                continue
+            if kind in errors:
+                inc("freelens_fetch_errors_total", kind=kind)
+                tokens.append(no_update)
+                failures.append(f"{kind}: {errors[kind]}")
+                continue
+            token, status, changed = store_changes(session_id, kind, params, results[kind])
+            tokens.append(token)
+            status_changed = status_changed or changed
+            if status.startswith("Erreur"):
+                inc("freelens_fetch_errors_total", kind=kind)
+                failures.append(f"{kind}: {status[len('Erreur: '):]}")
+        # L'auto-refresh ne démarre qu'après une connexion réussie
+        connected = callback_context.triggered_id == 'connect-button' and (not failures or len(failures) < len(tasks))
+        interval = False if connected else no_update
+        if not tasks:
+            # Vue sans tableau (vue d'ensemble) : la connexion suffit
+            return tokens + ["Connecté" if connected else no_update, interval]
+        if not status_changed:
+            return tokens + [no_update, interval]
+        if not failures:
+            return tokens + ["Connecté", interval]
+        if len(failures) < len(tasks):
+            return tokens + [f"Connecté (partiel) - Erreur: {'; '.join(failures)}", interval]
+        return tokens + [f"Erreur: {'; '.join(failures)}", interval]
 
-    # Filtrage des pods dans le tableau
-    @app.callback(
-        Output('pods-table', 'data'),
-        [Input('search-input', 'value'),
-         Input('pods-data-store', 'data')]
+    # Filtrage, tri et pagination des pods côté serveur
+    @callback(
+        [Output('pods-table', 'data'),
+         Output('pods-table', 'page_count'),
+         Output('pods-table', 'page_current')],
+        [Input('pods-data-store', 'data'),
+         Input('pods-table', 'page_current'),
+         Input('pods-table', 'page_size'),
+         Input('pods-table', 'sort_by'),
+         Input('pods-table', 'filter_query')],
+        State('session-id', 'data')
     )
-    def filter_pods(search_term, pods_data):
+    def filter_pods(pods_data, page_current, page_size, sort_by, filter_query, session_id):
         if pods_data is None:
-            return []
-        if search_term:
-            return [pod for pod in pods_data if search_term.lower() in pod['name'].lower()]
-        return pods_data
+            return [], 1, 0
+        page, page_count, page_current = query_dataset(session_id, 'pods', filter_query, sort_by, page_current, page_size)
+        return page_update(session_id, 'pods', page), page_count, page_current
 
     # Affichage des détails d'un pod sélectionné
-    @app.callback(
+    @callback(
         Output('pod-details', 'children'),
-        Input('pods-table', 'selected_rows'),
-        State('pods-table', 'data')
+        Input('pods-table', 'selected_row_ids'),
+        State('context-dropdown', 'value')
     )
-    def update_pod_details(selected_rows, data):
-        if selected_rows:
-            pod = data[selected_rows[0]]
-            return get_pod_details(pod['name'], pod['namespace'])
+    def update_pod_details(selected_row_ids, context):
+        if selected_row_ids:
+            namespace, name = selected_row_ids[0].split('/', 1)
+            return [run(get_pod_details, name, namespace, context), get_pod_usage(name, namespace, context),
+                    get_pod_events(name, namespace, context)]
         return "Sélectionnez un pod pour voir les détails"
 
-    # Mise à jour des données des déploiements avec allow_duplicate=True
-    @app.callback(
-        [Output('deployments-data-store', 'data', allow_duplicate=True),
-         Output('connection-status', 'children', allow_duplicate=True)],
-        [Input('connect-button', 'n_clicks'),
-         Input('refresh-button', 'n_clicks'),
-         Input('namespace-dropdown', 'value')],
-        prevent_initial_call=True
+    # Pods de tous les clusters : même pagination côté serveur, sur le store fusionné
+    @callback(
+        [Output('allpods-table', 'data'),
+         Output('allpods-table', 'page_count'),
+         Output('allpods-table', 'page_current')],
+        [Input('allpods-data-store', 'data'),
+         Input('allpods-table', 'page_current'),
+         Input('allpods-table', 'page_size'),
+         Input('allpods-table', 'sort_by'),
+         Input('allpods-table', 'filter_query')],
+        State('session-id', 'data')
+    )
+    def filter_allpods(allpods_data, page_current, page_size, sort_by, filter_query, session_id):
+        if allpods_data is None:
+            return [], 1, 0
+        page, page_count, page_current = query_dataset(session_id, 'allpods', filter_query, sort_by, page_current, page_size)
+        return page_update(session_id, 'allpods', page), page_count, page_current
+
+    # Détails d'un pod de la vue multi-clusters : l'identifiant porte le contexte
+    @callback(
+        Output('allpods-details', 'children'),
+        Input('allpods-table', 'selected_row_ids')
     )
-    def update_deployments_data(connect_clicks, refresh_clicks, namespace):
-        return get_deployments(namespace)
+    def update_allpods_details(selected_row_ids):
+        if selected_row_ids:
+            context, namespace, name = selected_row_ids[0].rsplit('/', 2)
+            return [run(get_pod_details, name, namespace, context), get_pod_usage(name, namespace, context),
+                    get_pod_events(name, namespace, context)]
+        return "Sélectionnez un pod pour voir les détails"
 
-    # Filtrage des déploiements dans le tableau
-    @app.callback(
-        Output('deployments-table', 'data'),
-        [Input('search-input', 'value'),
-         Input('deployments-data-store', 'data')]
+    # Filtrage, tri et pagination des déploiements côté serveur
+    @callback(
+        [Output('deployments-table', 'data'),
+         Output('deployments-table', 'page_count'),
+         Output('deployments-table', 'page_current')],
+        [Input('deployments-data-store', 'data'),
+         Input('deployments-table', 'page_current'),
+         Input('deployments-table', 'page_size'),
+         Input('deployments-table', 'sort_by'),
+         Input('deployments-table', 'filter_query')],
+        State('session-id', 'data')
     )
-    def filter_deployments(search_term, deployments_data):
+    def filter_deployments(deployments_data, page_current, page_size, sort_by, filter_query, session_id):
         if deployments_data is None:
-            return []
-        if search_term:
-            return [deployment for deployment in deployments_data if search_term.lower() in deployment['name'].lower()]
-        return deployments_data
+            return [], 1, 0
+        page, page_count, page_current = query_dataset(session_id, 'deployments', filter_query, sort_by, page_current, page_size)
+        return page_update(session_id, 'deployments', page), page_count, page_current
 
     # Affichage des détails d'un déploiement sélectionné
-    @app.callback(
+    @callback(
         Output('deployment-details', 'children'),
-        Input('deployments-table', 'selected_rows'),
-        State('deployments-table', 'data')
+        Input('deployments-table', 'selected_row_ids'),
+        State('context-dropdown', 'value')
     )
-    def update_deployment_details(selected_rows, data):
-        if selected_rows:
-            deployment = data[selected_rows[0]]
-            return get_deployment_details(deployment['name'], deployment['namespace'])
+    def update_deployment_details(selected_row_ids, context):
+        if selected_row_ids:
+            namespace, name = selected_row_ids[0].split('/', 1)
+            return run(get_deployment_details, name, namespace, context)
         return "Sélectionnez un déploiement pour voir les détails"
 
+    # Événements agrégés : même pagination côté serveur
+    @callback(
+        [Output('events-table', 'data'),
+         Output('events-table', 'page_count'),
+         Output('events-table', 'page_current')],
+        [Input('events-data-store', 'data'),
+         Input('events-table', 'page_current'),
+         Input('events-table', 'page_size'),
+         Input('events-table', 'sort_by'),
+         Input('events-table', 'filter_query')],
+        State('session-id', 'data')
+    )
+    def filter_events(events_data, page_current, page_size, sort_by, filter_query, session_id):
+        if events_data is None:
+            return [], 1, 0
+        page, page_count, page_current = query_dataset(session_id, 'events', filter_query, sort_by, page_current, page_size)
+        return page_update(session_id, 'events', page), page_count, page_current
+
+    # Vue d'ensemble : rendue depuis les agrégats tenus à jour par les
+    # informers, et seulement quand leur version a changé
+    @callback(
+        [Output('overview-content', 'children'),
+         Output('overview-version', 'data')],
+        [Input('connect-button', 'n_clicks'),
+         Input('refresh-button', 'n_clicks'),
+         Input('context-dropdown', 'value'),
+         Input('auto-refresh-interval', 'n_intervals'),
+         Input('active-view', 'data')],
+        State('overview-version', 'data')
+    )
+    def update_overview(connect_clicks, refresh_clicks, context, n_intervals, active_view, version):
+        # Aucun informer démarré avant la première connexion
+        if not connect_clicks or active_view != 'workloads-overview':
+            return no_update, no_update
+        since = version if callback_context.triggered_id in ('refresh-button', 'auto-refresh-interval') else None
+        content, version = run(get_overview, context, since)
+        if content is None:
+            return no_update, no_update
+        return content, version
+
+    # Namespaces du cluster sélectionné, relus à chaque auto-refresh ; le
+    # namespace choisi revient à « tous » s'il n'existe pas dans ce cluster.
+    # Rien n'est chargé avant la première connexion.
+    @callback(
+        [Output('namespace-dropdown', 'options'),
+         Output('namespace-dropdown', 'value')],
+        [Input('connect-button', 'n_clicks'),
+         Input('context-dropdown', 'value'),
+         Input('auto-refresh-interval', 'n_intervals')],
+        [State('namespace-dropdown', 'options'),
+         State('namespace-dropdown', 'value')],
+        prevent_initial_call=False
+    )
+    def update_namespace_options(connect_clicks, context, n_intervals, options, namespace):
+        if not connect_clicks:
+            return no_update, no_update
+        try:
+            namespaces = run(get_namespaces, context)
+        except Exception:
+            return no_update, no_update
+        new_options = [{'label': 'All namespaces', 'value': 'all'}] + [{'label': name, 'value': name} for name in namespaces]
+        value = namespace if namespace in namespaces else 'all'
+        return (no_update if new_options == options else new_options), (no_update if value == namespace else value)
+
+    # Tableaux et détails des types servis par le moteur générique
+    for kind in RESOURCES:
+        register_resource_callbacks(callback, kind)
+
+    # Logs du pod sélectionné, dans la vue des pods et dans la vue multi-clusters
+    register_log_callbacks(callback, 'workloads-pods', 'pods-table', 'pod',
+                           lambda row_id, context: (context,) + tuple(row_id.split('/', 1)))
+    register_log_callbacks(callback, 'workloads-allpods', 'allpods-table', 'allpods',
+                           lambda row_id, context: tuple(row_id.rsplit('/', 2)))
+
     # Afficher/masquer les sous-menus Workloads
-    @app.callback(
+    @callback(
         [Output('workloads-subitems', 'style'),
          Output('workloads-menu-state', 'data')],
         Input('workloads-nav', 'n_clicks'),
@@ -141,7 +337,7 @@ def register_callbacks(app):
         return {'display': 'block' if open_state else 'none'}, {'open': open_state}
 
     # Afficher/masquer les sous-menus Config
-    @app.callback(
+    @callback(
         [Output('config-subitems', 'style'),
          Output('config-menu-state', 'data')],
         Input('config-nav', 'n_clicks'),
@@ -155,7 +351,7 @@ def register_callbacks(app):
         return {'display': 'block' if open_state else 'none'}, {'open': open_state}
 
     # Afficher/masquer les sous-menus Network
-    @app.callback(
+    @callback(
         [Output('network-subitems', 'style'),
          Output('network-menu-state', 'data')],
         Input('network-nav', 'n_clicks'),
@@ -169,7 +365,7 @@ def register_callbacks(app):
         return {'display': 'block' if open_state else 'none'}, {'open': open_state}
 
     # Afficher/masquer les sous-menus Storage
-    @app.callback(
+    @callback(
         [Output('storage-subitems', 'style'),
          Output('storage-menu-state', 'data')],
         Input('storage-nav', 'n_clicks'),
@@ -180,4 +376,100 @@ def register_callbacks(app):
         if n_clicks is None:
             return {'display': 'none'}, state
         open_state = not state['open']
-        return {'display': 'block' if open_state else 'none'}, {'open': open_state}
\ No newline at end of file
+        return {'display': 'block' if open_state else 'none'}, {'open': open_state}
+
+def register_resource_callbacks(callback, kind):
+    # Mêmes callbacks que pour les pods, paramétrés par le type ; les
+    # fonctions sont renommées par type avant l'enregistrement (métriques)
+    def filter_resources(data, page_current, page_size, sort_by, filter_query, session_id):
+        if data is None:
+            return [], 1, 0
+        page, page_count, page_current = query_dataset(session_id, kind, filter_query, sort_by, page_current, page_size)
+        return page_update(session_id, kind, page), page_count, page_current
+
+    def update_resource_details(selected_row_ids, context):
+        if selected_row_ids:
+            namespace, _, name = selected_row_ids[0].rpartition('/')
+            return run(get_resource_details, kind, name, namespace or None, context)
+        return "Sélectionnez une ressource pour voir les détails"
+
+    filter_resources.__name__ = f"filter_{kind}"
+    update_resource_details.__name__ = f"update_{kind}_details"
+    callback(
+        [Output(f'{kind}-table', 'data'),
+         Output(f'{kind}-table', 'page_count'),
+         Output(f'{kind}-table', 'page_current')],
+        [Input(f'{kind}-data-store', 'data'),
+         Input(f'{kind}-table', 'page_current'),
+         Input(f'{kind}-table', 'page_size'),
+         Input(f'{kind}-table', 'sort_by'),
+         Input(f'{kind}-table', 'filter_query')],
+        State('session-id', 'data')
+    )(filter_resources)
+    callback(
+        Output(f'{kind}-details', 'children'),
+        Input(f'{kind}-table', 'selected_row_ids'),
+        State('context-dropdown', 'value')
+    )(update_resource_details)
+
+def register_log_callbacks(callback, view, table_id, prefix, split_row_id):
+    # Un seul callback par panneau : la sélection d'un pod choisit son premier
+    # conteneur, les contrôles rouvrent le flux, l'intervalle n'envoie que les
+    # nouvelles lignes (Patch). Désélectionner ou masquer la vue détache la
+    # session du flux partagé.
+    def update_logs(selected_row_ids, container, since_seconds, tail_lines, n_intervals, active_view,
+                    context, session_id, options):
+        triggered_id = callback_context.triggered_id
+        if not selected_row_ids:
+            close_logs(session_id, prefix)
+            return [], None, [], "", True
+        if resolve_view(active_view) != view:
+            close_logs(session_id, prefix)
+            return no_update, no_update, no_update, no_update, True
+        context, namespace, name = split_row_id(selected_row_ids[0], context)
+        if triggered_id == f'{prefix}-log-interval':
+            update = read_logs(session_id, prefix)
+            if update is not None:
+                lines, trim, status = update
+                if not lines:
+                    return no_update, no_update, no_update, status, False
+                output = Patch()
+                for _ in range(trim):
+                    del output[0]
+                output.append("\n".join(lines) + "\n")
+                return no_update, no_update, output, status, False
+        new_options, new_container = no_update, no_update
+        if triggered_id == table_id or not options:
+            try:
+                containers = run(get_pod_containers, name, namespace, context)
+            except Exception as e:
+                close_logs(session_id, prefix)
+                return [], None, [], f"Erreur: {str(e)}", True
+            new_options = [{'label': c, 'value': c} for c in containers]
+            container = new_container = containers[0] if containers else None
+        if not container:
+            close_logs(session_id, prefix)
+            return new_options, new_container, [], "Aucun conteneur", True
+        try:
+            lines, status = open_logs(session_id, prefix, context, namespace, name, container, since_seconds, tail_lines)
+        except Exception as e:
+            return new_options, new_container, [], f"Erreur: {str(e)}", True
+        return new_options, new_container, ["\n".join(lines) + "\n"] if lines else [], status, False
+
+    update_logs.__name__ = f"update_{prefix}_logs"
+    callback(
+        [Output(f'{prefix}-log-container', 'options'),
+         Output(f'{prefix}-log-container', 'value'),
+         Output(f'{prefix}-log-output', 'children'),
+         Output(f'{prefix}-log-status', 'children'),
+         Output(f'{prefix}-log-interval', 'disabled')],
+        [Input(table_id, 'selected_row_ids'),
+         Input(f'{prefix}-log-container', 'value'),
+         Input(f'{prefix}-log-since', 'value'),
+         Input(f'{prefix}-log-tail', 'value'),
+         Input(f'{prefix}-log-interval', 'n_intervals'),
+         Input('active-view', 'data')],
+        [State('context-dropdown', 'value'),
+         State('session-id', 'data'),
+         State(f'{prefix}-log-container', 'options')]
+    )(update_logs)
@@ -0,0 +1,132 @@
+import threading
+from kubernetes import client, config
+from kubernetes.dynamic import DynamicClient
+from metrics import add_collector, instrument_rest_client
+
+# Taille du pool urllib3 partagé par tous les appels d'un même contexte
+# (les watches des informers y gardent chacun une connexion ouverte)
+POOL_MAXSIZE = 32
+
+_lock = threading.Lock()
+_api_clients = {}
+_apis = {}
+# Verrous de construction par contexte : lecture du kubeconfig, plugins
+# d'authentification et découverte du client dynamique se font hors de _lock,
+# un cluster lent ou injoignable ne bloque pas les autres
+_build_locks = {}
+_token_refreshes = 0
+_contexts = None
+
+def _count_token_refreshes(configuration):
+    # Le hook posé par load_kube_config ne recharge les identifiants (plugin
+    # exec, OIDC...) qu'à expiration ; on compte les renouvellements effectifs.
+    hook = configuration.refresh_api_key_hook
+    if hook is None:
+        return
+
+    def refresh(conf):
+        global _token_refreshes
+        before = dict(conf.api_key)
+        hook(conf)
+        if conf.api_key != before:
+            with _lock:
+                _token_refreshes += 1
+    configuration.refresh_api_key_hook = refresh
+
+def _cached(cache, key, build):
+    # cache[key], construit une seule fois par build() sous le verrou de la clé
+    with _lock:
+        value = cache.get(key)
+        if value is not None:
+            return value
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        with _lock:
+            value = cache.get(key)
+        if value is None:
+            value = build()
+            with _lock:
+                cache[key] = value
+        return value
+
+def _build_api_client(context):
+    configuration = client.Configuration()
+    config.load_kube_config(context=context, client_configuration=configuration)
+    configuration.connection_pool_maxsize = POOL_MAXSIZE
+    configuration.keep_alive = True
+    _count_token_refreshes(configuration)
+    api_client = client.ApiClient(configuration)
+    instrument_rest_client(api_client.rest_client)
+    return api_client
+
+def get_api_client(context=None):
+    # Le kubeconfig n'est lu qu'une fois par contexte ; l'ApiClient (et son
+    # pool de connexions TLS en keep-alive) est ensuite réutilisé partout.
+    return _cached(_api_clients, context, lambda: _build_api_client(context))
+
+def list_contexts():
+    # (noms des contextes du kubeconfig, contexte courant) ; le fichier n'est
+    # lu qu'une fois, comme pour les clients
+    global _contexts
+    with _lock:
+        if _contexts is None:
+            contexts, active = config.list_kube_config_contexts()
+            _contexts = ([context["name"] for context in contexts], active["name"])
+        return _contexts
+
+def current_context():
+    # Contexte courant du kubeconfig, celui des clients créés sans contexte
+    return list_contexts()[1]
+
+def resolve_context(context=None):
+    # None désigne le contexte courant : un seul cache et un seul pool par
+    # cluster, qu'il soit nommé ou non
+    return context or current_context()
+
+def _get_api(api_class, context):
+    return _cached(_apis, (api_class, context), lambda: api_class(get_api_client(context)))
+
+def core_v1(context=None):
+    return _get_api(client.CoreV1Api, context)
+
+def apps_v1(context=None):
+    return _get_api(client.AppsV1Api, context)
+
+def events_v1(context=None):
+    return _get_api(client.EventsV1Api, context)
+
+def custom_objects(context=None):
+    return _get_api(client.CustomObjectsApi, context)
+
+def dynamic_client(context=None):
+    # Client dynamique (découverte paresseuse des groupes d'API) du moteur
+    # générique de ressources ; partage l'ApiClient et son pool.
+    return _get_api(DynamicClient, context)
+
+def client_stats():
+    # Compteurs urllib3 : une requête servie sans nouvelle connexion est une
+    # connexion réutilisée, donc une poignée de main TLS évitée.
+    requests = 0
+    connections = 0
+    with _lock:
+        api_clients = list(_api_clients.values())
+        token_refreshes = _token_refreshes
+    for api_client in api_clients:
+        pools = api_client.rest_client.pool_manager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests += pool.num_requests
+                connections += pool.num_connections
+    return {
+        "clients": len(api_clients),
+        "requests": requests,
+        "connections_opened": connections,
+        "connections_reused": requests - connections,
+        "token_refreshes": token_refreshes,
+    }
+
+def _collect():
+    return [(f"freelens_apiclient_{name}", {}, value) for name, value in client_stats().items()]
+
+add_collector(_collect)
@@ -0,0 +1,270 @@
+import contextlib
+import sys
+import threading
+from array import array
+
+# Types de colonnes :
+#   "category" : chaînes peu variées (namespace, node, QoS, statut...) encodées
+#                par dictionnaire, un entier par ligne
+#   "str"      : chaînes libres, internées
+#   "int"      : entiers (array 'q')
+#   "time"     : horodatages epoch en secondes (array 'd')
+_ARRAY_CODES = {"category": "i", "int": "q", "time": "d"}
+
+def _missing_last(value):
+    return (value is None or value == "N/A", value if value is not None else "")
+
+class ColumnStore:
+    # Stockage en colonnes des lignes projetées d'un informer : une ligne est
+    # un numéro de slot commun à toutes les colonnes. Les dictionnaires de
+    # lignes ne sont matérialisés que pour la page affichée.
+    # derived : colonnes calculées à la lecture, {nom: (colonne source, fonction,
+    # tri inversé par rapport à la source)}.
+    def __init__(self, schema, derived=None):
+        self.schema = dict(schema)
+        self.derived = dict(derived or {})
+        self.lock = threading.RLock()
+        self._columns = {}
+        self._dictionaries = {}
+        self._codes = {}
+        for name, kind in self.schema.items():
+            if kind in _ARRAY_CODES:
+                self._columns[name] = array(_ARRAY_CODES[kind])
+            else:
+                self._columns[name] = []
+            if kind == "category":
+                self._dictionaries[name] = []
+                self._codes[name] = {}
+        self._keys = []
+        self._slots = {}
+        self._free = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _encode(self, name, value):
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = len(self._dictionaries[name])
+            self._dictionaries[name].append(value)
+            codes[value] = code
+        return code
+
+    def _cell(self, name, kind, value):
+        if kind == "category":
+            return self._encode(name, value)
+        if kind in ("int", "time"):
+            return value or 0
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def put(self, key, row):
+        with self.lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                    self._keys[slot] = key
+                else:
+                    slot = len(self._keys)
+                    self._keys.append(key)
+                    for column in self._columns.values():
+                        column.append(0 if isinstance(column, array) else None)
+                self._slots[key] = slot
+            for name, kind in self.schema.items():
+                self._columns[name][slot] = self._cell(name, kind, row.get(name))
+            return slot
+
+    def remove(self, key):
+        with self.lock:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._keys[slot] = None
+                self._free.append(slot)
+
+    def load(self, keys, columns, dictionaries):
+        # Remplit un store vide d'un bloc (restauration d'un snapshot) : les
+        # colonnes sont alignées sur keys, les catégorielles codées selon
+        # dictionaries
+        with self.lock:
+            self._keys = list(keys)
+            self._slots = {key: slot for slot, key in enumerate(self._keys)}
+            self._free = []
+            for name, kind in self.schema.items():
+                self._columns[name] = columns[name]
+                if kind == "category":
+                    self._dictionaries[name] = list(dictionaries[name])
+                    self._codes[name] = {value: code for code, value in enumerate(self._dictionaries[name])}
+
+    def copy(self):
+        # Copie des colonnes, dictionnaires et clés : un snapshot est encodé
+        # depuis la copie, hors du verrou de l'informer
+        with self.lock:
+            store = ColumnStore(self.schema, self.derived)
+            store._keys = list(self._keys)
+            store._slots = dict(self._slots)
+            store._free = list(self._free)
+            for name, column in self._columns.items():
+                store._columns[name] = column[:]
+            for name, dictionary in self._dictionaries.items():
+                store._dictionaries[name] = list(dictionary)
+                store._codes[name] = dict(self._codes[name])
+            return store
+
+    def has(self, key):
+        return key in self._slots
+
+    def keys(self):
+        with self.lock:
+            return list(self._slots)
+
+    def slots(self, keys):
+        with self.lock:
+            slots = self._slots
+            return [slots[key] for key in keys if key in slots]
+
+    def column(self, name):
+        # Colonne brute et dictionnaire éventuel (écriture des snapshots)
+        return self._columns[name], self._dictionaries.get(name)
+
+    def key_of(self, slot):
+        return self._keys[slot]
+
+    def value(self, slot, name):
+        derived = self.derived.get(name)
+        if derived is not None:
+            return derived[1](self.value(slot, derived[0]))
+        value = self._columns[name][slot]
+        if self.schema[name] == "category":
+            return self._dictionaries[name][value]
+        return value
+
+    def get(self, key):
+        with self.lock:
+            slot = self._slots.get(key)
+            return None if slot is None else self.materialize([slot])[0]
+
+    def materialize(self, slots):
+        # Reconstruit les dictionnaires de lignes pour quelques slots seulement
+        names = list(self.schema) + list(self.derived)
+        with self.lock:
+            return [{name: self.value(slot, name) for name in names} for slot in slots]
+
+    def filter(self, slots, name, predicate):
+        # Sur une colonne catégorielle, le prédicat n'est évalué qu'une fois
+        # par valeur distincte ; le filtrage se fait ensuite sur les codes.
+        with self.lock:
+            if name in self.derived:
+                return [slot for slot in slots if predicate(self.value(slot, name))]
+            if name not in self.schema:
+                return [slot for slot in slots if predicate(None)]
+            column = self._columns[name]
+            if self.schema[name] == "category":
+                matching = {code for code, value in enumerate(self._dictionaries[name]) if predicate(value)}
+                return [slot for slot in slots if column[slot] in matching]
+            return [slot for slot in slots if predicate(column[slot])]
+
+    def sort(self, slots, name, reverse=False):
+        with self.lock:
+            if name in self.derived:
+                source, _, inverted = self.derived[name]
+                return self.sort(slots, source, reverse != inverted)
+            if name not in self.schema:
+                return list(slots)
+            column = self._columns[name]
+            kind = self.schema[name]
+            if kind == "category":
+                # Rang de chaque code dans l'ordre trié du dictionnaire
+                dictionary = self._dictionaries[name]
+                ranks = array("i", [0] * len(dictionary))
+                for rank, code in enumerate(sorted(range(len(dictionary)), key=lambda c: _missing_last(dictionary[c]))):
+                    ranks[code] = rank
+                return sorted(slots, key=lambda slot: ranks[column[slot]], reverse=reverse)
+            if kind == "str":
+                return sorted(slots, key=lambda slot: _missing_last(column[slot]), reverse=reverse)
+            return sorted(slots, key=column.__getitem__, reverse=reverse)
+
+@contextlib.contextmanager
+def _all_locks(locks):
+    with contextlib.ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        yield
+
+class MergedStore:
+    # Vue en lecture seule sur plusieurs ColumnStore (un par cluster), pour
+    # filtrer, trier et paginer leurs lignes ensemble sans les copier. Un slot
+    # est un couple (rang du store, slot local) ; une clé est un couple
+    # (étiquette du store, clé locale) ; la colonne column porte l'étiquette.
+    def __init__(self, stores, column):
+        self._labels = list(stores)
+        self._stores = list(stores.values())
+        self._ranks = {label: rank for rank, label in enumerate(self._labels)}
+        self.column = column
+        self.schema = dict(self._stores[0].schema) if self._stores else {}
+        self.schema[column] = "category"
+        self.derived = dict(self._stores[0].derived) if self._stores else {}
+
+    @property
+    def lock(self):
+        # Verrous de tous les stores sous-jacents, pris dans l'ordre des
+        # étiquettes : une requête (slots, filtre, tri, page) voit des slots
+        # stables dans chaque cluster
+        return _all_locks([self._stores[self._ranks[label]].lock for label in sorted(self._labels)])
+
+    def __len__(self):
+        return sum(len(store) for store in self._stores)
+
+    def _groups(self, slots):
+        groups = {}
+        for rank, slot in slots:
+            groups.setdefault(rank, []).append(slot)
+        return groups.items()
+
+    def keys(self):
+        return [(label, key) for label, store in zip(self._labels, self._stores) for key in store.keys()]
+
+    def slots(self, keys):
+        groups = {}
+        for label, key in keys:
+            rank = self._ranks.get(label)
+            if rank is not None:
+                groups.setdefault(rank, []).append(key)
+        return [(rank, slot) for rank, local_keys in groups.items() for slot in self._stores[rank].slots(local_keys)]
+
+    def key_of(self, slot):
+        return self._labels[slot[0]], self._stores[slot[0]].key_of(slot[1])
+
+    def value(self, slot, name):
+        if name == self.column:
+            return self._labels[slot[0]]
+        return self._stores[slot[0]].value(slot[1], name)
+
+    def materialize(self, slots):
+        rows = []
+        for rank, slot in slots:
+            row = self._stores[rank].materialize([slot])[0]
+            row[self.column] = self._labels[rank]
+            rows.append(row)
+        return rows
+
+    def filter(self, slots, name, predicate):
+        # Chaque store filtre ses propres slots (prédicat évalué une fois par
+        # valeur distincte sur les colonnes catégorielles)
+        if name == self.column:
+            matching = {rank for rank, label in enumerate(self._labels) if predicate(label)}
+            return [slot for slot in slots if slot[0] in matching]
+        return [(rank, slot) for rank, local_slots in self._groups(slots)
+                for slot in self._stores[rank].filter(local_slots, name, predicate)]
+
+    def sort(self, slots, name, reverse=False):
+        # Les codes des colonnes catégorielles diffèrent d'un store à l'autre :
+        # le tri fusionné compare les valeurs
+        if name in self.derived:
+            source, _, inverted = self.derived[name]
+            return self.sort(slots, source, reverse != inverted)
+        if name not in self.schema:
+            return list(slots)
+        if self.schema[name] in ("category", "str"):
+            return sorted(slots, key=lambda slot: _missing_last(self.value(slot, name)), reverse=reverse)
+        return sorted(slots, key=lambda slot: self.value(slot, name), reverse=reverse)
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+from metrics import add_collector
+
+# Nombre de panneaux de détails gardés en mémoire
+MAX_ENTRIES = 256
+# Durée de validité d'un panneau quand le resourceVersion courant est inconnu
+TTL_SECONDS = 30
+
+class DetailCache:
+    # Cache LRU des panneaux de détails déjà rendus (hors âge), par objet : une entrée
+    # n'est servie que si son resourceVersion est celui connu du cache des
+    # informers (ou, à défaut, tant que son TTL court).
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, resource_version=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_version, expires, payload = entry
+                if resource_version is not None and cached_version == resource_version:
+                    fresh = True
+                else:
+                    fresh = resource_version is None and time.monotonic() < expires
+                if fresh:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, resource_version, payload):
+        with self._lock:
+            self._entries[key] = (resource_version, time.monotonic() + self._ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+detail_cache = DetailCache()
+
+def _collect():
+    lookups = detail_cache.hits + detail_cache.misses
+    return [
+        ("freelens_detail_cache_hits", {}, detail_cache.hits),
+        ("freelens_detail_cache_misses", {}, detail_cache.misses),
+        ("freelens_detail_cache_hit_ratio", {}, detail_cache.hits / lookups if lookups else 0),
+    ]
+
+add_collector(_collect)
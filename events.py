@@ -0,0 +1,223 @@
+import calendar
+import heapq
+import time
+from columnar import ColumnStore
+from informer import Informer, object_key
+from label_index import LabelIndex
+
+# Lignes agrégées gardées par namespace, et au total : au-delà, les moins
+# récemment vues sont évincées
+EVENTS_PER_NAMESPACE = 500
+MAX_EVENT_ROWS = 20000
+
+EVENT_SCHEMA = {
+    "name": "str", "namespace": "category", "type": "category", "reason": "category",
+    "object_kind": "category", "object_name": "str", "object": "str", "message": "str",
+    "source": "category", "count": "int", "first_seen": "time", "last_seen": "time",
+    "resource_version": "str",
+}
+# Champs interrogeables par sélecteur (regarding.name=..., reason=..., type=Warning)
+EVENT_INDEX_FIELDS = ("object_kind", "object_name", "reason", "type")
+
+def _format_elapsed(timestamp):
+    seconds = int(max(0, time.time() - timestamp))
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+EVENT_DERIVED = {
+    "first_seen_ago": ("first_seen", _format_elapsed, True),
+    "last_seen_ago": ("last_seen", _format_elapsed, True),
+}
+
+def _timestamp(value):
+    # Time ("...:05Z") ou MicroTime ("...:05.123456Z") Kubernetes -> epoch
+    if not value:
+        return None
+    seconds = calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S"))
+    fraction = value[19:].rstrip("Z")
+    return seconds + (float(fraction) if fraction.startswith(".") else 0)
+
+def _occurrence(event):
+    # (nombre d'occurrences, première vue, dernière vue) d'un Event
+    # events.k8s.io/v1, avec repli sur les champs hérités de core/v1
+    series = event.get("series") or {}
+    created = _timestamp(event["metadata"].get("creationTimestamp"))
+    first = _timestamp(event.get("eventTime")) or _timestamp(event.get("deprecatedFirstTimestamp")) or created
+    last = (_timestamp(series.get("lastObservedTime")) or _timestamp(event.get("deprecatedLastTimestamp"))
+            or first)
+    return series.get("count") or event.get("deprecatedCount") or 1, first or 0, last or 0
+
+class _Ring:
+    # Clés d'un tampon ordonnées par dernière vue : la plus ancienne est
+    # évincée quand il déborde (tas à invalidation paresseuse)
+    def __init__(self):
+        self.last_seen = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self.last_seen)
+
+    def touch(self, key, last_seen):
+        self.last_seen[key] = last_seen
+        heapq.heappush(self._heap, (last_seen, key))
+        if len(self._heap) > 2 * len(self.last_seen) + 64:
+            self._heap = [(seen, key) for key, seen in self.last_seen.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, key):
+        self.last_seen.pop(key, None)
+
+    def oldest(self):
+        while self._heap:
+            seen, key = self._heap[0]
+            if self.last_seen.get(key) == seen:
+                return key
+            heapq.heappop(self._heap)
+        return None
+
+class _EventBuffer:
+    # Agrégation des Event par (objet concerné, raison) dans un ColumnStore :
+    # le nombre d'occurrences d'une ligne est la somme de ceux de ses Event
+    # sources, dont on suit le dernier compte connu (series.count croît à
+    # chaque répétition).
+    def __init__(self, schema, derived, index_fields, per_namespace, max_rows):
+        self.store = ColumnStore(schema, derived)
+        self.index = LabelIndex(index_fields)
+        self.by_namespace = {}
+        self._per_namespace = per_namespace
+        self._max_rows = max_rows
+        self._rings = {}
+        self._all = _Ring()
+        self._sources = {}
+        self._members = {}
+
+    def add(self, event):
+        # Retourne (clé de la ligne agrégée, clés évincées)
+        metadata = event["metadata"]
+        namespace = metadata.get("namespace")
+        regarding = event.get("regarding") or event.get("involvedObject") or {}
+        kind, name = regarding.get("kind") or "", regarding.get("name") or ""
+        reason = event.get("reason") or ""
+        key = object_key(namespace, f"{kind}:{name}:{reason}".replace("/", "_"))
+        event_key = object_key(namespace, metadata["name"])
+        count, first_seen, last_seen = _occurrence(event)
+        previous = self._sources.get(event_key)
+        row = self.store.get(key)
+        if row is None:
+            total = count
+        else:
+            known = previous[1] if previous and previous[0] == key else 0
+            total = row["count"] + max(0, count - known)
+            first_seen = min(first_seen, row["first_seen"])
+            if last_seen < row["last_seen"]:
+                # Occurrence plus ancienne que la ligne : message et date gardés
+                last_seen, event = row["last_seen"], None
+        self._sources[event_key] = (key, count)
+        self._members.setdefault(key, set()).add(event_key)
+        if event is not None:
+            row = {
+                "name": key.rpartition("/")[2],
+                "namespace": namespace,
+                "type": event.get("type"),
+                "reason": reason,
+                "object_kind": kind,
+                "object_name": name,
+                "object": f"{kind}/{name}" if kind else name,
+                "message": event.get("note") or event.get("message"),
+                "source": event.get("reportingController") or (event.get("source") or {}).get("component"),
+                "resource_version": metadata.get("resourceVersion"),
+            }
+        row.update(count=total, first_seen=first_seen, last_seen=last_seen)
+        self.store.put(key, row)
+        self.index.add(key, None, row)
+        self.by_namespace.setdefault(namespace, set()).add(key)
+        ring = self._rings.setdefault(namespace, _Ring())
+        ring.touch(key, last_seen)
+        self._all.touch(key, last_seen)
+        evicted = []
+        while len(ring) > self._per_namespace:
+            evicted.append(self._evict(ring.oldest()))
+        while len(self._all) > self._max_rows:
+            evicted.append(self._evict(self._all.oldest()))
+        return (None if key in evicted else key), evicted
+
+    def forget(self, event):
+        # Event expiré (TTL de l'apiserver) : sa ligne agrégée reste affichée
+        metadata = event["metadata"]
+        source = self._sources.pop(object_key(metadata.get("namespace"), metadata["name"]), None)
+        if source is not None:
+            self._members.get(source[0], set()).discard(object_key(metadata.get("namespace"), metadata["name"]))
+
+    def _evict(self, key):
+        namespace = key.rpartition("/")[0] or None
+        self.store.remove(key)
+        self.index.remove(key)
+        keys = self.by_namespace.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_namespace[namespace]
+        ring = self._rings.get(namespace)
+        if ring is not None:
+            ring.remove(key)
+            if not ring:
+                del self._rings[namespace]
+        self._all.remove(key)
+        for event_key in self._members.pop(key, ()):
+            self._sources.pop(event_key, None)
+        return key
+
+class EventInformer(Informer):
+    # Informer des Event agrégés : une ligne par (objet concerné, raison), avec
+    # nombre d'occurrences, première et dernière vue. Le LIST initial est
+    # agrégé page par page et les tampons par namespace bornent la mémoire,
+    # quelle que soit la taille du cluster.
+    # Les comptes par Event source ne sont pas dans les snapshots : pas de
+    # reprise depuis le disque, un LIST recompose l'agrégation.
+    persistent = False
+
+    def __init__(self, kind, list_func, per_namespace=EVENTS_PER_NAMESPACE, max_rows=MAX_EVENT_ROWS):
+        super().__init__(kind, list_func, None, EVENT_SCHEMA, EVENT_DERIVED, index_fields=EVENT_INDEX_FIELDS)
+        self._limits = (per_namespace, max_rows)
+        self._buffer = self._new_buffer()
+        self.store, self.index = self._buffer.store, self._buffer.index
+        self._by_namespace = self._buffer.by_namespace
+
+    def _new_buffer(self):
+        return _EventBuffer(self._schema, self._derived, self._index_fields, *self._limits)
+
+    def _relist(self):
+        buffer = self._new_buffer()
+        for item in self._iter_list():
+            buffer.add(item)
+        with self._lock:
+            self._buffer = buffer
+            self.store = buffer.store
+            self._by_namespace = buffer.by_namespace
+            self.index = buffer.index
+            self.sequence += 1
+            self._changes.clear()
+            self._reset_sequence = self.sequence
+            self.resource_version = self._list_resource_version
+        self.last_error = None
+        self._synced.set()
+        self._notify('RELIST', None)
+
+    def _apply(self, event_type, obj):
+        with self._lock:
+            if event_type == 'DELETED':
+                self._buffer.forget(obj)
+                key, evicted = None, []
+            else:
+                key, evicted = self._buffer.add(obj)
+            for evicted_key in evicted:
+                self._record(evicted_key)
+            if key is not None:
+                self._record(key)
+            self.resource_version = obj["metadata"]["resourceVersion"]
+        for evicted_key in evicted:
+            self._notify('DELETED', evicted_key)
+        if key is not None:
+            self._notify(event_type, key)
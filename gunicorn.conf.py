@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Service en production : gunicorn -c gunicorn.conf.py
+# Le processus maître lance un unique watcher qui publie le cache des
+# informers dans un répertoire partagé ; les workers le lisent (voir
+# shared_cache.py) et ne contactent pas l'apiserver pour les tableaux.
+wsgi_app = "app:server"
+bind = os.environ.get("FREELENS_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("FREELENS_WORKERS", multiprocessing.cpu_count()))
+threads = 4
+# /dev/shm : snapshots en mémoire, partagés via le cache de pages
+shared_directory = os.environ.setdefault(
+    "FREELENS_SHARED_CACHE",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "freelens-cache"),
+)
+raw_env = [f"FREELENS_SHARED_CACHE={shared_directory}"]
+
+# Relance d'un watcher mort : délai doublé tant qu'il meurt en moins de
+# WATCHER_RESTART_MAX_SECONDS, ramené au minimum après une vie plus longue
+WATCHER_RESTART_SECONDS = 1
+WATCHER_RESTART_MAX_SECONDS = 60
+
+_watcher = None
+_watcher_lock = threading.Lock()
+_stopping = threading.Event()
+
+def _start_watcher(server):
+    global _watcher
+    with _watcher_lock:
+        if _stopping.is_set():
+            return None
+        _watcher = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared_cache.py"),
+                                     "--dir", shared_directory])
+        server.log.info(f"Watcher du cache partagé démarré (pid {_watcher.pid}) dans {shared_directory}")
+        return _watcher
+
+def _supervise(server, watcher):
+    # Thread du processus maître : relance le watcher dès qu'il s'arrête
+    delay = WATCHER_RESTART_SECONDS
+    while watcher is not None:
+        started = time.monotonic()
+        code = watcher.wait()
+        if _stopping.is_set():
+            return
+        if time.monotonic() - started > WATCHER_RESTART_MAX_SECONDS:
+            delay = WATCHER_RESTART_SECONDS
+        server.log.warning(f"Watcher du cache partagé arrêté (code {code}), relancé dans {delay} s")
+        if _stopping.wait(delay):
+            return
+        delay = min(delay * 2, WATCHER_RESTART_MAX_SECONDS)
+        watcher = _start_watcher(server)
+
+def on_starting(server):
+    watcher = _start_watcher(server)
+    threading.Thread(target=_supervise, args=(server, watcher), name="watcher-supervisor", daemon=True).start()
+
+def on_reload(server):
+    # SIGHUP : le watcher est relancé par le superviseur (kubeconfig relu)
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.terminate()
+
+def on_exit(server):
+    _stopping.set()
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.terminate()
+            _watcher.wait()
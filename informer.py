@@ -0,0 +1,336 @@
+import json
+import threading
+import time
+from collections import deque
+from kubernetes.watch.watch import iter_resp_lines
+from kubernetes.client.rest import ApiException
+from columnar import ColumnStore
+from label_index import LabelIndex
+from snapshot import load_snapshot
+
+# Durée d'une requête watch avant reconnexion (l'apiserver coupe de toute façon)
+WATCH_TIMEOUT_SECONDS = 300
+# Attente entre deux tentatives après une erreur
+RETRY_BACKOFF_SECONDS = 5
+# Nombre de modifications conservées pour servir les mises à jour incrémentales
+CHANGELOG_SIZE = 20000
+# Nombre d'objets demandés par page lors d'un LIST
+LIST_CHUNK_SIZE = 500
+
+def object_key(namespace, name):
+    return f"{namespace}/{name}" if namespace else name
+
+def _check_response(response):
+    # Avec _preload_content=False le client ne lève pas d'erreur HTTP lui-même
+    if not 200 <= response.status <= 299:
+        raise ApiException(http_resp=response)
+
+class Informer:
+    # Cache mémoire d'un type de ressource : un LIST initial puis un watch
+    # continu qui maintient le store à jour à partir du resourceVersion.
+    # schema/derived : colonnes du ColumnStore qui conserve les lignes projetées.
+    # index_fields : champs des lignes indexés avec les labels (sélecteurs).
+    # persistent : le cache peut être persisté sur disque et restauré.
+    # Ordre des verrous : celui de l'informer avant celui du store (_apply
+    # écrit dans le store sous son verrou) ; jamais d'appel à l'informer
+    # sous store.lock.
+    persistent = True
+
+    def __init__(self, kind, list_func, project, schema, derived=None, index_fields=()):
+        self.kind = kind
+        self._list_func = list_func
+        self._project = project
+        self._schema = schema
+        self._derived = derived
+        self._index_fields = ("namespace",) + tuple(index_fields)
+        self.index = LabelIndex(self._index_fields)
+        self._lock = threading.RLock()
+        self.store = ColumnStore(schema, derived)
+        self._by_namespace = {}
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._response = None
+        self._list_resource_version = None
+        self.resource_version = None
+        self.last_error = None
+        # Numéro de séquence local, incrémenté à chaque événement appliqué
+        self.sequence = 0
+        self._changes = deque(maxlen=CHANGELOG_SIZE)
+        self._reset_sequence = 0
+        self._listeners = []
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"informer-{self.kind}", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def add_listener(self, listener):
+        # listener(type d'événement, clé) est appelé après chaque événement
+        # appliqué ; le type 'RELIST' (clé None) signale un rechargement complet.
+        self._listeners.append(listener)
+
+    def _notify(self, event_type, key):
+        for listener in self._listeners:
+            listener(event_type, key)
+
+    def export(self, writer):
+        # Copie l'état courant sous le verrou (colonnes, dictionnaires,
+        # postings, journal) puis appelle writer hors du verrou : l'encodage
+        # et l'écriture d'un snapshot ne bloquent ni le watch ni les lectures
+        with self._lock:
+            state = (self.kind, self.store.copy(), self.index.export(), self.resource_version, self.sequence,
+                     self._reset_sequence, list(self._changes), self._synced.is_set(),
+                     str(self.last_error) if self.last_error else None)
+        return writer(*state)
+
+    def restore(self, path):
+        # Repart d'un snapshot persisté (avant start) : le cache est servi tout
+        # de suite et le watch reprend au resourceVersion enregistré ; s'il est
+        # trop ancien (410), _run se rabat sur un LIST complet.
+        state = load_snapshot(path, self._schema, self._index_fields, self._derived)
+        if state is None:
+            return False
+        store, index, header = state
+        by_namespace = {}
+        for key in store.keys():
+            namespace, _, name = key.rpartition("/")
+            by_namespace.setdefault(namespace or None, set()).add(key)
+        with self._lock:
+            self.store = store
+            self._by_namespace = by_namespace
+            self.index = index
+            self.sequence += 1
+            self._changes.clear()
+            self._reset_sequence = self.sequence
+            self.resource_version = header["resource_version"]
+        self._synced.set()
+        self._notify('RELIST', None)
+        return True
+
+    def pin(self):
+        # Vue de lecture d'une requête : l'informer lui-même, dont le verrou
+        # garde store, index et journal cohérents (voir SharedInformer.pin)
+        return self
+
+    def wait_synced(self, timeout):
+        # Attend le premier LIST, mais rend la main dès qu'il échoue
+        deadline = time.monotonic() + timeout
+        while not self._synced.wait(0.1):
+            if self.last_error is not None or time.monotonic() >= deadline:
+                return False
+        return True
+
+    def list_keys(self, namespace='all'):
+        with self._lock:
+            if namespace == 'all':
+                return self.store.keys()
+            return list(self._by_namespace.get(namespace, ()))
+
+    def list(self, namespace='all'):
+        with self._lock:
+            store = self.store
+            return store.materialize(store.slots(self.list_keys(namespace)))
+
+    def select_keys(self, requirements, namespace='all'):
+        # Résolution d'un sélecteur par l'index inversé, sans parcours du store
+        if namespace != 'all':
+            requirements = list(requirements) + [("namespace", "=", frozenset([namespace]))]
+        with self._lock:
+            return self.index.select(requirements)
+
+    def get(self, namespace, name):
+        return self.get_by_key(object_key(namespace, name))
+
+    def get_by_key(self, key):
+        with self._lock:
+            return self.store.get(key)
+
+    def changes_since(self, sequence):
+        # Clés modifiées depuis la séquence donnée ; None si le journal ne
+        # remonte pas assez loin (relist ou débordement) : il faut tout relire.
+        with self._lock:
+            if sequence < self._reset_sequence or (self._changes and self._changes[0][0] > sequence + 1):
+                return self.sequence, None
+            keys = set()
+            for change_sequence, key in reversed(self._changes):
+                if change_sequence <= sequence:
+                    break
+                keys.add(key)
+            return self.sequence, keys
+
+    def _record(self, key):
+        self.sequence += 1
+        self._changes.append((self.sequence, key))
+
+    def _iter_list(self):
+        # LIST paginé (limit/continue) en JSON brut, sans construction des
+        # modèles OpenAPI : la mémoire de pointe est bornée par une page.
+        token = None
+        while True:
+            response = self._list_func(limit=LIST_CHUNK_SIZE, _continue=token, _preload_content=False)
+            try:
+                _check_response(response)
+                page = json.loads(response.data)
+            finally:
+                response.release_conn()
+            metadata = page.get("metadata") or {}
+            self._list_resource_version = metadata.get("resourceVersion")
+            yield from page.get("items") or ()
+            del page
+            token = metadata.get("continue")
+            if not token:
+                return
+
+    def _relist(self):
+        store = ColumnStore(self._schema, self._derived)
+        by_namespace = {}
+        index = LabelIndex(self._index_fields)
+        for item in self._iter_list():
+            metadata = item["metadata"]
+            row = self._project(item)
+            key = object_key(metadata.get("namespace"), metadata["name"])
+            store.put(key, row)
+            by_namespace.setdefault(metadata.get("namespace"), set()).add(key)
+            index.add(key, metadata.get("labels"), row)
+        with self._lock:
+            self.store = store
+            self._by_namespace = by_namespace
+            self.index = index
+            self.sequence += 1
+            self._changes.clear()
+            self._reset_sequence = self.sequence
+            self.resource_version = self._list_resource_version
+        self.last_error = None
+        self._synced.set()
+        self._notify('RELIST', None)
+
+    def _apply(self, event_type, obj):
+        metadata = obj["metadata"]
+        namespace = metadata.get("namespace")
+        key = object_key(namespace, metadata["name"])
+        with self._lock:
+            if event_type == 'DELETED':
+                self.store.remove(key)
+                self.index.remove(key)
+                keys = self._by_namespace.get(namespace)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_namespace[namespace]
+            else:
+                row = self._project(obj)
+                self.store.put(key, row)
+                self.index.add(key, metadata.get("labels"), row)
+                self._by_namespace.setdefault(namespace, set()).add(key)
+            self._record(key)
+            self.resource_version = metadata["resourceVersion"]
+        self._notify(event_type, key)
+
+    def _watch_once(self):
+        # Flux watch lu ligne à ligne en JSON brut, comme le LIST
+        response = self._list_func(
+            watch=True,
+            resource_version=self.resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=WATCH_TIMEOUT_SECONDS,
+            _preload_content=False,
+        )
+        self._response = response
+        try:
+            _check_response(response)
+            for line in iter_resp_lines(response):
+                if self._stop.is_set():
+                    break
+                if not line:
+                    continue
+                event = json.loads(line)
+                obj = event["object"]
+                if event["type"] == 'ERROR':
+                    raise ApiException(status=obj.get("code"), reason=f"{obj.get('reason')}: {obj.get('message')}")
+                if event["type"] == 'BOOKMARK':
+                    # Le bookmark ne porte que le resourceVersion à jour
+                    self.resource_version = obj["metadata"]["resourceVersion"]
+                    continue
+                self._apply(event["type"], obj)
+        finally:
+            self._response = None
+            response.close()
+            response.release_conn()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch_once()
+                self.last_error = None
+            except ApiException as e:
+                if e.status == 410:
+                    # resourceVersion trop ancien : on repart d'un LIST complet
+                    self.resource_version = None
+                    continue
+                self.last_error = e
+                self._stop.wait(RETRY_BACKOFF_SECONDS)
+            except Exception as e:
+                self.last_error = e
+                self._stop.wait(RETRY_BACKOFF_SECONDS)
+
+# Registre global : un seul informer (donc un seul watch) par type de ressource
+# et par contexte du kubeconfig (None : contexte courant)
+_informers = {}
+_informers_lock = threading.Lock()
+# Un verrou par (contexte, type) en cours de création
+_creating = {}
+# Mode multi-workers : fabrique de lecteurs du cache partagé (voir shared_cache.py)
+_shared_reader = None
+
+# Persistance sur disque : hook(informer, contexte) est appelé sur chaque
+# informer créé, avant son démarrage (voir persistence.py)
+_persistence = None
+
+def use_persistence(hook):
+    global _persistence
+    _persistence = hook
+
+def use_shared_cache(reader):
+    # reader(kind, derived, contexte) remplace désormais le démarrage des informers
+    global _shared_reader
+    _shared_reader = reader
+
+def ensure_informer(kind, factory, derived=None, context=None):
+    # derived : colonnes calculées du store, nécessaires aux lecteurs de
+    # snapshot qui ne passent pas par la fabrique
+    # La fabrique peut interroger l'apiserver (client, découverte) : elle
+    # tourne hors du verrou global, sous celui de son (contexte, type), et un
+    # cluster lent ne retarde que ses propres informers
+    key = (context, kind)
+    with _informers_lock:
+        informer = _informers.get(key)
+        if informer is not None:
+            return informer
+        lock = _creating.setdefault(key, threading.Lock())
+    with lock:
+        with _informers_lock:
+            informer = _informers.get(key)
+        if informer is not None:
+            return informer
+        if _shared_reader:
+            informer = _shared_reader(kind, derived, context)
+        else:
+            informer = factory()
+            if _persistence:
+                _persistence(informer, context)
+            informer.start()
+        with _informers_lock:
+            _informers[key] = informer
+            _creating.pop(key, None)
+        return informer
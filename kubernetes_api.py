@@ -1,47 +1,337 @@
-from kubernetes import client, config
+import calendar
 import datetime
-from dash import html
+import json
+import threading
+import time
+from dash import dcc, html
+from kubernetes.dynamic.exceptions import ResourceNotFoundError
+from client_manager import core_v1, apps_v1, events_v1, dynamic_client, list_contexts, resolve_context
+from columnar import MergedStore
+from detail_cache import detail_cache
+from events import EVENT_DERIVED, EventInformer
+from informer import Informer, ensure_informer, object_key
+from label_index import is_selector, parse_selector
+from overview import WorkloadOverview
+from resource_usage import UsageStore, cpu_millicores, format_cpu, format_memory, parse_quantity, usage_sampler
+from resources import RESOURCES
+from scheduler import submit
 
-def get_pods(namespace):
+# Délai maximal d'attente du premier LIST d'un informer
+SYNC_TIMEOUT_SECONDS = 30
+# Champs des pods interrogeables par sélecteur (node=..., phase=..., owner=...)
+POD_INDEX_FIELDS = ("node", "controlled_by", "qos", "status")
+# Délai avant de redemander à l'apiserver un type qu'il ne sert pas
+DISCOVERY_RETRY_SECONDS = 60
+# Événements les plus récents affichés dans les détails d'un pod
+POD_EVENTS_SHOWN = 10
+
+def _format_age(creation_timestamp):
+    age = datetime.timedelta(seconds=max(0, time.time() - creation_timestamp))
+    return f"{age.days}d" if age.days > 0 else f"{int(age.seconds / 3600)}h"
+
+def _parse_timestamp(value):
+    return calendar.timegm(time.strptime(value, "%Y-%m-%dT%H:%M:%SZ"))
+
+# Colonnes du cache : les champs peu variés sont encodés par dictionnaire,
+# l'âge est calculé à la lecture à partir de creation_timestamp.
+POD_SCHEMA = {
+    "name": "str", "namespace": "category", "containers": "category", "restarts": "int",
+    "controlled_by": "str", "node": "category", "qos": "category",
+    "creation_timestamp": "time", "status": "category", "resource_version": "str",
+    "cpu_limit": "int", "memory_limit": "int",
+}
+DEPLOYMENT_SCHEMA = {
+    "name": "str", "namespace": "category", "replicas": "category", "up_to_date": "int",
+    "available": "int", "creation_timestamp": "time", "strategy": "category", "labels": "str",
+    "resource_version": "str",
+}
+NAMESPACE_SCHEMA = {"name": "str", "status": "category", "creation_timestamp": "time", "resource_version": "str"}
+AGE_COLUMN = {"age": ("creation_timestamp", _format_age, True)}
+
+def _pod_limits(containers):
+    # Somme des limites CPU (millicores) et mémoire (octets) des conteneurs ;
+    # 0 dès qu'un conteneur n'en a pas : le pod n'est pas borné
+    cpu = memory = 0
+    for container in containers:
+        limits = (container.get("resources") or {}).get("limits") or {}
+        if cpu is not None:
+            cpu = cpu + (cpu_millicores(limits["cpu"]) or 0) if limits.get("cpu") else None
+        if memory is not None:
+            memory = memory + (parse_quantity(limits["memory"]) or 0) if limits.get("memory") else None
+    return int(cpu or 0), int(memory or 0)
+
+# Les projections travaillent sur le JSON brut renvoyé par l'apiserver et ne
+# retiennent que les champs affichés dans les tableaux.
+def _pod_row(pod):
+    metadata = pod["metadata"]
+    spec = pod.get("spec") or {}
+    status = pod.get("status") or {}
+    container_statuses = status.get("containerStatuses") or []
+    owner_references = metadata.get("ownerReferences")
+    container_count = len(spec.get("containers") or [])
+    container_ready = sum(1 for c in container_statuses if c.get("ready"))
+    restarts = sum(c.get("restartCount", 0) for c in container_statuses)
+    controlled_by = f"{owner_references[0]['kind']}/{owner_references[0]['name']}" if owner_references else "N/A"
+    cpu_limit, memory_limit = _pod_limits(spec.get("containers") or [])
+    return {
+        "name": metadata["name"],
+        "namespace": metadata.get("namespace"),
+        "containers": f"{container_ready}/{container_count}",
+        "restarts": restarts,
+        "controlled_by": controlled_by,
+        "node": spec.get("nodeName") or "N/A",
+        "qos": status.get("qosClass") or "N/A",
+        "creation_timestamp": _parse_timestamp(metadata["creationTimestamp"]),
+        "status": status.get("phase"),
+        "resource_version": metadata.get("resourceVersion"),
+        "cpu_limit": cpu_limit,
+        "memory_limit": memory_limit,
+    }
+
+def _deployment_row(deployment):
+    metadata = deployment["metadata"]
+    spec = deployment.get("spec") or {}
+    status = deployment.get("status") or {}
+    labels = metadata.get("labels")
+    return {
+        "name": metadata["name"],
+        "namespace": metadata.get("namespace"),
+        "replicas": f"{status.get('readyReplicas') or 0}/{spec.get('replicas')}",
+        "up_to_date": status.get("updatedReplicas") or 0,
+        "available": status.get("availableReplicas") or 0,
+        "creation_timestamp": _parse_timestamp(metadata["creationTimestamp"]),
+        "strategy": (spec.get("strategy") or {}).get("type"),
+        "labels": ", ".join([f"{k}={v}" for k, v in labels.items()]) if labels else "N/A",
+        "resource_version": metadata.get("resourceVersion")
+    }
+
+def _invalidate_details(kind, context):
+    # Un objet modifié ou supprimé par le watch sort du cache des détails
+    def listener(event_type, key):
+        if key is not None:
+            detail_cache.invalidate((context, kind, key))
+    return listener
+
+def _lazy_list_func(get_api, method, context):
+    # L'API typée (et l'import de son module, long pour CoreV1Api) n'est
+    # résolue qu'au premier appel, dans le thread de l'informer : un cache
+    # restauré depuis le disque est servi sans l'attendre
+    def list_func(**params):
+        return getattr(get_api(context), method)(**params)
+    return list_func
+
+def _pods_informer(context=None):
+    context = resolve_context(context)
+    def factory():
+        informer = Informer('pods', _lazy_list_func(core_v1, 'list_pod_for_all_namespaces', context), _pod_row,
+                            POD_SCHEMA, AGE_COLUMN, index_fields=POD_INDEX_FIELDS)
+        informer.add_listener(_invalidate_details('pods', context))
+        return informer
+    return ensure_informer('pods', factory, AGE_COLUMN, context)
+
+def _deployments_informer(context=None):
+    context = resolve_context(context)
+    def factory():
+        informer = Informer('deployments', _lazy_list_func(apps_v1, 'list_deployment_for_all_namespaces', context),
+                            _deployment_row, DEPLOYMENT_SCHEMA, AGE_COLUMN)
+        informer.add_listener(_invalidate_details('deployments', context))
+        return informer
+    return ensure_informer('deployments', factory, AGE_COLUMN, context)
+
+def _namespace_row(namespace):
+    metadata = namespace["metadata"]
+    return {
+        "name": metadata["name"],
+        "status": (namespace.get("status") or {}).get("phase"),
+        "creation_timestamp": _parse_timestamp(metadata["creationTimestamp"]),
+        "resource_version": metadata.get("resourceVersion"),
+    }
+
+def _namespaces_informer(context=None):
+    # Namespaces d'un cluster, pour les options du sélecteur de namespace
+    context = resolve_context(context)
+    def factory():
+        return Informer('namespaces', _lazy_list_func(core_v1, 'list_namespace', context), _namespace_row,
+                        NAMESPACE_SCHEMA, AGE_COLUMN)
+    return ensure_informer('namespaces', factory, AGE_COLUMN, context)
+
+def _events_informer(context=None):
+    # Un seul watch events.k8s.io/v1 par cluster, agrégé en mémoire bornée :
+    # sert la vue Events et les événements des détails de pods
+    context = resolve_context(context)
+    def factory():
+        return EventInformer('events', _lazy_list_func(events_v1, 'list_event_for_all_namespaces', context))
+    return ensure_informer('events', factory, EVENT_DERIVED, context)
+
+def _cached_resource_version(informer, key):
+    # resourceVersion connu du cache, ou None tant qu'il n'est pas synchronisé
+    row = informer.get_by_key(key)
+    return row["resource_version"] if row else None
+
+def _selector(search):
+    # Exigences du sélecteur saisi, ou None pour une recherche sur le nom :
+    # simple mot, ou sélecteur qui ne se lit pas encore (saisie en cours)
+    if not is_selector(search):
+        return None
     try:
-        config.load_kube_config()
-        api = client.CoreV1Api()
-        if namespace == 'all':
-            pods = api.list_pod_for_all_namespaces(watch=False)
+        return parse_selector(search)
+    except ValueError:
+        return None
+
+def _matching_keys(informer, namespace, search):
+    # Un sélecteur de labels/champs est résolu par l'index, un simple mot
+    # filtre la colonne des noms.
+    requirements = _selector(search)
+    if requirements is not None:
+        return list(informer.select_keys(requirements, namespace))
+    keys = informer.list_keys(namespace)
+    if not search:
+        return keys
+    search = search.lower()
+    store = informer.store
+    with store.lock:
+        slots = store.filter(store.slots(keys), "name", lambda name: search in name.lower())
+        return [store.key_of(slot) for slot in slots]
+
+def _read_cache(informer, namespace, search=None, timeout=SYNC_TIMEOUT_SECONDS):
+    if not informer.wait_synced(timeout):
+        return [], f"Erreur: {informer.last_error or 'synchronisation du cache en cours'}"
+    informer = informer.pin()
+    store = informer.store
+    # Clés résolues avant de prendre store.lock (ordre des verrous : informer
+    # puis store, voir Informer)
+    keys = _matching_keys(informer, namespace, search)
+    with store.lock:
+        return store.materialize(store.slots(keys)), "Connecté"
+
+def _read_changes(informer, namespace, search, since, timeout=SYNC_TIMEOUT_SECONDS):
+    # Retourne (informer, séquence, clés ajoutées ou modifiées, clés supprimées,
+    # statut). Sans séquence de départ exploitable, removed vaut None et les
+    # clés forment un jeu complet qui remplace le précédent.
+    if not informer.wait_synced(timeout):
+        return None, None, [], None, f"Erreur: {informer.last_error or 'synchronisation du cache en cours'}"
+    # Séquence, journal, store et index lus sur une même génération
+    informer = informer.pin()
+    sequence, keys = informer.changes_since(since) if since is not None else (informer.sequence, None)
+    if keys is None:
+        return informer, sequence, _matching_keys(informer, namespace, search), None, "Connecté"
+    requirements = _selector(search)
+    upserts, removed = [], []
+    for key in keys:
+        row = informer.get_by_key(key)
+        if row is None or (namespace != 'all' and row["namespace"] != namespace):
+            matched = False
+        elif requirements is not None:
+            matched = informer.index.matches(key, requirements)
+        else:
+            matched = not search or search.lower() in row["name"].lower()
+        if matched:
+            upserts.append(key)
         else:
-            pods = api.list_namespaced_pod(namespace, watch=False)
-        pods_data = []
-        for pod in pods.items:
-            creation_time = pod.metadata.creation_timestamp
-            age = datetime.datetime.now(creation_time.tzinfo) - creation_time
-            age_str = f"{age.days}d" if age.days > 0 else f"{int(age.seconds / 3600)}h"
-            container_count = len(pod.spec.containers)
-            container_ready = sum(1 for c in pod.status.container_statuses if c.ready) if pod.status.container_statuses else 0
-            restarts = sum(c.restart_count for c in pod.status.container_statuses) if pod.status.container_statuses else 0
-            controlled_by = f"{pod.metadata.owner_references[0].kind}/{pod.metadata.owner_references[0].name}" if pod.metadata.owner_references else "N/A"
-            pods_data.append({
-                "name": pod.metadata.name,
-                "namespace": pod.metadata.namespace,
-                "containers": f"{container_ready}/{container_count}",
-                "restarts": restarts,
-                "controlled_by": controlled_by,
-                "node": pod.spec.node_name if pod.spec.node_name else "N/A",
-                "qos": pod.status.qos_class if pod.status.qos_class else "N/A",
-                "age": age_str,
-                "status": pod.status.phase
-            })
-        return pods_data, "Connecté"
+            removed.append(key)
+    return informer, sequence, upserts, removed, "Connecté"
+
+def get_pods(namespace, search=None, context=None):
+    try:
+        return _read_cache(_pods_informer(context), namespace, search)
     except Exception as e:
         return [], f"Erreur: {str(e)}"
 
-def get_pod_details(name, namespace):
+class _PodsWithUsage:
+    # Source du tableau des pods : store de l'informer joint au dernier
+    # relevé metrics-server du cluster
+    def __init__(self, informer, sampler):
+        self._informer = informer
+        self._sampler = sampler
+
+    @property
+    def store(self):
+        return UsageStore(self._informer.store, self._sampler)
+
+def get_pods_changes(namespace, search=None, since=None, context=None):
+    # La séquence est un couple (séquence de l'informer, numéro du relevé
+    # d'utilisation) : un nouveau relevé rafraîchit toutes les lignes du jeu.
+    try:
+        sampler = usage_sampler(context)
+        informer, sequence, keys, removed, status = _read_changes(
+            _pods_informer(context), namespace, search, since[0] if since is not None else None)
+        if sequence is None:
+            return None, None, [], None, status
+        sample = sampler.sample
+        if removed is not None and sample != since[1]:
+            keys = _matching_keys(informer, namespace, search)
+        return _PodsWithUsage(informer, sampler), (sequence, sample), keys, removed, status
+    except Exception as e:
+        return None, None, [], None, f"Erreur: {str(e)}"
+
+def _sparkline(title, times, series, unit_format):
+    # Petit graphique statique d'une série par conteneur, de l'anneau de relevés
+    now = time.time()
+    x = [round(t - now) if t == t else None for t in times]
+    traces = [{"x": x, "y": [None if v != v else v for v in values], "name": name, "mode": "lines",
+               "type": "scatter", "line": {"width": 1}} for name, values in series]
+    latest = [f"{name}: {unit_format(values[-1])}" for name, values in series if values[-1] == values[-1]]
+    return html.Div([
+        html.Span(f"{title}: ", className="detail-label"),
+        html.Div([
+            dcc.Graph(figure={"data": traces, "layout": {
+                "height": 70, "width": 320, "margin": {"l": 0, "r": 0, "t": 0, "b": 0}, "showlegend": False,
+                "paper_bgcolor": "rgba(0,0,0,0)", "plot_bgcolor": "rgba(0,0,0,0)",
+                "xaxis": {"visible": False}, "yaxis": {"visible": False, "rangemode": "tozero"}}},
+                config={"staticPlot": True, "displayModeBar": False}),
+            html.Span(", ".join(latest) or "N/A", className="detail-value"),
+        ]),
+    ], className="detail-row")
+
+def get_pod_usage(name, namespace, context=None):
+    # Historique CPU/mémoire des conteneurs du pod et de son nœud, lu dans
+    # les anneaux du sampler (aucune requête)
+    try:
+        sampler = usage_sampler(context)
+        key = object_key(namespace, name)
+        # Ligne lue avant de prendre le verrou du sampler, jamais imbriqué
+        # avec ceux de l'informer et du store
+        row = _pods_informer(context).get_by_key(key)
+        with sampler.lock:
+            times = sampler.history_times()
+            containers = [(container, sampler.containers.history((pod_key, container)))
+                          for pod_key, container in sampler.containers.slots if pod_key == key]
+            node = sampler.nodes.history(row["node"]) if row else None
+        if not containers:
+            message = f"Erreur: {sampler.last_error}" if sampler.last_error else "en attente du premier relevé metrics-server"
+            return html.Div([html.Span("Usage: ", className="detail-label"), html.Span(message, className="detail-value")],
+                            className="detail-row")
+        rows = [
+            _sparkline("CPU", times, [(c, history[0]) for c, history in containers], format_cpu),
+            _sparkline("Memory", times, [(c, history[1]) for c, history in containers], format_memory),
+        ]
+        if node is not None:
+            rows.append(_sparkline(f"Node {row['node']} CPU", times, [(row["node"], node[0])], format_cpu))
+            rows.append(_sparkline(f"Node {row['node']} Memory", times, [(row["node"], node[1])], format_memory))
+        return html.Div(rows)
+    except Exception as e:
+        return html.Div(f"Erreur lors de la lecture de l'utilisation du pod: {str(e)}")
+
+def _with_age(title, created_at, created, rows):
+    # Panneau de détails : l'âge est recalculé à chaque affichage, le cache
+    # ne garde que les lignes qui dépendent du resourceVersion
+    age = datetime.timedelta(seconds=max(0, time.time() - created_at))
+    age_str = f"{age.days}d {age.seconds//3600}h {age.seconds//60 % 60}m ago"
+    return html.Div([
+        html.H3(title),
+        html.Div([html.Span("Created: ", className="detail-label"), html.Span(f"{age_str} {created}", className="detail-value")], className="detail-row"),
+    ] + rows)
+
+def get_pod_details(name, namespace, context=None):
     try:
-        config.load_kube_config()
-        api = client.CoreV1Api()
+        context = resolve_context(context)
+        key = object_key(namespace, name)
+        cached = detail_cache.get((context, 'pods', key), _cached_resource_version(_pods_informer(context), key))
+        if cached is not None:
+            return _with_age(*cached)
+        api = core_v1(context)
         pod = api.read_namespaced_pod(name, namespace)
         creation_time = pod.metadata.creation_timestamp
-        age = datetime.datetime.now(creation_time.tzinfo) - creation_time
-        age_str = f"{age.days}d {age.seconds//3600}h {age.seconds//60 % 60}m ago"
         created = creation_time.strftime("%Y-%m-%dT%H:%M:%S%z")
         labels = [html.Li(f"{key}: {value}") for key, value in pod.metadata.labels.items()] if pod.metadata.labels else [html.Li("N/A")]
         annotations = [html.Li(f"{key}: {value}") for key, value in pod.metadata.annotations.items()] if pod.metadata.annotations else [html.Li("N/A")]
@@ -52,9 +342,7 @@ def get_pod_details(name, namespace):
         priority_class = pod.spec.priority_class_name if pod.spec.priority_class_name else "N/A"
         qos_class = pod.status.qos_class if pod.status.qos_class else "N/A"
         conditions = [html.Li(f"{condition.type}: {condition.status}") for condition in pod.status.conditions] if pod.status.conditions else [html.Li("N/A")]
-        return html.Div([
-            html.H3(f"Pod: {name}"),
-            html.Div([html.Span("Created: ", className="detail-label"), html.Span(f"{age_str} {created}", className="detail-value")], className="detail-row"),
+        details = (f"Pod: {name}", creation_time.timestamp(), created, [
             html.Div([html.Span("Name: ", className="detail-label"), html.Span(name, className="detail-value")], className="detail-row"),
             html.Div([html.Span("Namespace: ", className="detail-label"), html.Span(namespace, className="detail-value")], className="detail-row"),
             html.Div([html.Span("Labels: ", className="detail-label"), html.Ul(labels, className="detail-list")], className="detail-row"),
@@ -68,51 +356,132 @@ def get_pod_details(name, namespace):
             html.Div([html.Span("QoS Class: ", className="detail-label"), html.Span(qos_class, className="detail-value")], className="detail-row"),
             html.Div([html.Span("Conditions: ", className="detail-label"), html.Ul(conditions, className="detail-list")], className="detail-row"),
         ])
+        detail_cache.put((context, 'pods', key), pod.metadata.resource_version, details)
+        return _with_age(*details)
     except Exception as e:
         return html.Div(f"Erreur lors de la récupération des détails du pod: {str(e)}")
 
-def get_deployments(namespace):
+def get_pod_containers(name, namespace, context=None):
+    # Conteneurs puis conteneurs d'init d'un pod (sélecteur du panneau de logs)
+    context = resolve_context(context)
+    pod = core_v1(context).read_namespaced_pod(name, namespace)
+    return [container.name for container in (pod.spec.containers or []) + (pod.spec.init_containers or [])]
+
+def get_pod_events(name, namespace, context=None):
+    # Événements d'un pod lus dans le cache des Event (index object_kind /
+    # object_name), sans LIST supplémentaire ; jamais mis en cache avec les
+    # détails, qui ne changent pas à chaque événement
     try:
-        config.load_kube_config()
-        api = client.AppsV1Api()
-        if namespace == 'all':
-            deployments = api.list_deployment_for_all_namespaces(watch=False)
+        informer = _events_informer(context)
+        if not informer.wait_synced(0):
+            rows = None
+        else:
+            informer = informer.pin()
+            keys = informer.select_keys([("regarding.kind", "=", frozenset(["Pod"])),
+                                         ("regarding.name", "=", frozenset([name]))], namespace)
+            store = informer.store
+            with store.lock:
+                slots = store.sort(store.slots(keys), "last_seen", reverse=True)[:POD_EVENTS_SHOWN]
+                rows = store.materialize(slots)
+        if rows is None:
+            items = [html.Li(f"Chargement des événements: {informer.last_error or 'synchronisation du cache en cours'}")]
+        elif not rows:
+            items = [html.Li("N/A")]
         else:
-            deployments = api.list_namespaced_deployment(namespace, watch=False)
-        deployments_data = []
-        for deployment in deployments.items:
-            creation_time = deployment.metadata.creation_timestamp
-            age = datetime.datetime.now(creation_time.tzinfo) - creation_time
-            age_str = f"{age.days}d" if age.days > 0 else f"{int(age.seconds / 3600)}h"
-            deployments_data.append({
-                "name": deployment.metadata.name,
-                "namespace": deployment.metadata.namespace,
-                "replicas": f"{deployment.status.ready_replicas or 0}/{deployment.spec.replicas}",
-                "up_to_date": deployment.status.updated_replicas or 0,
-                "available": deployment.status.available_replicas or 0,
-                "age": age_str,
-                "strategy": deployment.spec.strategy.type,
-                "labels": ", ".join([f"{k}={v}" for k, v in deployment.metadata.labels.items()]) if deployment.metadata.labels else "N/A"
-            })
-        return deployments_data, "Connecté"
+            items = [html.Li(f"{row['last_seen_ago']} {row['type']} {row['reason']} (x{row['count']}): {row['message']}",
+                             className="status-failed" if row["type"] == "Warning" else None)
+                     for row in rows]
+        return html.Div([html.Span("Events: ", className="detail-label"), html.Ul(items, className="detail-list")],
+                        className="detail-row")
+    except Exception as e:
+        return html.Div(f"Erreur lors de la récupération des événements du pod: {str(e)}")
+
+class _AllClusters:
+    # Source du jeu de la vue « tous les clusters » : store fusionné des
+    # caches de pods de chaque contexte, recomposé à chaque lecture (un
+    # informer remplace son store à chaque relist)
+    def __init__(self, informers):
+        self._informers = informers
+
+    @property
+    def store(self):
+        return MergedStore({context: informer.store for context, informer in self._informers.items()}, "cluster")
+
+def get_all_pods_changes(namespace, search=None, since=None):
+    # Pods de tous les contextes du kubeconfig, clés (contexte, clé locale).
+    # Les informers sont tous démarrés avant la première lecture : leurs LIST
+    # se font en parallèle, les lectures ne touchent ensuite que la mémoire.
+    # Un cluster pas encore synchronisé n'est pas attendu : il est signalé
+    # dans le statut et rejoint la vue à un rafraîchissement suivant.
+    # La séquence est un tuple de (contexte, séquence).
+    try:
+        informers, errors = {}, []
+        for context in list_contexts()[0]:
+            try:
+                informers[context] = _pods_informer(context)
+            except Exception as e:
+                errors.append(f"{context}: {e}")
+        since = dict(since) if since is not None else None
+        sequences, changes = {}, {}
+        for context, informer in list(informers.items()):
+            _, sequence, keys, removed, status = _read_changes(
+                informer, namespace, search, since.get(context) if since is not None else None, timeout=0)
+            if sequence is None:
+                errors.append(f"{context}: {status[len('Erreur: '):]}")
+                del informers[context]
+                # Un cluster en panne ne force pas de rechargement complet des autres
+                if since is not None and context in since:
+                    sequences[context] = since[context]
+                continue
+            sequences[context] = sequence
+            changes[context] = (keys, removed)
+        status = f"Erreur: {'; '.join(errors)}" if errors else "Connecté"
+        if not changes and errors:
+            return None, None, [], None, status
+        sequences = tuple(sorted(sequences.items()))
+        if since is None or any(removed is None for _, removed in changes.values()):
+            upserts = [(context, key) for context, informer in informers.items()
+                       for key in _matching_keys(informer, namespace, search)]
+            return _AllClusters(informers), sequences, upserts, None, status
+        upserts = [(context, key) for context, (keys, _) in changes.items() for key in keys]
+        removed = [(context, key) for context, (_, keys) in changes.items() for key in keys]
+        return _AllClusters(informers), sequences, upserts, removed, status
+    except Exception as e:
+        return None, None, [], None, f"Erreur: {str(e)}"
+
+def get_events_changes(namespace, search=None, since=None, context=None):
+    try:
+        return _read_changes(_events_informer(context), namespace, search, since)
+    except Exception as e:
+        return None, None, [], None, f"Erreur: {str(e)}"
+
+def get_deployments(namespace, search=None, context=None):
+    try:
+        return _read_cache(_deployments_informer(context), namespace, search)
     except Exception as e:
         return [], f"Erreur: {str(e)}"
 
-def get_deployment_details(name, namespace):
+def get_deployments_changes(namespace, search=None, since=None, context=None):
+    try:
+        return _read_changes(_deployments_informer(context), namespace, search, since)
+    except Exception as e:
+        return None, None, [], None, f"Erreur: {str(e)}"
+
+def get_deployment_details(name, namespace, context=None):
     try:
-        config.load_kube_config()
-        api = client.AppsV1Api()
+        context = resolve_context(context)
+        key = object_key(namespace, name)
+        cached = detail_cache.get((context, 'deployments', key), _cached_resource_version(_deployments_informer(context), key))
+        if cached is not None:
+            return _with_age(*cached)
+        api = apps_v1(context)
         deployment = api.read_namespaced_deployment(name, namespace)
         creation_time = deployment.metadata.creation_timestamp
-        age = datetime.datetime.now(creation_time.tzinfo) - creation_time
-        age_str = f"{age.days}d {age.seconds//3600}h {age.seconds//60 % 60}m ago"
         created = creation_time.strftime("%Y-%m-%dT%H:%M:%S%z")
         labels = [html.Li(f"{key}: {value}") for key, value in deployment.metadata.labels.items()] if deployment.metadata.labels else [html.Li("N/A")]
         annotations = [html.Li(f"{key}: {value}") for key, value in deployment.metadata.annotations.items()] if deployment.metadata.annotations else [html.Li("N/A")]
         selector = [html.Li(f"{key}: {value}") for key, value in deployment.spec.selector.match_labels.items()] if deployment.spec.selector.match_labels else [html.Li("N/A")]
-        return html.Div([
-            html.H3(f"Deployment: {name}"),
-            html.Div([html.Span("Created: ", className="detail-label"), html.Span(f"{age_str} {created}", className="detail-value")], className="detail-row"),
+        details = (f"Deployment: {name}", creation_time.timestamp(), created, [
             html.Div([html.Span("Name: ", className="detail-label"), html.Span(name, className="detail-value")], className="detail-row"),
             html.Div([html.Span("Namespace: ", className="detail-label"), html.Span(namespace, className="detail-value")], className="detail-row"),
             html.Div([html.Span("Labels: ", className="detail-label"), html.Ul(labels, className="detail-list")], className="detail-row"),
@@ -124,5 +493,217 @@ def get_deployment_details(name, namespace):
             html.Div([html.Span("Revision History Limit: ", className="detail-label"), html.Span(str(deployment.spec.revision_history_limit or "N/A"), className="detail-value")], className="detail-row"),
             html.Div([html.Span("Progress Deadline Seconds: ", className="detail-label"), html.Span(str(deployment.spec.progress_deadline_seconds or "N/A"), className="detail-value")], className="detail-row"),
         ])
+        detail_cache.put((context, 'deployments', key), deployment.metadata.resource_version, details)
+        return _with_age(*details)
+    except Exception as e:
+        return html.Div(f"Erreur lors de la récupération des détails du déploiement: {str(e)}")
+
+# Vue d'ensemble : des agrégats par cluster, branchés une fois pour toutes sur
+# les informers des pods et des déploiements
+_overviews = {}
+_overviews_lock = threading.Lock()
+
+def _workload_overview(context=None):
+    context = resolve_context(context)
+    with _overviews_lock:
+        overview = _overviews.get(context)
+        if overview is None:
+            overview = _overviews[context] = WorkloadOverview(_pods_informer(context), _deployments_informer(context)).attach()
+        return overview
+
+def _overview_list(label, items, total=None):
+    lines = [html.Li(f"{name}: {value}") for name, value in items] or [html.Li("N/A")]
+    if total is not None and total > len(items):
+        lines.append(html.Li(f"... {total - len(items)} autres"))
+    return html.Div([html.Span(f"{label}: ", className="detail-label"), html.Ul(lines, className="detail-list")],
+                    className="detail-row")
+
+def get_overview(context=None, since=None):
+    # Vue d'ensemble rendue depuis les compteurs, sans parcours des caches.
+    # Retourne (contenu, version) ; contenu None si la version n'a pas changé
+    # depuis since.
+    try:
+        pods, deployments = _pods_informer(context), _deployments_informer(context)
+        overview = _workload_overview(context)
+        if not (pods.wait_synced(0) and deployments.wait_synced(0)):
+            error = pods.last_error or deployments.last_error
+            return html.Div(f"Chargement: {error or 'synchronisation du cache en cours'}"), None
+        summary = overview.summary()
+        if summary["version"] == since:
+            return None, since
+        unavailable = [(key, f"{ready}/{desired}") for key, (ready, desired) in summary["unavailable"]]
+        content = html.Div([
+            _detail_row("Pods", str(summary["pods"])),
+            _detail_row("Deployments", str(summary["deployments"])),
+            _overview_list("Phases", summary["phases"]),
+            _overview_list("Owner Kinds", summary["owner_kinds"]),
+            _overview_list("Namespaces", summary["namespaces"], summary["namespace_count"]),
+            _overview_list("Nodes", summary["nodes"], summary["node_count"]),
+            _overview_list("Restarts", summary["restarts"]),
+            _overview_list("Deployments Not Available", unavailable, summary["unavailable_count"]),
+        ])
+        return content, summary["version"]
+    except Exception as e:
+        return html.Div(f"Erreur lors du calcul de la vue d'ensemble: {str(e)}"), None
+
+# Moteur générique : un informer en JSON brut par type décrit dans resources.py,
+# sur la version d'API retenue par la découverte
+_discovered = {}
+_undiscovered = {}
+_discovery_lock = threading.Lock()
+_discovery_locks = {}
+
+def _discover(spec, context=None):
+    # Première version candidate servie par l'apiserver (ex. HPA autoscaling/v2
+    # puis v2beta2 puis v1) ; le résultat est gardé pour la durée du processus.
+    # Un verrou par contexte : un cluster lent ne retarde pas les autres.
+    with _discovery_lock:
+        lock = _discovery_locks.setdefault(context, threading.Lock())
+    with lock:
+        resource = _discovered.get((context, spec["kind"]))
+        if resource is not None:
+            return resource
+        missing = _undiscovered.get((context, spec["kind"]))
+        if missing is not None and time.monotonic() < missing[0]:
+            raise missing[1]
+        resources = dynamic_client(context).resources
+        for version in spec["versions"]:
+            api_version = f"{spec['group']}/{version}" if spec["group"] else version
+            try:
+                resource = resources.get(api_version=api_version, kind=spec["api_kind"])
+            except ResourceNotFoundError:
+                continue
+            _discovered[(context, spec["kind"])] = resource
+            return resource
+        error = ResourceNotFoundError(f"{spec['api_kind']} n'est servi par aucune des versions {', '.join(spec['versions'])}")
+        _undiscovered[(context, spec["kind"])] = (time.monotonic() + DISCOVERY_RETRY_SECONDS, error)
+        raise error
+
+def _raw_list_func(resource, context):
+    # Même interface que les list_*_for_all_namespaces du client typé, mais
+    # la réponse urllib3 est toujours renvoyée brute (JSON non désérialisé)
+    path = resource.path()
+
+    def list_func(**params):
+        params.pop("_preload_content", None)
+        return dynamic_client(context).request("get", path, serialize=False, **params)
+    return list_func
+
+def _resource_schema(spec):
+    schema = {"name": "str", "namespace": "category", "creation_timestamp": "time", "resource_version": "str"}
+    schema.update((column_id, column_type) for column_id, _, _, column_type in spec["columns"])
+    return schema
+
+def _resource_row(spec):
+    columns = [(column_id, extract) for column_id, _, extract, _ in spec["columns"]]
+
+    def project(obj):
+        metadata = obj["metadata"]
+        row = {
+            "name": metadata["name"],
+            "namespace": metadata.get("namespace"),
+            "creation_timestamp": _parse_timestamp(metadata["creationTimestamp"]),
+            "resource_version": metadata.get("resourceVersion"),
+        }
+        for column_id, extract in columns:
+            row[column_id] = extract(obj)
+        return row
+    return project
+
+def _resource_informer(kind, context=None):
+    context = resolve_context(context)
+    def factory():
+        spec = RESOURCES[kind]
+        informer = Informer(kind, _raw_list_func(_discover(spec, context), context), _resource_row(spec),
+                            _resource_schema(spec), AGE_COLUMN)
+        informer.add_listener(_invalidate_details(kind, context))
+        return informer
+    return ensure_informer(kind, factory, AGE_COLUMN, context)
+
+_INFORMERS = {'pods': _pods_informer, 'deployments': _deployments_informer, 'namespaces': _namespaces_informer,
+              'events': _events_informer}
+
+def informer_kinds():
+    return list(_INFORMERS) + list(RESOURCES)
+
+def start_informer(kind, context=None):
+    # Démarre (ou retrouve) l'informer d'un type quelconque dans un contexte :
+    # processus watcher, préchargement des autres clusters
+    if kind in _INFORMERS:
+        return _INFORMERS[kind](context)
+    return _resource_informer(kind, context)
+
+def warm_contexts(kinds, current):
+    # Démarre en parallèle, sans attendre leur LIST, les informers des autres
+    # clusters : passer de l'un à l'autre n'est plus qu'un changement de cache
+    try:
+        contexts = [context for context in list_contexts()[0] if context != current]
+    except Exception as e:
+        print(f"Lecture des contextes du kubeconfig impossible: {e}")
+        return
+    for context in contexts:
+        for kind in kinds:
+            if kind in _INFORMERS or kind in RESOURCES:
+                submit(start_informer, kind, context)
+
+def get_namespaces(context=None):
+    # Noms des namespaces du cluster, triés (erreur tant que le cache n'est pas
+    # prêt, sans l'attendre : la liste est relue au rafraîchissement suivant)
+    rows, status = _read_cache(_namespaces_informer(context), 'all', timeout=0)
+    if status != "Connecté":
+        raise RuntimeError(status)
+    return sorted(row["name"] for row in rows)
+
+def _scope(kind, namespace):
+    # Les types non namespacés ignorent le namespace sélectionné
+    return namespace if RESOURCES[kind]["namespaced"] else 'all'
+
+def get_resources(kind, namespace, search=None, context=None):
+    try:
+        return _read_cache(_resource_informer(kind, context), _scope(kind, namespace), search)
+    except Exception as e:
+        return [], f"Erreur: {str(e)}"
+
+def get_resource_changes(kind, namespace, search=None, since=None, context=None):
+    try:
+        return _read_changes(_resource_informer(kind, context), _scope(kind, namespace), search, since)
+    except Exception as e:
+        return None, None, [], None, f"Erreur: {str(e)}"
+
+def _detail_row(label, value):
+    if isinstance(value, dict):
+        value = html.Ul([html.Li(f"{k}: {v}") for k, v in value.items()] or [html.Li("N/A")], className="detail-list")
+    else:
+        value = html.Span("N/A" if value is None or value == "" else str(value), className="detail-value")
+    return html.Div([html.Span(f"{label}: ", className="detail-label"), value], className="detail-row")
+
+def get_resource_details(kind, name, namespace=None, context=None):
+    try:
+        context = resolve_context(context)
+        spec = RESOURCES[kind]
+        key = object_key(namespace, name)
+        cached = detail_cache.get((context, kind, key), _cached_resource_version(_resource_informer(kind, context), key))
+        if cached is not None:
+            return _with_age(*cached)
+        resource = _discover(spec, context)
+        response = dynamic_client(context).request("get", resource.path(name=name, namespace=namespace), serialize=False)
+        obj = json.loads(response.data)
+        metadata = obj["metadata"]
+        owner_references = metadata.get("ownerReferences")
+        controlled_by = f"{owner_references[0]['kind']}/{owner_references[0]['name']}" if owner_references else "N/A"
+        rows = [_detail_row("Name", name)]
+        if spec["namespaced"]:
+            rows.append(_detail_row("Namespace", namespace))
+        rows += [
+            _detail_row("Labels", metadata.get("labels") or {}),
+            _detail_row("Annotations", metadata.get("annotations") or {}),
+            _detail_row("Controlled By", controlled_by),
+        ]
+        rows += [_detail_row(title, extract(obj)) for _, title, extract, _ in spec["columns"]]
+        rows += [_detail_row(label, extract(obj)) for label, extract in spec["details"]]
+        details = (f"{spec['api_kind']}: {name}", _parse_timestamp(metadata["creationTimestamp"]),
+                   metadata["creationTimestamp"], rows)
+        detail_cache.put((context, kind, key), metadata.get("resourceVersion"), details)
+        return _with_age(*details)
     except Exception as e:
-        return html.Div(f"Erreur lors de la récupération des détails du déploiement: {str(e)}")
\ No newline at end of file
+        return html.Div(f"Erreur lors de la récupération des détails ({kind}): {str(e)}")
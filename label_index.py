@@ -0,0 +1,180 @@
+import re
+import threading
+
+# Clés de sélecteur qui portent sur un champ indexé plutôt que sur un label :
+# chemins de field selector Kubernetes et raccourcis saisis dans la recherche.
+FIELD_KEYS = {
+    "metadata.namespace": "namespace", "namespace": "namespace",
+    "spec.nodeName": "node", "node": "node",
+    "status.phase": "status", "phase": "status",
+    "status.qosClass": "qos", "qos": "qos",
+    "owner": "controlled_by",
+    "regarding.kind": "object_kind", "involvedObject.kind": "object_kind", "kind": "object_kind",
+    "regarding.name": "object_name", "involvedObject.name": "object_name", "object": "object_name",
+    "reason": "reason", "type": "type",
+}
+
+_SET_RE = re.compile(r"^\s*(?P<key>[^\s!=(),]+)\s+(?P<op>in|notin)\s*\((?P<values>[^()]*)\)\s*$")
+_BINARY_RE = re.compile(r"^\s*(?P<key>[^\s!=(),]+)\s*(?P<op>==|!=|=)\s*(?P<value>[^\s!=(),]+)\s*$")
+_EXISTS_RE = re.compile(r"^\s*(?P<not>!)?\s*(?P<key>[^\s!=(),]+)\s*$")
+
+def is_selector(text):
+    # Un simple mot reste une recherche sur le nom ; dès qu'un opérateur de
+    # sélecteur apparaît, le texte est interprété comme un sélecteur.
+    return bool(text) and bool(re.search(r"[=!]|\s(?:not)?in\s*\(", text))
+
+def _split_requirements(selector):
+    parts, depth, current = [], 0, []
+    for char in selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part for part in parts if part.strip()]
+
+def parse_selector(selector):
+    # Syntaxe Kubernetes : key=v, key==v, key!=v, key in (a,b), key notin (a,b),
+    # key, !key. Retourne une liste de (clé, opérateur, valeurs). Une valeur
+    # vide (app=, en cours de saisie) est refusée comme un sélecteur invalide.
+    requirements = []
+    for part in _split_requirements(selector):
+        match = _SET_RE.match(part)
+        if match:
+            values = frozenset(v.strip() for v in match.group("values").split(",") if v.strip())
+            requirements.append((match.group("key"), match.group("op"), values))
+            continue
+        match = _BINARY_RE.match(part)
+        if match:
+            op = "!=" if match.group("op") == "!=" else "="
+            requirements.append((match.group("key"), op, frozenset([match.group("value")])))
+            continue
+        match = _EXISTS_RE.match(part)
+        if match:
+            requirements.append((match.group("key"), "!" if match.group("not") else "exists", frozenset()))
+            continue
+        raise ValueError(f"Sélecteur invalide: {part.strip()}")
+    return requirements
+
+class LabelIndex:
+    # Index inversé (clé, valeur) -> clés d'objets, sur les labels et sur
+    # quelques champs ; les requêtes se résolvent par intersection d'ensembles.
+    def __init__(self, fields=()):
+        self._fields = tuple(fields)
+        self._lock = threading.RLock()
+        self._all = set()
+        self._postings = {}
+        self._keys = {}
+        self._entries = {}
+
+    def _terms(self, labels, row):
+        terms = [(("label", k), v) for k, v in (labels or {}).items()]
+        terms.extend((("field", f), row.get(f)) for f in self._fields)
+        return terms
+
+    def add(self, obj_key, labels, row):
+        with self._lock:
+            self.remove(obj_key)
+            terms = self._terms(labels, row)
+            for key, value in terms:
+                self._postings.setdefault((key, value), set()).add(obj_key)
+                self._keys.setdefault(key, set()).add(obj_key)
+            self._entries[obj_key] = terms
+            self._all.add(obj_key)
+
+    def remove(self, obj_key):
+        with self._lock:
+            terms = self._entries.pop(obj_key, None)
+            if terms is None:
+                return
+            self._all.discard(obj_key)
+            for key, value in terms:
+                for mapping, index_key in ((self._postings, (key, value)), (self._keys, key)):
+                    keys = mapping.get(index_key)
+                    if keys is not None:
+                        keys.discard(obj_key)
+                        if not keys:
+                            del mapping[index_key]
+
+    def load(self, obj_keys, postings):
+        # Remplit un index vide d'un bloc (restauration d'un snapshot) à partir
+        # des postings {(clé d'index, valeur): clés d'objets}
+        with self._lock:
+            self._all = set(obj_keys)
+            for term, keys in postings.items():
+                keys = set(keys)
+                self._postings[term] = keys
+                self._keys.setdefault(term[0], set()).update(keys)
+                for obj_key in keys:
+                    self._entries.setdefault(obj_key, []).append(term)
+
+    def export(self):
+        # (champs indexés, postings {(clé d'index, valeur): clés},
+        #  clés présentes {clé d'index: clés}) pour l'écriture des snapshots ;
+        # des copies, encodées ensuite hors du verrou de l'informer
+        with self._lock:
+            return (self._fields, {term: set(keys) for term, keys in self._postings.items()},
+                    {key: set(keys) for key, keys in self._keys.items()})
+
+    def _index_key(self, key):
+        field = FIELD_KEYS.get(key)
+        if field is not None and field in self._fields:
+            return ("field", field)
+        return ("label", key)
+
+    def _union(self, key, values):
+        # Cas courant d'une seule valeur : l'ensemble indexé est renvoyé tel
+        # quel (select ne le modifie jamais)
+        if len(values) == 1:
+            return self._postings.get((key, next(iter(values))), set())
+        result = set()
+        for value in values:
+            result |= self._postings.get((key, value), set())
+        return result
+
+    def matches(self, obj_key, requirements):
+        # Évaluation d'un sélecteur sur un seul objet (mises à jour incrémentales)
+        with self._lock:
+            terms = dict(self._entries.get(obj_key, ()))
+        for key, op, values in requirements:
+            index_key = self._index_key(key)
+            present = index_key in terms
+            if op in ("=", "in") and not (present and terms[index_key] in values):
+                return False
+            if op in ("!=", "notin") and present and terms[index_key] in values:
+                return False
+            if op == "exists" and not present:
+                return False
+            if op == "!" and present:
+                return False
+        return True
+
+    def select(self, requirements):
+        # Les exigences positives sont intersectées de la plus sélective à la
+        # moins sélective, puis les exigences négatives sont soustraites.
+        with self._lock:
+            positives, negatives = [], []
+            for key, op, values in requirements:
+                index_key = self._index_key(key)
+                if op in ("=", "in"):
+                    positives.append(self._union(index_key, values))
+                elif op == "exists":
+                    positives.append(self._keys.get(index_key, set()))
+                elif op in ("!=", "notin"):
+                    negatives.append(self._union(index_key, values))
+                else:
+                    negatives.append(self._keys.get(index_key, set()))
+            positives.sort(key=len)
+            result = set(positives[0]) if positives else set(self._all)
+            for keys in positives[1:]:
+                if not result:
+                    break
+                result &= keys
+            for keys in negatives:
+                result -= keys
+            return result
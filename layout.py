@@ -1,6 +1,22 @@
-from dash import html, dcc, dash_table
+import uuid
+from dash import html, dcc
+from client_manager import list_contexts
+from views import DEFAULT_VIEW, data_kinds
+
+# Période de l'auto-refresh incrémental des tableaux
+AUTO_REFRESH_INTERVAL_MS = 5000
+
+def _context_options():
+    # Contextes du kubeconfig ; le contexte courant est sélectionné par défaut
+    try:
+        contexts, current = list_contexts()
+    except Exception as e:
+        print(f"Lecture des contextes du kubeconfig impossible: {e}")
+        return [], None
+    return [{'label': context, 'value': context} for context in contexts], current
 
 def create_layout():
+    context_options, current_context = _context_options()
     return html.Div([
         # Barre latérale de navigation
         html.Div([
@@ -12,6 +28,7 @@ def create_layout():
                 html.Div([
                     html.Div("Overview", id="workloads-overview", className="sidebar-subitem"),
                     html.Div("Pods", id="workloads-pods", className="sidebar-subitem active"),
+                    html.Div("Pods (all clusters)", id="workloads-allpods", className="sidebar-subitem"),
                     html.Div("Deployments", id="workloads-deployments", className="sidebar-subitem"),
                     html.Div("DaemonSets", id="workloads-daemonsets", className="sidebar-subitem"),
                     html.Div("StatefulSets", id="workloads-statefulsets", className="sidebar-subitem"),
@@ -50,7 +67,7 @@ def create_layout():
                     html.Div("Storage Classes", id="storage-storageclasses", className="sidebar-subitem"),
                 ], id="storage-subitems", className="sidebar-subitems", style={'display': 'none'}),
                 html.Div("Namespace", className="sidebar-item"),
-                html.Div("Events", className="sidebar-item"),
+                html.Div("Events", id="events", className="sidebar-item"),
                 html.Div("Helm", className="sidebar-item"),
                 html.Div("Access Control", className="sidebar-item"),
                 html.Div("Custom Resources", className="sidebar-item"),
@@ -62,14 +79,17 @@ def create_layout():
             html.Div([
                 html.H1(id="page-title", className="page-title"),
                 html.Div([
+                    dcc.Dropdown(
+                        id='context-dropdown',
+                        options=context_options,
+                        value=current_context,
+                        clearable=False,
+                        className="context-selector"
+                    ),
+                    # Options remplies à partir des namespaces du cluster sélectionné
                     dcc.Dropdown(
                         id='namespace-dropdown',
-                        options=[
-                            {'label': 'All namespaces', 'value': 'all'},
-                            {'label': 'kube-system', 'value': 'kube-system'},
-                            {'label': 'default', 'value': 'default'},
-                            {'label': 'deluge', 'value': 'deluge'},
-                        ],
+                        options=[{'label': 'All namespaces', 'value': 'all'}],
                         value='all',
                         clearable=False,
                         className="namespace-selector"
@@ -77,7 +97,8 @@ def create_layout():
                     dcc.Input(
                         id="search-input",
                         type="text",
-                        placeholder="Search...",
+                        placeholder="Search name or selector (app=web,env in (prod))...",
+                        debounce=True,
                         className="search-input"
                     ),
                     html.Button("Connect", id="connect-button", className="action-button"),
@@ -86,67 +107,16 @@ def create_layout():
                     html.Div(id='dummy-output', style={'display': 'none'})
                 ], className="header-controls")
             ], className="page-header"),
-            # Vue des Pods
-            html.Div(id="pods-view", style={'display': 'block'}, children=[
-                html.Div([
-                    dash_table.DataTable(
-                        id='pods-table',
-                        columns=[
-                            {"name": "Name", "id": "name"},
-                            {"name": "Namespace", "id": "namespace"},
-                            {"name": "Containers", "id": "containers"},
-                            {"name": "Restarts", "id": "restarts"},
-                            {"name": "Controlled By", "id": "controlled_by"},
-                            {"name": "Node", "id": "node"},
-                            {"name": "QoS", "id": "qos"},
-                            {"name": "Age", "id": "age"},
-                            {"name": "Status", "id": "status"}
-                        ],
-                        data=[],
-                        style_header={'backgroundColor': '#2d2d2d', 'fontWeight': 'bold', 'border': '1px solid #444', 'color': '#e0e0e0'},
-                        style_cell={'textAlign': 'left', 'padding': '8px', 'border': '1px solid #444', 'backgroundColor': '#1e1e1e', 'color': '#e0e0e0'},
-                        style_data_conditional=[
-                            {'if': {'row_index': 'odd'}, 'backgroundColor': '#2d2d2d'},
-                            {'if': {'filter_query': '{status} = "Running"'}, 'color': '#4caf50'},
-                            {'if': {'filter_query': '{status} = "Pending"'}, 'color': '#ff9800'},
-                            {'if': {'filter_query': '{status} = "Failed"'}, 'color': '#f44336'}
-                        ],
-                        page_size=15,
-                        style_table={'overflowX': 'auto'},
-                        row_selectable='single'
-                    )
-                ], className="table-container"),
-                html.Div(id="pod-details", className="pod-details"),
-            ]),
-            # Vue des Deployments
-            html.Div(id="deployments-view", style={'display': 'none'}, children=[
-                html.Div([
-                    dash_table.DataTable(
-                        id='deployments-table',
-                        columns=[
-                            {"name": "Name", "id": "name"},
-                            {"name": "Namespace", "id": "namespace"},
-                            {"name": "Replicas", "id": "replicas"},
-                            {"name": "Up-to-date", "id": "up_to_date"},
-                            {"name": "Available", "id": "available"},
-                            {"name": "Age", "id": "age"},
-                            {"name": "Strategy", "id": "strategy"},
-                            {"name": "Labels", "id": "labels"}
-                        ],
-                        data=[],
-                        style_header={'backgroundColor': '#2d2d2d', 'fontWeight': 'bold', 'border': '1px solid #444', 'color': '#e0e0e0'},
-                        style_cell={'textAlign': 'left', 'padding': '8px', 'border': '1px solid #444', 'backgroundColor': '#1e1e1e', 'color': '#e0e0e0'},
-                        style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': '#2d2d2d'}],
-                        page_size=15,
-                        style_table={'overflowX': 'auto'},
-                        row_selectable='single'
-                    )
-                ], className="table-container"),
-                html.Div(id="deployment-details", className="deployment-details"),
-            ]),
-            # Stockage des données
-            dcc.Store(id='pods-data-store'),
-            dcc.Store(id='deployments-data-store'),
+            # Vues construites à la demande (voir views.py)
+            html.Div(id="views-container", children=[]),
+            # Stockage des données (les stores ne contiennent qu'un jeton de version,
+            # les lignes restent sur le serveur, rattachées à l'identifiant de session)
+            dcc.Store(id='session-id', data=str(uuid.uuid4())),
+            # Activé par la première connexion réussie
+            dcc.Interval(id='auto-refresh-interval', interval=AUTO_REFRESH_INTERVAL_MS, disabled=True),
+            dcc.Store(id='active-view', data=DEFAULT_VIEW),
+            dcc.Store(id='built-views', data=[]),
+        ] + [dcc.Store(id=f'{kind}-data-store') for kind in data_kinds()] + [
             dcc.Store(id='workloads-menu-state', data={'open': False}),
             dcc.Store(id='config-menu-state', data={'open': False}),
             dcc.Store(id='network-menu-state', data={'open': False}),
@@ -0,0 +1,223 @@
+import calendar
+import itertools
+import threading
+import time
+from collections import deque
+from kubernetes.client.rest import ApiException
+from kubernetes.watch.watch import iter_resp_lines
+from client_manager import core_v1, resolve_context
+from metrics import add_collector, inc
+
+# Lignes gardées par flux amont, partagées par tous les lecteurs d'un conteneur
+LOG_BUFFER_LINES = 5000
+# Les lignes plus longues sont tronquées
+MAX_LINE_LENGTH = 4096
+# Lignes affichées au plus par session : les plus anciennes sortent du panneau
+SESSION_LINE_CAP = 1000
+# Lignes envoyées au plus par rafraîchissement ; un lecteur en retard saute
+# directement aux plus récentes
+MAX_LINES_PER_POLL = 500
+# Historique affiché à l'ouverture quand tail_lines n'est pas précisé
+DEFAULT_TAIL_LINES = 100
+# Un lecteur qui ne relit plus depuis ce délai (onglet fermé, vue masquée) est
+# détaché ; un flux sans lecteur est fermé
+VIEWER_TIMEOUT_SECONDS = 30
+# Attente de la connexion d'un nouveau flux, puis de la lecture du backlog
+# (tail_lines) que l'apiserver envoie d'un bloc juste après
+CONNECT_TIMEOUT_SECONDS = 5
+BACKLOG_SECONDS = 0.3
+
+def _timestamp(stamp):
+    # Horodatage RFC3339Nano ajouté par l'apiserver (timestamps=True) -> epoch
+    try:
+        return calendar.timegm(time.strptime(stamp[:19], "%Y-%m-%dT%H:%M:%S"))
+    except ValueError:
+        return 0
+
+class LogStream:
+    # Flux follow d'un conteneur lu dans son propre thread : les lignes vont
+    # dans un tampon borné et numéroté, chaque lecteur n'y garde qu'un curseur.
+    # Un conteneur bavard ne coûte donc qu'un tampon, quel que soit le nombre
+    # de sessions qui le suivent.
+    def __init__(self, context, namespace, pod, container):
+        self.key = (context, namespace, pod, container)
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=LOG_BUFFER_LINES)
+        self._next = 0
+        self._response = None
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._connected_at = None
+        self.error = None
+        self.finished = False
+        self._thread = threading.Thread(target=self._run, name=f"logs-{namespace}/{pod}/{container}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def wait_backlog(self):
+        if not self._connected.wait(CONNECT_TIMEOUT_SECONDS) or self._connected_at is None:
+            return
+        remaining = self._connected_at + BACKLOG_SECONDS - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _run(self):
+        context, namespace, pod, container = self.key
+        response = None
+        try:
+            # Le flux amont reprend tout l'historique que le tampon peut
+            # garder : since/tail de chaque lecteur s'appliquent au tampon
+            response = core_v1(context).read_namespaced_pod_log(
+                pod, namespace, container=container, follow=True, timestamps=True,
+                tail_lines=LOG_BUFFER_LINES, _preload_content=False)
+            self._response = response
+            if not 200 <= response.status <= 299:
+                raise ApiException(http_resp=response)
+            self._connected_at = time.monotonic()
+            self._connected.set()
+            for line in iter_resp_lines(response):
+                if self._stop.is_set():
+                    break
+                stamp, _, text = line.partition(" ")
+                with self._lock:
+                    self._lines.append((stamp, text[:MAX_LINE_LENGTH]))
+                    self._next += 1
+        except Exception as e:
+            if not self._stop.is_set():
+                self.error = e
+        finally:
+            self.finished = True
+            self._connected.set()
+            self._response = None
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+    def start_cursor(self, since_seconds, tail_lines):
+        # Position de départ d'un nouveau lecteur : les tail_lines dernières
+        # lignes, limitées à celles des since_seconds dernières secondes
+        with self._lock:
+            first = self._next - len(self._lines)
+            start = max(first, self._next - min(tail_lines, SESSION_LINE_CAP))
+            if since_seconds:
+                threshold = time.time() - since_seconds
+                for offset in range(start - first, len(self._lines)):
+                    if _timestamp(self._lines[offset][0]) >= threshold:
+                        break
+                    start += 1
+            return start
+
+    def read(self, cursor):
+        # Retourne (lignes, nouveau curseur, lignes sautées)
+        if cursor is None:
+            return [], None, 0
+        with self._lock:
+            first = self._next - len(self._lines)
+            start = max(cursor, first, self._next - MAX_LINES_PER_POLL)
+            lines = [text for _, text in itertools.islice(self._lines, start - first, None)]
+            return lines, self._next, start - cursor
+
+class _Viewer:
+    def __init__(self, stream, cursor):
+        self.stream = stream
+        self.cursor = cursor
+        self.last_read = time.monotonic()
+        # Nombre de lignes de chaque bloc affiché, pour tenir SESSION_LINE_CAP
+        self.blocks = deque()
+        self.shown = 0
+
+    def add_block(self, count):
+        # Retourne le nombre de blocs les plus anciens à retirer du panneau
+        self.blocks.append(count)
+        self.shown += count
+        trim = 0
+        while self.shown > SESSION_LINE_CAP and len(self.blocks) > 1:
+            self.shown -= self.blocks.popleft()
+            trim += 1
+        return trim
+
+# Registres : un flux par (contexte, namespace, pod, conteneur), un lecteur
+# par (session, panneau)
+_lock = threading.Lock()
+_streams = {}
+_viewers = {}
+
+def _sweep():
+    now = time.monotonic()
+    with _lock:
+        for viewer_key, viewer in list(_viewers.items()):
+            if now - viewer.last_read > VIEWER_TIMEOUT_SECONDS:
+                del _viewers[viewer_key]
+        used = {viewer.stream.key for viewer in _viewers.values()}
+        for stream_key, stream in list(_streams.items()):
+            if stream_key not in used:
+                del _streams[stream_key]
+                stream.stop()
+
+def _status(stream, skipped=0):
+    if stream.error is not None:
+        return f"Erreur: {stream.error}"
+    if stream.finished:
+        return "Flux terminé"
+    if skipped:
+        return f"Suivi en cours ({skipped} lignes sautées)"
+    return "Suivi en cours"
+
+def open_logs(session_id, panel, context, namespace, pod, container, since_seconds=None, tail_lines=None):
+    # Attache la session au flux du conteneur (ouvert s'il n'existe pas, ou
+    # rouvert s'il s'est terminé) et retourne (lignes initiales, statut).
+    # Le lecteur précédent de ce panneau est détaché.
+    context = resolve_context(context)
+    key = (context, namespace, pod, container)
+    with _lock:
+        _viewers.pop((session_id, panel), None)
+    _sweep()
+    with _lock:
+        stream = _streams.get(key)
+        if stream is None or stream.finished:
+            stream = _streams[key] = LogStream(*key).start()
+        # Curseur posé une fois le backlog lu
+        viewer = _viewers[(session_id, panel)] = _Viewer(stream, None)
+    stream.wait_backlog()
+    tail_lines = DEFAULT_TAIL_LINES if tail_lines is None else max(0, int(tail_lines))
+    lines, viewer.cursor, _ = stream.read(stream.start_cursor(since_seconds, tail_lines))
+    # Un bloc par enfant du <pre> : rien n'est envoyé pour un bloc vide
+    if lines:
+        viewer.add_block(len(lines))
+    return lines, _status(stream)
+
+def read_logs(session_id, panel):
+    # Nouvelles lignes depuis la dernière lecture de la session : retourne
+    # (lignes, blocs à retirer, statut), ou None si le lecteur a été détaché
+    with _lock:
+        viewer = _viewers.get((session_id, panel))
+        if viewer is not None:
+            viewer.last_read = time.monotonic()
+    _sweep()
+    if viewer is None:
+        return None
+    lines, viewer.cursor, skipped = viewer.stream.read(viewer.cursor)
+    if skipped:
+        inc("freelens_log_lines_skipped_total", skipped)
+        lines.insert(0, f"... {skipped} lignes sautées ...")
+    trim = viewer.add_block(len(lines)) if lines else 0
+    return lines, trim, _status(viewer.stream, skipped)
+
+def close_logs(session_id, panel):
+    with _lock:
+        _viewers.pop((session_id, panel), None)
+    _sweep()
+
+def _collect():
+    with _lock:
+        return [("freelens_log_streams", {}, len(_streams)), ("freelens_log_viewers", {}, len(_viewers))]
+
+add_collector(_collect)
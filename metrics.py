@@ -0,0 +1,216 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from flask import Response, request
+
+# Bornes des histogrammes (secondes, octets, lignes)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+# Le profilage à la demande n'est exposé que si cette variable est définie
+PROFILE_ENV = "FREELENS_ENABLE_PROFILING"
+PROFILE_DIR = os.environ.get("FREELENS_PROFILE_DIR", tempfile.gettempdir())
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_help = {}
+_collectors = []
+_profile_requests = set()
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+def inc(name, amount=1, **labels):
+    with _lock:
+        key = (name, _labels_key(labels))
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    with _lock:
+        key = (name, _labels_key(labels))
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                histogram["counts"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+def describe(name, text):
+    _help[name] = text
+
+def add_collector(collector):
+    # collector() retourne une liste de (nom, labels, valeur) lus au moment
+    # du scrape (jauges : taux de hit des caches, réutilisation des connexions...)
+    _collectors.append(collector)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+def render():
+    # Format texte d'exposition Prometheus
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, dict(h, counts=list(h["counts"]))) for key, h in _histograms.items())
+    gauges = []
+    for collector in _collectors:
+        gauges.extend((name, _labels_key(labels), value) for name, labels, value in collector())
+    typed = set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), histogram in histograms:
+        header(name, "histogram")
+        for bound, count in zip(histogram["buckets"], histogram["counts"]):
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    for name, labels, value in sorted(gauges):
+        header(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+def _profiled(name, func, args, kwargs):
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args, **kwargs)
+    finally:
+        path = os.path.join(PROFILE_DIR, f"freelens-{name}-{int(time.time())}.prof")
+        profile.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(25)
+        print(f"Profil du callback {name} enregistré dans {path}\n{output.getvalue()}")
+
+def timed_callback(func):
+    # Latence et erreurs de chaque callback ; profilage cProfile d'un seul
+    # appel quand il a été demandé via /debug/profile/<callback>.
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with _lock:
+                profile = name in _profile_requests
+                _profile_requests.discard(name)
+            if profile:
+                return _profiled(name, func, args, kwargs)
+            return func(*args, **kwargs)
+        except Exception as e:
+            # PreventUpdate et consorts ne sont pas des erreurs
+            if not type(e).__module__.startswith("dash"):
+                inc("freelens_callback_errors_total", callback=name)
+            raise
+        finally:
+            observe("freelens_callback_duration_seconds", time.perf_counter() - start, callback=name)
+    return wrapper
+
+def instrumented_callback(app):
+    # Remplace app.callback : même signature, callback chronométré
+    def callback(*args, **kwargs):
+        register = app.callback(*args, **kwargs)
+
+        def decorator(func):
+            return register(timed_callback(func))
+        return decorator
+    return callback
+
+_PATH_RE = re.compile(r"^/(?:api/[^/]+|apis/[^/]+/[^/]+)(?:/namespaces/[^/]+)?/(?P<resource>[^/?]+)(?P<name>/[^/?]+)?(?P<sub>/[^/?]+)?")
+
+def api_operation(method, url):
+    # Regroupe les URL de l'apiserver par (ressource, verbe) pour garder une
+    # cardinalité de labels bornée
+    path = re.sub(r"^https?://[^/]+", "", url)
+    match = _PATH_RE.match(path)
+    if match is None:
+        return "other", method.lower()
+    resource = match.group("resource")
+    if match.group("sub"):
+        resource = f"{resource}{match.group('sub')}"
+    if "watch=true" in path or "watch=True" in path or "follow=true" in path:
+        verb = "watch"
+    elif method == "GET":
+        verb = "get" if match.group("name") else "list"
+    else:
+        verb = method.lower()
+    return resource, verb
+
+def instrument_rest_client(rest_client):
+    # Chronomètre chaque requête HTTP vers l'apiserver (pour un watch ou une
+    # lecture sans préchargement : jusqu'à la réception des en-têtes)
+    original = rest_client.request
+
+    @functools.wraps(original)
+    def request_wrapper(method, url, *args, **kwargs):
+        resource, verb = api_operation(method, url)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = original(method, url, *args, **kwargs)
+            status = str(response.status)
+            return response
+        except Exception as e:
+            status = str(getattr(e, "status", None) or "error")
+            raise
+        finally:
+            observe("freelens_apiserver_request_duration_seconds", time.perf_counter() - start,
+                    resource=resource, verb=verb, code=status)
+            if not status.startswith("2"):
+                inc("freelens_apiserver_errors_total", resource=resource, verb=verb, code=status)
+    rest_client.request = request_wrapper
+
+def install(app):
+    # Route /metrics au format Prometheus, taille des réponses des callbacks
+    # et, si activé, armement du profilage d'un callback.
+    server = app.server
+
+    @server.after_request
+    def record_response_size(response):
+        if request.path.endswith("/_dash-update-component") and not response.direct_passthrough:
+            payload = request.get_json(silent=True) or {}
+            output = payload.get("output", "unknown")
+            observe("freelens_callback_response_bytes", response.calculate_content_length() or 0,
+                    buckets=BYTES_BUCKETS, output=output[:120])
+        return response
+
+    @server.route("/metrics")
+    def metrics_endpoint():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    if os.environ.get(PROFILE_ENV):
+        @server.route("/debug/profile/<callback_name>")
+        def arm_profile(callback_name):
+            with _lock:
+                _profile_requests.add(callback_name)
+            return Response(f"Profilage armé pour le prochain appel de {callback_name}\n", mimetype="text/plain")
+
+describe("freelens_callback_duration_seconds", "Durée d'exécution des callbacks Dash")
+describe("freelens_callback_response_bytes", "Taille des réponses envoyées au navigateur")
+describe("freelens_apiserver_request_duration_seconds", "Durée des requêtes vers l'apiserver")
+describe("freelens_apiserver_errors_total", "Requêtes vers l'apiserver en erreur")
+describe("freelens_fetch_errors_total", "Rafraîchissements en erreur par type de ressource")
+describe("freelens_callback_errors_total", "Callbacks Dash terminés par une exception")
+describe("freelens_dataset_updates_total", "Mises à jour des jeux de données de session, par mode (delta, full...)")
+describe("freelens_query_matched_rows", "Lignes retenues par le filtre d'une table")
+describe("freelens_query_page_rows", "Lignes envoyées pour la page affichée")
+describe("freelens_detail_cache_hit_ratio", "Taux de hit du cache des panneaux de détails")
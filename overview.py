@@ -0,0 +1,135 @@
+import heapq
+import threading
+
+# Entrées affichées par tableau de la vue d'ensemble
+OVERVIEW_TOP = 10
+
+def _bump(counts, value, amount):
+    count = counts.get(value, 0) + amount
+    if count:
+        counts[value] = count
+    else:
+        counts.pop(value, None)
+
+def _owner_kind(controlled_by):
+    return controlled_by.split("/", 1)[0] if controlled_by and controlled_by != "N/A" else "None"
+
+def _replicas(replicas):
+    # "prêts/désirés" de la projection des déploiements ; replicas absent = 1
+    ready, _, desired = (replicas or "0/1").partition("/")
+    return int(ready or 0), int(desired) if desired.isdigit() else 1
+
+class WorkloadOverview:
+    # Agrégats de la vue d'ensemble tenus à jour événement par événement : la
+    # contribution de chaque objet est gardée, un événement la retire puis
+    # ajoute la nouvelle (mise à jour en O(1), idempotente). Le rendu ne lit
+    # que les compteurs, quelle que soit la taille du cluster.
+    def __init__(self, pods, deployments):
+        # Réentrant : un rechargement réapplique les clés une à une
+        self._lock = threading.RLock()
+        self._informers = {"pods": pods, "deployments": deployments}
+        self._sequences = {"pods": None, "deployments": None}
+        self._pods = {}
+        self._deployments = {}
+        self.phases = {}
+        self.namespaces = {}
+        self.nodes = {}
+        self.owner_kinds = {}
+        # Redémarrages cumulés par workload propriétaire (ou par pod isolé)
+        self.restarts = {}
+        # Déploiements dont les réplicas prêts sont moins nombreux que désirés
+        self.unavailable = {}
+        # Incrémenté à chaque changement : le rendu est sauté s'il n'a pas bougé
+        self.version = 0
+
+    def attach(self):
+        for kind, informer in self._informers.items():
+            informer.add_listener(self._listener(kind))
+            self._reload(kind)
+        return self
+
+    def _listener(self, kind):
+        def listener(event_type, key):
+            if event_type == 'RELIST':
+                self._reload(kind)
+            else:
+                self._apply(kind, key, self._informers[kind].get_by_key(key))
+        return listener
+
+    def _reload(self, kind):
+        # Rechargement complet de l'informer : delta depuis la dernière
+        # séquence vue si son journal le permet (génération publiée par le
+        # watcher partagé), sinon recalcul complet
+        informer = self._informers[kind]
+        if not informer.wait_synced(0):
+            return
+        informer = informer.pin()
+        with self._lock:
+            since = self._sequences[kind]
+            sequence, keys = informer.changes_since(since) if since is not None else (informer.sequence, None)
+            if keys is None:
+                for key in list(self._pods if kind == "pods" else self._deployments):
+                    self._apply(kind, key, None)
+                store = informer.store
+                with store.lock:
+                    keys = store.keys()
+            for key in keys:
+                self._apply(kind, key, informer.get_by_key(key))
+            self._sequences[kind] = sequence
+
+    def _apply(self, kind, key, row):
+        with self._lock:
+            if kind == "pods":
+                self._apply_pod(key, row)
+            else:
+                self._apply_deployment(key, row)
+            self.version += 1
+
+    def _apply_pod(self, key, row):
+        previous = self._pods.pop(key, None)
+        if previous is not None:
+            self._count_pod(previous, -1)
+        if row is not None:
+            current = (row["status"] or "Unknown", row["namespace"], row["node"],
+                       _owner_kind(row["controlled_by"]),
+                       row["controlled_by"] if row["controlled_by"] != "N/A" else f"Pod/{key}", row["restarts"])
+            self._pods[key] = current
+            self._count_pod(current, 1)
+
+    def _count_pod(self, pod, sign):
+        phase, namespace, node, owner_kind, owner, restarts = pod
+        _bump(self.phases, phase, sign)
+        _bump(self.namespaces, namespace, sign)
+        _bump(self.nodes, node, sign)
+        _bump(self.owner_kinds, owner_kind, sign)
+        if restarts:
+            _bump(self.restarts, owner, sign * restarts)
+
+    def _apply_deployment(self, key, row):
+        self._deployments.pop(key, None)
+        self.unavailable.pop(key, None)
+        if row is not None:
+            self._deployments[key] = True
+            ready, desired = _replicas(row["replicas"])
+            if ready < desired:
+                self.unavailable[key] = (ready, desired)
+
+    def summary(self, top=OVERVIEW_TOP):
+        # Copie des agrégats pour le rendu ; seuls les classements parcourent
+        # leurs compteurs (namespaces, nœuds, workloads qui redémarrent)
+        with self._lock:
+            largest = lambda counts: heapq.nlargest(top, counts.items(), key=lambda item: item[1])
+            return {
+                "version": self.version,
+                "pods": len(self._pods),
+                "deployments": len(self._deployments),
+                "phases": sorted(self.phases.items()),
+                "owner_kinds": sorted(self.owner_kinds.items(), key=lambda item: -item[1]),
+                "namespaces": largest(self.namespaces),
+                "namespace_count": len(self.namespaces),
+                "nodes": largest(self.nodes),
+                "node_count": len(self.nodes),
+                "restarts": largest(self.restarts),
+                "unavailable": heapq.nsmallest(top, self.unavailable.items()),
+                "unavailable_count": len(self.unavailable),
+            }
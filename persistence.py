@@ -0,0 +1,157 @@
+import atexit
+import os
+import re
+import struct
+import threading
+import time
+from client_manager import current_context
+from informer import use_persistence
+from metrics import inc
+from snapshot import Snapshot, write_snapshot
+
+# Persistance du cache des informers : chaque type est réécrit périodiquement
+# dans un snapshot (format de snapshot.py) qui porte son resourceVersion. Au
+# redémarrage, l'informer repart de ce fichier et reprend son watch là où il
+# s'était arrêté, au lieu d'attendre un LIST complet.
+# Persistance activée seulement si FREELENS_SNAPSHOT_DIR désigne un répertoire
+# (par exemple ~/.cache/freelens/snapshots) : les snapshots contiennent l'état
+# du cluster, noms des secrets compris
+SNAPSHOT_DIR_ENV = "FREELENS_SNAPSHOT_DIR"
+# Fréquence maximale d'écriture sur disque d'un type modifié
+PERSIST_INTERVAL_SECONDS = 30.0
+# Un type dont la publication a pris d secondes n'est pas republié avant
+# PUBLISH_COST_FACTOR * d : les gros types (20k pods) espacent leurs écritures
+PUBLISH_COST_FACTOR = 10
+
+def snapshot_path(directory, kind):
+    return os.path.join(directory, f"{kind}.snap")
+
+def private_directory(path):
+    # Répertoire réservé au propriétaire (0700, y compris s'il existait déjà)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    os.chmod(path, 0o700)
+
+def context_directory(root, context):
+    # Un répertoire par contexte : un snapshot n'est jamais servi pour un autre cluster
+    return os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]", "_", context))
+
+class Publisher:
+    # Republie un type au plus une fois par intervalle, dès que son informer
+    # a appliqué un événement ou changé d'état d'erreur.
+    def __init__(self, directory, interval, fsync=False, epoch=None):
+        self.directory = directory
+        self.interval = interval
+        self.fsync = fsync
+        # Identifiant du processus qui publie, recopié dans chaque snapshot
+        self.epoch = epoch
+        self._informers = {}
+        self._dirty = set()
+        self._errors = {}
+        self._generations = {}
+        self._next_publish = {}
+        self._lock = threading.Lock()
+
+    def add(self, informer):
+        kind = informer.kind
+        generation = self._previous_generation(kind)
+
+        def mark(event_type, key):
+            with self._lock:
+                self._dirty.add(kind)
+        informer.add_listener(mark)
+        with self._lock:
+            self._informers[kind] = informer
+            self._generations[kind] = generation
+            self._dirty.add(kind)
+
+    def _previous_generation(self, kind):
+        try:
+            return Snapshot(snapshot_path(self.directory, kind)).header["generation"]
+        except (OSError, ValueError, KeyError, struct.error):
+            return 0
+
+    def publish(self, kind):
+        with self._lock:
+            informer = self._informers[kind]
+            self._generations[kind] += 1
+
+        def writer(*state):
+            write_snapshot(snapshot_path(self.directory, kind), *state,
+                           generation=self._generations[kind], fsync=self.fsync, epoch=self.epoch)
+        start = time.monotonic()
+        informer.export(writer)
+        self._errors[kind] = str(informer.last_error) if informer.last_error else None
+        with self._lock:
+            self._next_publish[kind] = start + (time.monotonic() - start) * PUBLISH_COST_FACTOR
+
+    def publish_pending(self):
+        with self._lock:
+            for kind, informer in list(self._informers.items()):
+                error = str(informer.last_error) if informer.last_error else None
+                if error != self._errors.get(kind):
+                    self._dirty.add(kind)
+            now = time.monotonic()
+            dirty = {kind for kind in self._dirty if self._next_publish.get(kind, 0) <= now}
+            self._dirty -= dirty
+        for kind in dirty:
+            try:
+                self.publish(kind)
+            except Exception as e:
+                print(f"Publication du snapshot {kind} impossible: {e}")
+                with self._lock:
+                    self._dirty.add(kind)
+
+    def run(self, stop):
+        while not stop.wait(self.interval):
+            self.publish_pending()
+
+def restore(informer, directory):
+    path = snapshot_path(directory, informer.kind)
+    if not os.path.exists(path):
+        result = "missing"
+    else:
+        try:
+            result = "restored" if informer.restore(path) else "incompatible"
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            print(f"Snapshot {path} illisible: {e}")
+            result = "corrupt"
+    inc("freelens_snapshot_restores_total", kind=informer.kind, result=result)
+    return result == "restored"
+
+def enable(root, interval=PERSIST_INTERVAL_SECONDS, stop=None):
+    # Chaque informer créé est d'abord restauré depuis le répertoire de son
+    # contexte, puis réécrit périodiquement (avec fsync : le fichier doit
+    # survivre à un arrêt brutal) et une dernière fois à la sortie du processus.
+    publishers = {}
+    lock = threading.Lock()
+
+    def persist(informer, context):
+        if not informer.persistent:
+            return
+        directory = context_directory(root, context or current_context())
+        with lock:
+            publisher = publishers.get(directory)
+            if publisher is None:
+                private_directory(root)
+                private_directory(directory)
+                publisher = publishers[directory] = Publisher(directory, interval, fsync=True)
+        restore(informer, directory)
+        publisher.add(informer)
+
+    def publish_all():
+        with lock:
+            current = list(publishers.values())
+        for publisher in current:
+            publisher.publish_pending()
+
+    def run(stop):
+        while not stop.wait(interval):
+            publish_all()
+    use_persistence(persist)
+    threading.Thread(target=run, args=(stop or threading.Event(),), name="snapshot-persistence", daemon=True).start()
+    atexit.register(publish_all)
+
+def enable_from_environment():
+    root = os.environ.get(SNAPSHOT_DIR_ENV)
+    if root:
+        enable(root)
@@ -0,0 +1,376 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from kubernetes.client.rest import ApiException
+from client_manager import custom_objects, resolve_context
+from informer import object_key
+from metrics import add_collector, inc
+from snapshot import Snapshot, _Sections, write_sections
+
+# metrics-server : un relevé = un GET des pods et un GET des nœuds par cluster
+METRICS_GROUP, METRICS_VERSION = "metrics.k8s.io", "v1beta1"
+SAMPLE_INTERVAL_SECONDS = 15
+# Relevés gardés par pod, conteneur et nœud (10 minutes)
+HISTORY_SAMPLES = 40
+# Attente avant de réessayer un cluster sans metrics-server
+RETRY_SECONDS = 60
+
+# Colonnes ajoutées aux lignes du tableau des pods
+USAGE_COLUMNS = ("cpu", "cpu_limit_pct", "memory", "memory_limit_pct")
+
+_QUANTITY_RE = re.compile(r"^([+-]?[0-9.]+(?:[eE][+-]?[0-9]+)?)([A-Za-z]*)$")
+_SUFFIXES = {
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "": 1, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40, "Pi": 2 ** 50, "Ei": 2 ** 60,
+}
+
+def parse_quantity(quantity):
+    # Quantité Kubernetes ("250m", "1.5", "128Mi", "1234567n") -> float, None si invalide
+    match = _QUANTITY_RE.match(str(quantity).strip()) if quantity is not None else None
+    if match is None or match.group(2) not in _SUFFIXES:
+        return None
+    return float(match.group(1)) * _SUFFIXES[match.group(2)]
+
+def cpu_millicores(quantity):
+    value = parse_quantity(quantity)
+    return None if value is None else value * 1000
+
+def format_cpu(millicores):
+    return None if millicores is None else f"{millicores:.0f}m"
+
+def format_memory(size):
+    return None if size is None else f"{size / 2 ** 20:.0f}Mi"
+
+class UsageRing:
+    # Derniers relevés (CPU en millicores, mémoire en octets) par clé, dans des
+    # array de taille fixe : la clé du slot s occupe les cases [s*N, (s+1)*N)
+    # de chaque colonne et la position d'écriture tourne à chaque relevé.
+    # cpu_now/memory_now gardent la valeur du dernier relevé (NaN si la clé en
+    # était absente) : tris et top-K se font sur ces colonnes.
+    def __init__(self, samples=HISTORY_SAMPLES):
+        self.samples = samples
+        self.position = samples - 1
+        self.slots = {}
+        self._keys = []
+        self._free = []
+        self.cpu = array("d")
+        self.memory = array("d")
+        self.cpu_now = array("d")
+        self.memory_now = array("d")
+        self._missing = array("i")
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _allocate(self, key):
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            history = array("d", [math.nan]) * self.samples
+            self.cpu.extend(history)
+            self.memory.extend(history)
+            self.cpu_now.append(math.nan)
+            self.memory_now.append(math.nan)
+            self._missing.append(0)
+        self.slots[key] = slot
+        return slot
+
+    def record(self, values):
+        # values : {clé: (cpu, mémoire)} d'un relevé complet. Une clé absente de
+        # samples relevés consécutifs libère son slot.
+        samples = self.samples
+        self.position = position = (self.position + 1) % samples
+        for key, (cpu, memory) in values.items():
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self._allocate(key)
+            self.cpu[slot * samples + position] = self.cpu_now[slot] = cpu
+            self.memory[slot * samples + position] = self.memory_now[slot] = memory
+            self._missing[slot] = 0
+        for slot, key in enumerate(self._keys):
+            if key is None or key in values:
+                continue
+            self.cpu[slot * samples + position] = self.cpu_now[slot] = math.nan
+            self.memory[slot * samples + position] = self.memory_now[slot] = math.nan
+            self._missing[slot] += 1
+            if self._missing[slot] >= samples:
+                del self.slots[key]
+                self._keys[slot] = None
+                self._free.append(slot)
+
+    def current(self, key):
+        # (cpu, mémoire) du dernier relevé, ou None
+        slot = self.slots.get(key)
+        if slot is None or math.isnan(self.cpu_now[slot]):
+            return None
+        return self.cpu_now[slot], self.memory_now[slot]
+
+    def history(self, key):
+        # (cpu, mémoire) des relevés gardés, du plus ancien au plus récent
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        start, samples = slot * self.samples, self.samples
+        order = [start + (self.position + 1 + i) % samples for i in range(samples)]
+        return [self.cpu[i] for i in order], [self.memory[i] for i in order]
+
+    def export(self, sections, name):
+        # Copie de l'anneau dans les sections d'un fichier (write_usage)
+        for column in ("cpu", "memory", "cpu_now", "memory_now"):
+            sections.add(f"{name}.{column}", array("d", getattr(self, column)), "d")
+        return {"position": self.position, "keys": list(self._keys)}
+
+    @classmethod
+    def load(cls, snapshot, name):
+        # Anneau en lecture seule sur les sections d'un fichier mappé
+        ring = cls()
+        description = snapshot.header["rings"][name]
+        ring.position = description["position"]
+        ring._keys = [tuple(key) if isinstance(key, list) else key for key in description["keys"]]
+        ring.slots = {key: slot for slot, key in enumerate(ring._keys) if key is not None}
+        for column in ("cpu", "memory", "cpu_now", "memory_now"):
+            setattr(ring, column, snapshot.section(f"{name}.{column}"))
+        return ring
+
+class _UsageRings:
+    # Anneaux par pod (somme des conteneurs), par conteneur et par nœud d'un
+    # cluster ; lus sous lock
+    def __init__(self, context):
+        self.context = context
+        self.lock = threading.Lock()
+        self.pods = UsageRing()
+        self.containers = UsageRing()
+        self.nodes = UsageRing()
+        self.times = array("d", [math.nan]) * HISTORY_SAMPLES
+        # Nombre de relevés faits : change à chaque nouveau relevé
+        self.sample = 0
+        self.last_error = None
+
+    def refresh(self):
+        return self
+
+    def history_times(self):
+        # Horodatages des relevés gardés, dans l'ordre de history()
+        position = self.pods.position
+        return [self.times[(position + 1 + i) % HISTORY_SAMPLES] for i in range(HISTORY_SAMPLES)]
+
+class UsageSampler(_UsageRings):
+    # Relevés metrics-server d'un cluster, dans un thread
+    def __init__(self, context):
+        super().__init__(context)
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"usage-{context}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def add_listener(self, listener):
+        # listener() est appelé après chaque relevé, réussi ou non
+        self._listeners.append(listener)
+
+    def _fetch(self, plural):
+        response = custom_objects(self.context).list_cluster_custom_object(
+            METRICS_GROUP, METRICS_VERSION, plural, _preload_content=False)
+        if not 200 <= response.status <= 299:
+            raise ApiException(http_resp=response)
+        return json.loads(response.data).get("items") or []
+
+    def collect(self):
+        pods, containers, nodes = {}, {}, {}
+        for item in self._fetch("pods"):
+            metadata = item["metadata"]
+            key = object_key(metadata.get("namespace"), metadata["name"])
+            cpu_total = memory_total = 0.0
+            for container in item.get("containers") or []:
+                usage = container.get("usage") or {}
+                cpu = cpu_millicores(usage.get("cpu")) or 0.0
+                memory = parse_quantity(usage.get("memory")) or 0.0
+                containers[(key, container["name"])] = (cpu, memory)
+                cpu_total += cpu
+                memory_total += memory
+            pods[key] = (cpu_total, memory_total)
+        for item in self._fetch("nodes"):
+            usage = item.get("usage") or {}
+            nodes[item["metadata"]["name"]] = (cpu_millicores(usage.get("cpu")) or 0.0,
+                                               parse_quantity(usage.get("memory")) or 0.0)
+        with self.lock:
+            self.pods.record(pods)
+            self.containers.record(containers)
+            self.nodes.record(nodes)
+            self.times[self.pods.position] = time.time()
+            self.sample += 1
+        self.last_error = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.collect()
+                inc("freelens_usage_samples_total", context=self.context)
+                delay = SAMPLE_INTERVAL_SECONDS
+            except Exception as e:
+                self.last_error = e
+                inc("freelens_usage_errors_total", context=self.context)
+                delay = RETRY_SECONDS
+            for listener in self._listeners:
+                try:
+                    listener()
+                except Exception as e:
+                    print(f"Publication de l'utilisation ({self.context}) échouée: {e}")
+            self._stop.wait(delay)
+
+def write_usage(path, sampler):
+    # Publie les anneaux du sampler dans un fichier au format des snapshots
+    # (sections d'array, remplacé atomiquement) ; copie prise sous le verrou,
+    # écriture hors verrou
+    sections = _Sections()
+    with sampler.lock:
+        rings = {name: getattr(sampler, name).export(sections, name) for name in ("pods", "containers", "nodes")}
+        sections.add("times", array("d", sampler.times), "d")
+        description = {"context": sampler.context, "sample": sampler.sample, "rings": rings,
+                       "error": str(sampler.last_error) if sampler.last_error else None}
+    write_sections(path, description, sections)
+
+class SharedUsage(_UsageRings):
+    # Même interface de lecture qu'UsageSampler, sur le dernier relevé publié
+    # par le watcher : les workers ne contactent jamais metrics-server et le
+    # fichier n'est remappé que s'il a été remplacé
+    def __init__(self, context, path):
+        super().__init__(context)
+        self._path = path
+        self._identity = None
+
+    def refresh(self):
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return self
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if identity != self._identity:
+                snapshot = Snapshot(self._path)
+                self.pods, self.containers, self.nodes = (UsageRing.load(snapshot, name)
+                                                          for name in ("pods", "containers", "nodes"))
+                self.times = snapshot.section("times")
+                self.sample = snapshot.header["sample"]
+                self.last_error = snapshot.header["error"]
+                self._identity = identity
+        return self
+
+class UsageStore:
+    # Store des pods complété par les colonnes d'utilisation du dernier relevé.
+    # Filtres : cpu en millicores, memory en MiB, *_limit_pct en % de la limite.
+    # Les tris lisent une copie des array de l'anneau des pods ; les pods
+    # sans relevé (ou sans limite) restent en fin de liste dans les deux sens.
+    def __init__(self, store, sampler):
+        self._store = store
+        self.lock = store.lock
+        # Copie du dernier relevé prise à la construction, sous le seul verrou
+        # du sampler : filtres et tris (sous store.lock) lisent la copie, les
+        # deux verrous ne sont jamais imbriqués
+        with sampler.lock:
+            ring = sampler.pods
+            self._ring_slots = dict(ring.slots)
+            self._cpu_now = array("d", ring.cpu_now)
+            self._memory_now = array("d", ring.memory_now)
+
+    def __len__(self):
+        return len(self._store)
+
+    def keys(self):
+        return self._store.keys()
+
+    def slots(self, keys):
+        return self._store.slots(keys)
+
+    def key_of(self, slot):
+        return self._store.key_of(slot)
+
+    def _numbers(self, slots, name):
+        # Valeurs numériques de la colonne pour ces slots (NaN si inconnues)
+        now = self._cpu_now if name.startswith("cpu") else self._memory_now
+        ring_slots, key_of = self._ring_slots, self._store.key_of
+        values = array("d", (now[ring_slots[key]] if key in ring_slots else math.nan
+                             for key in map(key_of, slots)))
+        if name.endswith("_limit_pct"):
+            limits = self._store.column("cpu_limit" if name.startswith("cpu") else "memory_limit")[0]
+            for index, slot in enumerate(slots):
+                limit = limits[slot]
+                values[index] = 100 * values[index] / limit if limit else math.nan
+        elif name == "memory":
+            for index in range(len(values)):
+                values[index] /= 2 ** 20
+        return values
+
+    def _cells(self, slots, name):
+        values = self._numbers(slots, name)
+        if name == "cpu":
+            return [None if value != value else format_cpu(value) for value in values]
+        if name == "memory":
+            return [None if value != value else f"{value:.0f}Mi" for value in values]
+        return [None if value != value else round(value, 1) for value in values]
+
+    def value(self, slot, name):
+        if name in USAGE_COLUMNS:
+            return self._cells([slot], name)[0]
+        return self._store.value(slot, name)
+
+    def materialize(self, slots):
+        rows = self._store.materialize(slots)
+        for name in USAGE_COLUMNS:
+            for row, cell in zip(rows, self._cells(slots, name)):
+                row[name] = cell
+        return rows
+
+    def filter(self, slots, name, predicate):
+        if name not in USAGE_COLUMNS:
+            return self._store.filter(slots, name, predicate)
+        values = self._numbers(slots, name)
+        return [slot for slot, value in zip(slots, values) if predicate(None if value != value else value)]
+
+    def sort(self, slots, name, reverse=False):
+        if name not in USAGE_COLUMNS:
+            return self._store.sort(slots, name, reverse)
+        values = self._numbers(slots, name)
+        known = [index for index in range(len(values)) if values[index] == values[index]]
+        known.sort(key=values.__getitem__, reverse=reverse)
+        unknown = [index for index in range(len(values)) if values[index] != values[index]]
+        return [slots[index] for index in known + unknown]
+
+# Un sampler par cluster, démarré à la première lecture
+_samplers = {}
+_samplers_lock = threading.Lock()
+# Mode cache partagé : lecteur des relevés publiés par le watcher
+_shared_reader = None
+
+def use_shared_usage(reader):
+    # reader(contexte) remplace désormais le démarrage des samplers
+    global _shared_reader
+    _shared_reader = reader
+
+def usage_sampler(context=None):
+    context = resolve_context(context)
+    with _samplers_lock:
+        sampler = _samplers.get(context)
+        if sampler is None:
+            sampler = _samplers[context] = (_shared_reader(context) if _shared_reader is not None
+                                            else UsageSampler(context).start())
+    return sampler.refresh()
+
+def _collect():
+    with _samplers_lock:
+        samplers = list(_samplers.values())
+    return [("freelens_usage_tracked_pods", {"context": sampler.context}, len(sampler.pods)) for sampler in samplers]
+
+add_collector(_collect)
@@ -0,0 +1,389 @@
+import re
+
+# Moteur générique des ressources : chaque type affiché dans la barre latérale
+# (hors pods et déploiements, qui ont leurs propres informers) est décrit ici
+# de façon déclarative. Les colonnes sont des chemins dans le JSON brut de
+# l'objet (ou des fonctions de celui-ci) ; un seul fetcher (kubernetes_api)
+# sert tous les types à partir de ces spécifications.
+RESOURCES = {}
+
+# Couleurs des statuts dans les tableaux
+STATUS_OK = "#4caf50"
+STATUS_PENDING = "#ff9800"
+STATUS_ERROR = "#f44336"
+
+_SEGMENT_RE = re.compile(r"([^.\[\]]+)|\[(\*|\d+)\]")
+
+def _format(value):
+    if isinstance(value, dict):
+        return ", ".join(f"{k}={v}" for k, v in value.items()) if value else None
+    if isinstance(value, list):
+        return ", ".join(str(_format(item)) for item in value) if value else None
+    return value
+
+def compile_path(path):
+    # Sous-ensemble de JSONPath : "spec.replicas", "spec.ports[*].port",
+    # "spec.rules[0].host". Plusieurs valeurs sont jointes par des virgules,
+    # les dictionnaires rendus en "clé=valeur".
+    steps = []
+    for key, index in _SEGMENT_RE.findall(path):
+        steps.append(key if key else ("*" if index == "*" else int(index)))
+    wildcard = "*" in steps
+
+    def extract(obj):
+        values = [obj]
+        for step in steps:
+            found = []
+            for value in values:
+                if step == "*":
+                    if isinstance(value, list):
+                        found.extend(value)
+                elif isinstance(step, int):
+                    if isinstance(value, list) and -len(value) <= step < len(value):
+                        found.append(value[step])
+                elif isinstance(value, dict) and value.get(step) is not None:
+                    found.append(value[step])
+            values = found
+        if not values:
+            return None
+        return _format(values if wildcard else values[0])
+    return extract
+
+def count(path):
+    # Nombre d'éléments (liste ou dictionnaire) au chemin donné
+    steps = path.split(".")
+
+    def extract_count(obj):
+        value = obj
+        for step in steps:
+            value = value.get(step) if isinstance(value, dict) else None
+        return len(value) if isinstance(value, (list, dict)) else 0
+    return extract_count
+
+def ratio(current, desired):
+    current, desired = compile_path(current), compile_path(desired)
+    return lambda obj: f"{current(obj) or 0}/{desired(obj) or 0}"
+
+def ready_status(ready, desired):
+    # "Ready" quand toutes les répliques attendues sont prêtes
+    ready, desired = compile_path(ready), compile_path(desired)
+    return lambda obj: "Ready" if (ready(obj) or 0) >= (desired(obj) or 0) else "Progressing"
+
+def _job_status(job):
+    status = job.get("status") or {}
+    for condition in status.get("conditions") or ():
+        if condition.get("status") == "True" and condition.get("type") in ("Complete", "Failed", "Suspended"):
+            return condition["type"]
+    return "Running" if status.get("active") else "Pending"
+
+def _service_ports(service):
+    ports = (service.get("spec") or {}).get("ports") or ()
+    return ", ".join(f"{p.get('port')}{':' + str(p['nodePort']) if p.get('nodePort') else ''}/{p.get('protocol', 'TCP')}"
+                     for p in ports) or None
+
+def _endpoint_addresses(endpoints):
+    addresses = []
+    for subset in endpoints.get("subsets") or ():
+        ports = [str(p.get("port")) for p in subset.get("ports") or ()] or [""]
+        for address in subset.get("addresses") or ():
+            addresses.extend(f"{address.get('ip')}:{port}" if port else address.get("ip") for port in ports)
+    return ", ".join(addresses[:5]) + (f" +{len(addresses) - 5}" if len(addresses) > 5 else "") if addresses else None
+
+def _load_balancer(obj):
+    ingress = ((obj.get("status") or {}).get("loadBalancer") or {}).get("ingress") or ()
+    return ", ".join(entry.get("ip") or entry.get("hostname") or "" for entry in ingress) or None
+
+_EXTERNAL_IPS = compile_path("spec.externalIPs")
+_CLAIM_NAMESPACE = compile_path("spec.claimRef.namespace")
+_CLAIM_NAME = compile_path("spec.claimRef.name")
+
+def _external_ip(service):
+    return _load_balancer(service) or _EXTERNAL_IPS(service)
+
+def _claim(volume):
+    return "/".join(filter(None, (_CLAIM_NAMESPACE(volume), _CLAIM_NAME(volume)))) or None
+
+def _scale_target(hpa):
+    target = (hpa.get("spec") or {}).get("scaleTargetRef") or {}
+    return f"{target.get('kind')}/{target.get('name')}"
+
+def _annotation_flag(annotation):
+    return lambda obj: "Yes" if ((obj.get("metadata") or {}).get("annotations") or {}).get(annotation) == "true" else "No"
+
+def _flag(key, path=()):
+    def extract(obj):
+        for step in path:
+            obj = obj.get(step) or {}
+        return "True" if obj.get(key) else "False"
+    return extract
+
+def _data_keys(obj):
+    return ", ".join(sorted({**(obj.get("data") or {}), **(obj.get("binaryData") or {})})) or None
+
+def _hpa_targets(hpa):
+    metrics = (hpa.get("spec") or {}).get("metrics") or ()
+    targets = []
+    for metric in metrics:
+        # type "Resource" -> champ "resource", "ContainerResource" -> "containerResource"...
+        metric_type = metric.get("type") or ""
+        source = metric.get(metric_type[:1].lower() + metric_type[1:]) or {}
+        target = source.get("target") or {}
+        name = source.get("name") or (source.get("metric") or {}).get("name") or metric.get("type")
+        value = target.get("averageUtilization")
+        targets.append(f"{name} {value}%" if value is not None else f"{name} {target.get('averageValue') or target.get('value') or ''}".strip())
+    return ", ".join(targets) or None
+
+def register_resource(kind, title, subitem_id, api_kind, group, versions, columns,
+                      namespaced=True, status_colors=None, details=()):
+    # columns : [(id, titre, chemin JSON ou fonction(objet), type de colonne)],
+    #   type au sens de ColumnStore ("str", "category", "int", "time")
+    # versions : versions candidates par ordre de préférence ; la première
+    #   servie par l'apiserver est retenue (découverte)
+    # status_colors : {valeur de la colonne "status": couleur}
+    # details : [(libellé, chemin JSON ou fonction(objet))] du panneau de détails
+    RESOURCES[kind] = {
+        "kind": kind,
+        "title": title,
+        "subitem_id": subitem_id,
+        "api_kind": api_kind,
+        "group": group,
+        "versions": tuple(versions),
+        "namespaced": namespaced,
+        "columns": [(column_id, column_title, compile_path(path) if isinstance(path, str) else path, column_type)
+                    for column_id, column_title, path, column_type in columns],
+        "status_colors": dict(status_colors or {}),
+        "details": [(label, compile_path(path) if isinstance(path, str) else path) for label, path in details],
+    }
+
+WORKLOAD_STATUS = {"Ready": STATUS_OK, "Progressing": STATUS_PENDING}
+
+# Workloads
+register_resource("daemonsets", "DaemonSets", "workloads-daemonsets", "DaemonSet", "apps", ["v1"], [
+    ("desired", "Desired", "status.desiredNumberScheduled", "int"),
+    ("current", "Current", "status.currentNumberScheduled", "int"),
+    ("ready", "Ready", "status.numberReady", "int"),
+    ("up_to_date", "Up-to-date", "status.updatedNumberScheduled", "int"),
+    ("available", "Available", "status.numberAvailable", "int"),
+    ("node_selector", "Node Selector", "spec.template.spec.nodeSelector", "category"),
+    ("status", "Status", ready_status("status.numberReady", "status.desiredNumberScheduled"), "category"),
+], status_colors=WORKLOAD_STATUS, details=[
+    ("Selector", "spec.selector.matchLabels"),
+    ("Update Strategy", "spec.updateStrategy.type"),
+    ("Images", "spec.template.spec.containers[*].image"),
+])
+register_resource("statefulsets", "StatefulSets", "workloads-statefulsets", "StatefulSet", "apps", ["v1"], [
+    ("pods", "Pods", ratio("status.readyReplicas", "spec.replicas"), "category"),
+    ("replicas", "Replicas", "spec.replicas", "int"),
+    ("service", "Service", "spec.serviceName", "category"),
+    ("status", "Status", ready_status("status.readyReplicas", "spec.replicas"), "category"),
+], status_colors=WORKLOAD_STATUS, details=[
+    ("Selector", "spec.selector.matchLabels"),
+    ("Update Strategy", "spec.updateStrategy.type"),
+    ("Pod Management Policy", "spec.podManagementPolicy"),
+    ("Images", "spec.template.spec.containers[*].image"),
+])
+register_resource("replicasets", "ReplicaSets", "workloads-replicasets", "ReplicaSet", "apps", ["v1"], [
+    ("desired", "Desired", "spec.replicas", "int"),
+    ("current", "Current", "status.replicas", "int"),
+    ("ready", "Ready", "status.readyReplicas", "int"),
+    ("controlled_by", "Controlled By", "metadata.ownerReferences[0].name", "str"),
+    ("status", "Status", ready_status("status.readyReplicas", "spec.replicas"), "category"),
+], status_colors=WORKLOAD_STATUS, details=[
+    ("Selector", "spec.selector.matchLabels"),
+    ("Images", "spec.template.spec.containers[*].image"),
+])
+register_resource("replicationcontrollers", "Replication Controllers", "workloads-replicationcontrollers",
+                  "ReplicationController", "", ["v1"], [
+    ("desired", "Desired", "spec.replicas", "int"),
+    ("current", "Current", "status.replicas", "int"),
+    ("ready", "Ready", "status.readyReplicas", "int"),
+    ("selector", "Selector", "spec.selector", "str"),
+    ("status", "Status", ready_status("status.readyReplicas", "spec.replicas"), "category"),
+], status_colors=WORKLOAD_STATUS, details=[
+    ("Images", "spec.template.spec.containers[*].image"),
+])
+register_resource("jobs", "Jobs", "workloads-jobs", "Job", "batch", ["v1"], [
+    ("completions", "Completions", ratio("status.succeeded", "spec.completions"), "category"),
+    ("active", "Active", "status.active", "int"),
+    ("failed", "Failed", "status.failed", "int"),
+    ("controlled_by", "Controlled By", "metadata.ownerReferences[0].name", "str"),
+    ("status", "Status", _job_status, "category"),
+], status_colors={"Complete": STATUS_OK, "Running": STATUS_PENDING, "Pending": STATUS_PENDING,
+                  "Failed": STATUS_ERROR}, details=[
+    ("Parallelism", "spec.parallelism"),
+    ("Backoff Limit", "spec.backoffLimit"),
+    ("Start Time", "status.startTime"),
+    ("Completion Time", "status.completionTime"),
+    ("Images", "spec.template.spec.containers[*].image"),
+])
+register_resource("cronjobs", "CronJobs", "workloads-cronjobs", "CronJob", "batch", ["v1", "v1beta1"], [
+    ("schedule", "Schedule", "spec.schedule", "category"),
+    ("suspend", "Suspend", _flag("suspend", ("spec",)), "category"),
+    ("active", "Active", count("status.active"), "int"),
+    ("last_schedule", "Last Schedule", "status.lastScheduleTime", "str"),
+], details=[
+    ("Concurrency Policy", "spec.concurrencyPolicy"),
+    ("Time Zone", "spec.timeZone"),
+    ("Last Successful Time", "status.lastSuccessfulTime"),
+    ("Images", "spec.jobTemplate.spec.template.spec.containers[*].image"),
+])
+
+# Config
+register_resource("configmaps", "ConfigMaps", "config-configmaps", "ConfigMap", "", ["v1"], [
+    ("keys", "Keys", _data_keys, "str"),
+], details=[
+    ("Immutable", "immutable"),
+])
+# Les valeurs des secrets ne sont jamais projetées : seuls le type et les clés
+register_resource("secrets", "Secrets", "config-secrets", "Secret", "", ["v1"], [
+    ("type", "Type", "type", "category"),
+    ("keys", "Keys", _data_keys, "str"),
+], details=[
+    ("Immutable", "immutable"),
+])
+register_resource("resourcequotas", "Resource Quotas", "config-resourcequotas", "ResourceQuota", "", ["v1"], [
+    ("hard", "Hard", "spec.hard", "str"),
+    ("used", "Used", "status.used", "str"),
+], details=[
+    ("Scopes", "spec.scopes"),
+])
+register_resource("limitranges", "Limit Ranges", "config-limitranges", "LimitRange", "", ["v1"], [
+    ("types", "Types", "spec.limits[*].type", "category"),
+], details=[
+    ("Default", "spec.limits[*].default"),
+    ("Default Request", "spec.limits[*].defaultRequest"),
+    ("Max", "spec.limits[*].max"),
+    ("Min", "spec.limits[*].min"),
+])
+register_resource("hpa", "Horizontal Pod Autoscalers", "config-hpa", "HorizontalPodAutoscaler", "autoscaling",
+                  ["v2", "v2beta2", "v1"], [
+    ("reference", "Reference", _scale_target, "str"),
+    ("targets", "Targets", _hpa_targets, "str"),
+    ("min_pods", "Min Pods", "spec.minReplicas", "int"),
+    ("max_pods", "Max Pods", "spec.maxReplicas", "int"),
+    ("replicas", "Replicas", "status.currentReplicas", "int"),
+], details=[
+    ("Desired Replicas", "status.desiredReplicas"),
+    ("Last Scale Time", "status.lastScaleTime"),
+])
+register_resource("poddisruptionbudgets", "Pod Disruption Budgets", "config-poddisruptionbudgets",
+                  "PodDisruptionBudget", "policy", ["v1", "v1beta1"], [
+    ("min_available", "Min Available", "spec.minAvailable", "category"),
+    ("max_unavailable", "Max Unavailable", "spec.maxUnavailable", "category"),
+    ("current_healthy", "Current Healthy", "status.currentHealthy", "int"),
+    ("desired_healthy", "Desired Healthy", "status.desiredHealthy", "int"),
+    ("allowed_disruptions", "Allowed Disruptions", "status.disruptionsAllowed", "int"),
+], details=[
+    ("Selector", "spec.selector.matchLabels"),
+])
+register_resource("priorityclasses", "Priority Classes", "config-priorityclasses", "PriorityClass",
+                  "scheduling.k8s.io", ["v1"], [
+    ("value", "Value", "value", "int"),
+    ("global_default", "Global Default", _flag("globalDefault"), "category"),
+    ("preemption_policy", "Preemption Policy", "preemptionPolicy", "category"),
+], namespaced=False, details=[
+    ("Description", "description"),
+])
+register_resource("runtimeclasses", "Runtime Classes", "config-runtimeclasses", "RuntimeClass", "node.k8s.io",
+                  ["v1"], [
+    ("handler", "Handler", "handler", "category"),
+], namespaced=False, details=[
+    ("Node Selector", "scheduling.nodeSelector"),
+    ("Pod Fixed Overhead", "overhead.podFixed"),
+])
+register_resource("leases", "Leases", "config-leases", "Lease", "coordination.k8s.io", ["v1"], [
+    ("holder", "Holder", "spec.holderIdentity", "str"),
+    ("renew_time", "Renew Time", "spec.renewTime", "str"),
+], details=[
+    ("Lease Duration (s)", "spec.leaseDurationSeconds"),
+    ("Lease Transitions", "spec.leaseTransitions"),
+])
+register_resource("mutatingwebhookconfigs", "Mutating Webhook Configs", "config-mutatingwebhookconfigs",
+                  "MutatingWebhookConfiguration", "admissionregistration.k8s.io", ["v1"], [
+    ("webhooks", "Webhooks", count("webhooks"), "int"),
+], namespaced=False, details=[
+    ("Webhook Names", "webhooks[*].name"),
+    ("Failure Policies", "webhooks[*].failurePolicy"),
+])
+register_resource("validatingwebhookconfigs", "Validating Webhook Configs", "config-validatingwebhookconfigs",
+                  "ValidatingWebhookConfiguration", "admissionregistration.k8s.io", ["v1"], [
+    ("webhooks", "Webhooks", count("webhooks"), "int"),
+], namespaced=False, details=[
+    ("Webhook Names", "webhooks[*].name"),
+    ("Failure Policies", "webhooks[*].failurePolicy"),
+])
+
+# Network
+register_resource("services", "Services", "network-services", "Service", "", ["v1"], [
+    ("type", "Type", "spec.type", "category"),
+    ("cluster_ip", "Cluster IP", "spec.clusterIP", "str"),
+    ("ports", "Ports", _service_ports, "str"),
+    ("external_ip", "External IP", _external_ip, "str"),
+    ("selector", "Selector", "spec.selector", "str"),
+], details=[
+    ("Session Affinity", "spec.sessionAffinity"),
+    ("IP Families", "spec.ipFamilies"),
+])
+register_resource("endpoints", "Endpoints", "network-endpoints", "Endpoints", "", ["v1"], [
+    ("endpoints", "Endpoints", _endpoint_addresses, "str"),
+], details=[
+    ("Not Ready Addresses", "subsets[*].notReadyAddresses[*].ip"),
+])
+register_resource("ingresses", "Ingresses", "network-ingresses", "Ingress", "networking.k8s.io", ["v1"], [
+    ("class", "Class", "spec.ingressClassName", "category"),
+    ("hosts", "Hosts", "spec.rules[*].host", "str"),
+    ("address", "Address", _load_balancer, "str"),
+], details=[
+    ("TLS Hosts", "spec.tls[*].hosts[*]"),
+    ("Backends", "spec.rules[*].http.paths[*].backend.service.name"),
+])
+register_resource("ingressclasses", "Ingress Classes", "network-ingressclasses", "IngressClass",
+                  "networking.k8s.io", ["v1"], [
+    ("controller", "Controller", "spec.controller", "category"),
+    ("default", "Default", _annotation_flag("ingressclass.kubernetes.io/is-default-class"), "category"),
+], namespaced=False)
+register_resource("networkpolicies", "Network Policies", "network-networkpolicies", "NetworkPolicy",
+                  "networking.k8s.io", ["v1"], [
+    ("pod_selector", "Pod Selector", "spec.podSelector.matchLabels", "str"),
+    ("policy_types", "Policy Types", "spec.policyTypes", "category"),
+], details=[
+    ("Ingress Rules", count("spec.ingress")),
+    ("Egress Rules", count("spec.egress")),
+])
+
+# Storage
+PHASE_STATUS = {"Bound": STATUS_OK, "Available": STATUS_OK, "Pending": STATUS_PENDING,
+                "Released": STATUS_PENDING, "Lost": STATUS_ERROR, "Failed": STATUS_ERROR}
+register_resource("persistentvolumeclaims", "Persistent Volume Claims", "storage-persistentvolumeclaims",
+                  "PersistentVolumeClaim", "", ["v1"], [
+    ("storage_class", "Storage Class", "spec.storageClassName", "category"),
+    ("size", "Size", "status.capacity.storage", "category"),
+    ("volume", "Volume", "spec.volumeName", "str"),
+    ("access_modes", "Access Modes", "spec.accessModes", "category"),
+    ("status", "Status", "status.phase", "category"),
+], status_colors=PHASE_STATUS, details=[
+    ("Requested", "spec.resources.requests.storage"),
+    ("Volume Mode", "spec.volumeMode"),
+])
+register_resource("persistentvolumes", "Persistent Volumes", "storage-persistentvolumes", "PersistentVolume",
+                  "", ["v1"], [
+    ("storage_class", "Storage Class", "spec.storageClassName", "category"),
+    ("capacity", "Capacity", "spec.capacity.storage", "category"),
+    ("claim", "Claim", _claim, "str"),
+    ("reclaim_policy", "Reclaim Policy", "spec.persistentVolumeReclaimPolicy", "category"),
+    ("status", "Status", "status.phase", "category"),
+], namespaced=False, status_colors=PHASE_STATUS, details=[
+    ("Access Modes", "spec.accessModes"),
+    ("Volume Mode", "spec.volumeMode"),
+    ("CSI Driver", "spec.csi.driver"),
+])
+register_resource("storageclasses", "Storage Classes", "storage-storageclasses", "StorageClass",
+                  "storage.k8s.io", ["v1"], [
+    ("provisioner", "Provisioner", "provisioner", "category"),
+    ("reclaim_policy", "Reclaim Policy", "reclaimPolicy", "category"),
+    ("binding_mode", "Volume Binding Mode", "volumeBindingMode", "category"),
+    ("default", "Default", _annotation_flag("storageclass.kubernetes.io/is-default-class"), "category"),
+], namespaced=False, details=[
+    ("Parameters", "parameters"),
+    ("Allow Volume Expansion", "allowVolumeExpansion"),
+])
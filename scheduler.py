@@ -0,0 +1,49 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Nombre maximal d'appels à l'apiserver menés en parallèle par ce processus
+MAX_WORKERS = 16
+# Délai par défaut accordé à chaque type de ressource
+DEFAULT_TIMEOUT_SECONDS = 10
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fetch")
+_lock = threading.RLock()
+_inflight = {}
+
+def _forget(key, future):
+    with _lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+def submit(func, *args):
+    # Les requêtes identiques déjà en vol (autres sessions, autres onglets)
+    # partagent le même appel amont et donc le même résultat.
+    key = (func.__module__, func.__qualname__) + args
+    with _lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _executor.submit(func, *args)
+            _inflight[key] = future
+            future.add_done_callback(lambda done: _forget(key, done))
+        return future
+
+def run(func, *args):
+    return submit(func, *args).result()
+
+def fetch_all(tasks, timeouts=None):
+    # Lance toutes les tâches {nom: (fonction, arguments)} en parallèle, chacune
+    # avec son propre délai. Retourne (résultats, erreurs) : une tâche en échec
+    # ou en retard n'empêche pas les autres d'aboutir.
+    start = time.monotonic()
+    futures = {name: submit(func, *args) for name, (func, args) in tasks.items()}
+    results, errors = {}, {}
+    for name, future in futures.items():
+        timeout = (timeouts or {}).get(name, DEFAULT_TIMEOUT_SECONDS)
+        try:
+            results[name] = future.result(max(0, start + timeout - time.monotonic()))
+        except TimeoutError:
+            errors[name] = "délai dépassé"
+        except Exception as e:
+            errors[name] = str(e)
+    return results, errors
@@ -0,0 +1,286 @@
+import argparse
+import os
+import threading
+import time
+import uuid
+from client_manager import current_context, list_contexts
+from informer import object_key, use_shared_cache
+from metrics import add_collector
+from persistence import Publisher, context_directory, enable_from_environment, private_directory, snapshot_path
+from resource_usage import SharedUsage, usage_sampler, use_shared_usage, write_usage
+from snapshot import Snapshot, SnapshotIndex, SnapshotStore
+
+# Mode multi-workers (gunicorn) : un seul processus watcher fait tourner les
+# informers et publie, par type de ressource, un snapshot versionné dans un
+# répertoire partagé (tmpfs de préférence). Les workers mappent ces fichiers
+# en lecture seule et ne contactent jamais l'apiserver pour les tableaux.
+SHARED_CACHE_ENV = "FREELENS_SHARED_CACHE"
+# Fréquence maximale de publication d'un type modifié
+PUBLISH_INTERVAL_SECONDS = 1.0
+# Fichier touché par le watcher à chaque intervalle, même sans changement :
+# au-delà de STALE_SECONDS sans battement, les snapshots sont périmés
+HEARTBEAT_FILE = "watcher.heartbeat"
+STALE_SECONDS = 30
+
+def _stale_error(directory):
+    # Message d'erreur si le watcher ne publie plus, sinon None
+    try:
+        silence = time.time() - os.stat(os.path.join(directory, HEARTBEAT_FILE)).st_mtime
+    except FileNotFoundError:
+        return None
+    if silence <= STALE_SECONDS:
+        return None
+    return f"cache partagé périmé : watcher sans nouvelles depuis {silence:.0f} s"
+
+class SharedInformer:
+    # Même interface de lecture qu'Informer, sur la dernière génération
+    # publiée : le fichier est remappé dès que le watcher l'a remplacé.
+    def __init__(self, kind, directory, derived=None):
+        self.kind = kind
+        self._directory = directory
+        self._path = snapshot_path(directory, kind)
+        self._derived = derived
+        self._lock = threading.Lock()
+        self._identity = None
+        self._generation = None
+        self._listeners = []
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _current(self):
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if identity != self._identity:
+                snapshot = Snapshot(self._path)
+                store = SnapshotStore(snapshot, self._derived)
+                index = SnapshotIndex(snapshot, store)
+                self._generation = (snapshot, store, index)
+                self._identity = identity
+                changed = True
+            else:
+                changed = False
+            generation = self._generation
+        if changed:
+            # Nouvelle génération : vue d'ensemble à recalculer côté écouteurs
+            for listener in self._listeners:
+                listener('RELIST', None)
+        return generation
+
+    def _header(self, name, default=None):
+        generation = self._current()
+        return generation[0].header.get(name, default) if generation else default
+
+    def pin(self):
+        # Génération courante, résolue une seule fois : une requête qui lit
+        # séquence, journal, store et index par cette vue ne mélange jamais
+        # deux publications
+        generation = self._current()
+        if generation is None:
+            raise RuntimeError(f"snapshot {self.kind} pas encore publié")
+        return _Generation(self.kind, *generation, stale=_stale_error(self._directory))
+
+    @property
+    def store(self):
+        return self.pin().store
+
+    @property
+    def index(self):
+        return self.pin().index
+
+    @property
+    def sequence(self):
+        return self._header("epoch"), self._header("sequence", 0)
+
+    @property
+    def resource_version(self):
+        return self._header("resource_version")
+
+    @property
+    def generation(self):
+        return self._header("generation")
+
+    @property
+    def last_error(self):
+        return _stale_error(self._directory) or self._header("error")
+
+    def wait_synced(self, timeout):
+        # Attend la première publication synchronisée du watcher ; faux sans
+        # attendre si les snapshots sont périmés
+        deadline = time.monotonic() + timeout
+        while True:
+            generation = self._current()
+            if generation is not None:
+                if _stale_error(self._directory):
+                    return False
+                if generation[0].header["synced"]:
+                    return True
+                if generation[0].header["error"]:
+                    return False
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+
+    def list_keys(self, namespace='all'):
+        return self.pin().list_keys(namespace)
+
+    def list(self, namespace='all'):
+        return self.pin().list(namespace)
+
+    def select_keys(self, requirements, namespace='all'):
+        return self.pin().select_keys(requirements, namespace)
+
+    def get(self, namespace, name):
+        return self.pin().get(namespace, name)
+
+    def get_by_key(self, key):
+        return self.pin().get_by_key(key)
+
+    def changes_since(self, sequence):
+        return self.pin().changes_since(sequence)
+
+class _Generation:
+    # Interface de lecture d'Informer sur une génération publiée figée. La
+    # séquence est un couple (epoch du watcher, séquence) : un watcher
+    # relancé repart de zéro, ses séquences ne prolongent pas les anciennes.
+    def __init__(self, kind, snapshot, store, index, stale=None):
+        self.kind = kind
+        self.store = store
+        self.index = index
+        self._header = snapshot.header
+        self._snapshot = snapshot
+        self._stale = stale
+
+    def pin(self):
+        return self
+
+    @property
+    def sequence(self):
+        return self._header.get("epoch"), self._header.get("sequence", 0)
+
+    @property
+    def resource_version(self):
+        return self._header.get("resource_version")
+
+    @property
+    def generation(self):
+        return self._header.get("generation")
+
+    @property
+    def last_error(self):
+        return self._stale or self._header.get("error")
+
+    def wait_synced(self, timeout):
+        return bool(self._header["synced"]) and self._stale is None
+
+    def list_keys(self, namespace='all'):
+        if namespace == 'all':
+            return self.store.keys()
+        return list(self.index.select([("namespace", "=", frozenset([namespace]))]))
+
+    def list(self, namespace='all'):
+        return self.store.materialize(self.store.slots(self.list_keys(namespace)))
+
+    def select_keys(self, requirements, namespace='all'):
+        if namespace != 'all':
+            requirements = list(requirements) + [("namespace", "=", frozenset([namespace]))]
+        return self.index.select(requirements)
+
+    def get(self, namespace, name):
+        return self.get_by_key(object_key(namespace, name))
+
+    def get_by_key(self, key):
+        return self.store.get(key)
+
+    def changes_since(self, sequence):
+        # Même contrat qu'Informer.changes_since, sur le journal publié
+        header = self._header
+        epoch, sequence = sequence
+        if epoch != header.get("epoch"):
+            return self.sequence, None
+        changes = self._snapshot.changes()
+        if sequence < header["reset_sequence"] or (changes and changes[0][0] > sequence + 1):
+            return self.sequence, None
+        keys = set()
+        for change_sequence, key in reversed(changes):
+            if change_sequence <= sequence:
+                break
+            keys.add(key)
+        return self.sequence, keys
+
+def attach(directory):
+    # Côté worker : ensure_informer renvoie désormais des lecteurs de snapshot
+    readers = {}
+
+    def reader(kind, derived, context):
+        context = context or current_context()
+        readers[(context, kind)] = SharedInformer(kind, context_directory(directory, context), derived)
+        return readers[(context, kind)]
+    use_shared_cache(reader)
+    use_shared_usage(lambda context: SharedUsage(context, snapshot_path(context_directory(directory, context), "usage")))
+    add_collector(lambda: [("freelens_snapshot_generation", {"context": context, "kind": kind}, informer.generation or 0)
+                           for (context, kind), informer in list(readers.items())])
+
+def run_watcher(directory, kinds, contexts, stop=None):
+    # Un répertoire de snapshots par contexte, comme pour la persistance
+    import kubernetes_api
+    stop = stop or threading.Event()
+    publishers = {}
+    epoch = uuid.uuid4().hex
+    private_directory(directory)
+    for context in contexts:
+        publishers[context] = Publisher(context_directory(directory, context), PUBLISH_INTERVAL_SECONDS, epoch=epoch)
+        private_directory(publishers[context].directory)
+
+    def publish(stop):
+        while not stop.wait(PUBLISH_INTERVAL_SECONDS):
+            for publisher in publishers.values():
+                heartbeat = os.path.join(publisher.directory, HEARTBEAT_FILE)
+                with open(heartbeat, "w") as f:
+                    f.write(epoch)
+                publisher.publish_pending()
+    threading.Thread(target=publish, args=(stop,), name="snapshot-publisher", daemon=True).start()
+    if "pods" in kinds:
+        # Relevés metrics-server faits ici seulement, publiés à chaque relevé
+        for context in contexts:
+            sampler = usage_sampler(context)
+            path = snapshot_path(publishers[context].directory, "usage")
+            sampler.add_listener(lambda sampler=sampler, path=path: write_usage(path, sampler))
+            write_usage(path, sampler)
+    pending = [(context, kind) for context in contexts for kind in kinds]
+    while pending and not stop.is_set():
+        # Un type que l'apiserver ne sert pas (encore) est retenté plus tard
+        for context, kind in list(pending):
+            try:
+                publishers[context].add(kubernetes_api.start_informer(kind, context))
+                pending.remove((context, kind))
+            except Exception as e:
+                print(f"Informer {kind} ({context}) non démarré: {e}")
+        if pending:
+            stop.wait(kubernetes_api.DISCOVERY_RETRY_SECONDS)
+    stop.wait()
+
+def main():
+    from kubernetes_api import informer_kinds
+    parser = argparse.ArgumentParser(description="Watcher du cache partagé entre workers")
+    parser.add_argument("--dir", default=os.environ.get(SHARED_CACHE_ENV), required=SHARED_CACHE_ENV not in os.environ)
+    parser.add_argument("--kinds", nargs="*", default=None, help="types à surveiller (défaut : tous)")
+    parser.add_argument("--contexts", nargs="*", default=None, help="contextes du kubeconfig (défaut : tous)")
+    args = parser.parse_args()
+    # Le watcher repart lui aussi du cache persisté : les workers servent des
+    # tableaux dès la première publication, avant la fin du moindre LIST
+    enable_from_environment()
+    run_watcher(args.dir, args.kinds or informer_kinds(), args.contexts or list_contexts()[0])
+
+if __name__ == "__main__":
+    main()
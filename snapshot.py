@@ -0,0 +1,336 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from columnar import ColumnStore, _ARRAY_CODES
+from label_index import LabelIndex
+
+# Format des snapshots d'un informer (un fichier par type de ressource) :
+#   en-tête : MAGIC, longueur du JSON de description (uint64 little-endian)
+#   description JSON : type, génération, resourceVersion, séquence, schéma,
+#       dictionnaires des colonnes catégorielles, position des sections
+#   sections binaires alignées sur 8 octets : colonnes (arrays), chaînes
+#       (offsets + blob UTF-8 + nulls), postings de l'index de labels
+# Les lignes sont triées par clé : le slot d'une ligne est son rang. Un
+# lecteur mappe le fichier et lit les colonnes sans les copier.
+MAGIC = b"FLSNAP01"
+_HEADER = struct.Struct("<8sQ")
+_ALIGN = 8
+
+def _term(index_key, value=None):
+    # Terme de l'index sérialisé en clé JSON
+    return json.dumps([index_key[0], index_key[1], value])
+
+class _Sections:
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.entries = {}
+
+    def add(self, name, data, typecode):
+        raw = memoryview(data).cast("B")
+        self.entries[name] = [self.size, len(raw), typecode]
+        self.chunks.append(raw)
+        self.size += len(raw)
+        padding = -self.size % _ALIGN
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.size += padding
+
+    def add_strings(self, name, values):
+        offsets = array("q", [0])
+        nulls = array("B")
+        blob = bytearray()
+        for value in values:
+            nulls.append(value is None)
+            if value is not None:
+                blob += str(value).encode("utf-8")
+            offsets.append(len(blob))
+        self.add(f"{name}.offsets", offsets, "q")
+        self.add(f"{name}.nulls", nulls, "B")
+        self.add(f"{name}.blob", blob, "B")
+
+def write_snapshot(path, kind, store, index_state, resource_version, sequence, reset_sequence, changes,
+                   synced=True, error=None, generation=0, fsync=False, epoch=None):
+    # Écrit l'état d'un informer (voir Informer.export ; index_state est le
+    # résultat de LabelIndex.export) dans un fichier temporaire puis le
+    # renomme : un lecteur voit l'ancien ou le nouveau snapshot, jamais un
+    # fichier partiel.
+    keys = sorted(store.keys())
+    slots = store.slots(keys)
+    rank = {key: position for position, key in enumerate(keys)}
+    sections = _Sections()
+    sections.add_strings("keys", keys)
+    dictionaries = {}
+    for name, column_type in store.schema.items():
+        column, dictionary = store.column(name)
+        if column_type in _ARRAY_CODES:
+            sections.add(name, array(_ARRAY_CODES[column_type], (column[slot] for slot in slots)),
+                         _ARRAY_CODES[column_type])
+            if dictionary is not None:
+                dictionaries[name] = list(dictionary)
+        else:
+            sections.add_strings(name, (column[slot] for slot in slots))
+    index_fields, postings, label_keys = index_state
+    terms, present = {}, {}
+    posting_slots = array("i")
+    for target, entries in ((terms, ((_term(*term), obj_keys) for term, obj_keys in postings.items())),
+                            (present, ((_term(key), obj_keys) for key, obj_keys in label_keys.items()))):
+        for term, obj_keys in entries:
+            ranks = sorted(rank[obj_key] for obj_key in obj_keys if obj_key in rank)
+            target[term] = [len(posting_slots), len(ranks)]
+            posting_slots.extend(ranks)
+    sections.add("postings", posting_slots, "i")
+    sections.add("changes.sequence", array("q", (change_sequence for change_sequence, _ in changes)), "q")
+    sections.add_strings("changes.keys", (key for _, key in changes))
+    write_sections(path, {
+        "kind": kind,
+        "generation": generation,
+        "epoch": epoch,
+        "resource_version": resource_version,
+        "sequence": sequence,
+        "reset_sequence": reset_sequence,
+        "synced": synced,
+        "error": error,
+        "count": len(keys),
+        "changes": len(changes),
+        "schema": store.schema,
+        "index_fields": list(index_fields),
+        "dictionaries": dictionaries,
+        "terms": terms,
+        "present": present,
+    }, sections, fsync)
+
+def write_sections(path, description, sections, fsync=False):
+    # Fichier au format des snapshots (description JSON puis sections)
+    description = json.dumps(dict(description, sections=sections.entries)).encode("utf-8")
+    padding = -(_HEADER.size + len(description)) % _ALIGN
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # Lisible du seul propriétaire : un snapshot contient les clés de tous
+    # les types, secrets compris
+    with os.fdopen(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(description)))
+        f.write(description)
+        f.write(b"\0" * padding)
+        for chunk in sections.chunks:
+            f.write(chunk)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+class _Strings:
+    # Colonne de chaînes décodées à la demande depuis le fichier mappé
+    def __init__(self, offsets, nulls, blob):
+        self._offsets = offsets
+        self._nulls = nulls
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._nulls)
+
+    def __getitem__(self, index):
+        if self._nulls[index]:
+            return None
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+class Snapshot:
+    # Snapshot mappé en lecture seule ; les vues mémoire restent valides même
+    # si le fichier est remplacé entre-temps par une génération plus récente.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} n'est pas un snapshot ({magic!r})")
+        self.header = json.loads(self._mmap[_HEADER.size:_HEADER.size + length])
+        start = _HEADER.size + length
+        self._body = memoryview(self._mmap)[start + (-start % _ALIGN):]
+
+    def section(self, name):
+        offset, length, typecode = self.header["sections"][name]
+        return self._body[offset:offset + length].cast(typecode)
+
+    def strings(self, name):
+        return _Strings(self.section(f"{name}.offsets"), self.section(f"{name}.nulls"), self.section(f"{name}.blob"))
+
+    def changes(self):
+        return list(zip(self.section("changes.sequence"), self.strings("changes.keys")))
+
+def load_snapshot(path, schema, index_fields, derived=None):
+    # Relit un snapshot dans des structures modifiables (ColumnStore et
+    # LabelIndex) pour qu'un informer reprenne son watch à partir de cet état.
+    # Retourne (store, index, en-tête), ou None si le snapshot n'est pas
+    # réutilisable (schéma différent, LIST initial jamais terminé).
+    snapshot = Snapshot(path)
+    header = snapshot.header
+    if (header["schema"] != dict(schema) or header["index_fields"] != list(index_fields)
+            or not header["synced"] or not header["resource_version"]):
+        return None
+    count = header["count"]
+    keys = snapshot.strings("keys")
+    keys = [keys[slot] for slot in range(count)]
+    columns = {}
+    for name, column_type in schema.items():
+        if column_type in _ARRAY_CODES:
+            columns[name] = array(_ARRAY_CODES[column_type], snapshot.section(name))
+        else:
+            strings = snapshot.strings(name)
+            columns[name] = [None if value is None else sys.intern(value)
+                             for value in (strings[slot] for slot in range(count))]
+    store = ColumnStore(schema, derived)
+    store.load(keys, columns, header["dictionaries"])
+    postings = snapshot.section("postings")
+    terms = {}
+    for term, (offset, length) in header["terms"].items():
+        source, name, value = json.loads(term)
+        terms[((source, name), value)] = [keys[slot] for slot in postings[offset:offset + length]]
+    index = LabelIndex(index_fields)
+    index.load(keys, terms)
+    return store, index, header
+
+class SnapshotStore(ColumnStore):
+    # ColumnStore en lecture seule dont les colonnes sont les sections du
+    # snapshot : filtre, tri et matérialisation sont ceux de ColumnStore. Seul
+    # le dictionnaire clé -> slot est construit, à la première recherche.
+    def __init__(self, snapshot, derived=None):
+        self.schema = dict(snapshot.header["schema"])
+        self.derived = dict(derived or {})
+        self.lock = threading.RLock()
+        self._columns = {}
+        self._dictionaries = {}
+        self._codes = {}
+        for name, column_type in self.schema.items():
+            if column_type in _ARRAY_CODES:
+                self._columns[name] = snapshot.section(name)
+            else:
+                self._columns[name] = snapshot.strings(name)
+            if column_type == "category":
+                self._dictionaries[name] = snapshot.header["dictionaries"][name]
+        self._keys = snapshot.strings("keys")
+        self._count = snapshot.header["count"]
+        self._key_slots = None
+        self._all_keys = None
+
+    def __len__(self):
+        return self._count
+
+    def put(self, key, row):
+        raise TypeError("snapshot en lecture seule")
+
+    def remove(self, key):
+        raise TypeError("snapshot en lecture seule")
+
+    @property
+    def _slots(self):
+        with self.lock:
+            if self._key_slots is None:
+                self._key_slots = {key: slot for slot, key in enumerate(self.keys())}
+            return self._key_slots
+
+    def slot_of(self, key):
+        # Recherche dichotomique (les clés sont triées), sans construire le dictionnaire
+        slot = bisect.bisect_left(self._keys, key)
+        return slot if slot < self._count and self._keys[slot] == key else None
+
+    def has(self, key):
+        return self.slot_of(key) is not None
+
+    def keys(self):
+        with self.lock:
+            if self._all_keys is None:
+                self._all_keys = [self._keys[slot] for slot in range(self._count)]
+            return list(self._all_keys)
+
+    def get(self, key):
+        slot = self.slot_of(key)
+        return None if slot is None else self.materialize([slot])[0]
+
+class _Postings:
+    # Vue dictionnaire des postings du snapshot : l'ensemble des clés d'un
+    # terme n'est décodé qu'à sa première utilisation
+    def __init__(self, snapshot, terms, store):
+        self._slots = snapshot.section("postings")
+        self._terms = terms
+        self._store = store
+        self._decoded = {}
+
+    def slots(self, term):
+        entry = self._terms.get(term)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._slots[offset:offset + length]
+
+    def get(self, term, default=None):
+        keys = self._decoded.get(term)
+        if keys is None:
+            slots = self.slots(term)
+            if slots is None:
+                return default
+            keys = self._decoded[term] = {self._store.key_of(slot) for slot in slots}
+        return keys
+
+class _TermMapping:
+    # Adaptateur (clé d'index, valeur) -> terme JSON pour LabelIndex.select
+    def __init__(self, postings, encode):
+        self._postings = postings
+        self._encode = encode
+
+    def get(self, key, default=None):
+        return self._postings.get(self._encode(key), default)
+
+class SnapshotIndex(LabelIndex):
+    # Index de labels en lecture seule sur les postings du snapshot ; la
+    # sélection est celle de LabelIndex.
+    def __init__(self, snapshot, store):
+        self._fields = tuple(snapshot.header["index_fields"])
+        self._lock = threading.RLock()
+        self._store = store
+        self._term_postings = _Postings(snapshot, snapshot.header["terms"], store)
+        self._present_postings = _Postings(snapshot, snapshot.header["present"], store)
+        self._postings = _TermMapping(self._term_postings, lambda term: _term(*term))
+        self._keys = _TermMapping(self._present_postings, _term)
+
+    @property
+    def _all(self):
+        return self._store.keys()
+
+    def add(self, obj_key, labels, row):
+        raise TypeError("snapshot en lecture seule")
+
+    def remove(self, obj_key):
+        raise TypeError("snapshot en lecture seule")
+
+    def export(self):
+        raise TypeError("snapshot en lecture seule")
+
+    def _contains(self, postings, term, slot):
+        slots = postings.slots(term)
+        if slots is None:
+            return False
+        position = bisect.bisect_left(slots, slot)
+        return position < len(slots) and slots[position] == slot
+
+    def matches(self, obj_key, requirements):
+        slot = self._store.slot_of(obj_key)
+        if slot is None:
+            return False
+        for key, op, values in requirements:
+            index_key = self._index_key(key)
+            present = self._contains(self._present_postings, _term(index_key), slot)
+            matched = present and any(self._contains(self._term_postings, _term(index_key, value), slot)
+                                      for value in values)
+            if op in ("=", "in") and not matched:
+                return False
+            if op in ("!=", "notin") and matched:
+                return False
+            if op == "exists" and not present:
+                return False
+            if op == "!" and present:
+                return False
+        return True
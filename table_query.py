@@ -0,0 +1,233 @@
+import itertools
+import operator
+import re
+import threading
+from collections import OrderedDict
+from dash import Patch, no_update
+from metrics import ROWS_BUCKETS, inc, observe
+
+# Nombre maximal de sessions dont on garde le jeu de données côté serveur
+MAX_SESSIONS = 200
+# Champs internes qui ne partent jamais vers le navigateur
+HIDDEN_FIELDS = ("creation_timestamp", "resource_version", "cpu_limit", "memory_limit")
+
+_lock = threading.Lock()
+_datasets = OrderedDict()
+_versions = itertools.count(1)
+
+# Syntaxe filter_query du DataTable : {colonne} opérateur valeur, termes joints par &&
+_TERM_RE = re.compile(
+    r"""\s*\{(?P<column>[^}]+)\}\s*
+        (?:(?P<blank>is\s+(?P<not>not\s+)?blank)
+          |(?P<op>[si]?(?:<=|>=|!=|<|>|=|eq|ne|lt|le|gt|ge|contains|datestartswith))\s*
+           (?:"(?P<dq>(?:[^"\\]|\\.)*)"|'(?P<sq>(?:[^'\\]|\\.)*)'|`(?P<bq>[^`]*)`|(?P<bare>[^\s&|]+)))
+        \s*$""",
+    re.VERBOSE | re.IGNORECASE,
+)
+# Séparateurs && / and entre termes, hors des valeurs entre guillemets
+_SEPARATOR_RE = re.compile(
+    r"""(?P<quoted>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`[^`]*`)|(?P<separator>\s+(?:&&|and)\s+)""",
+    re.IGNORECASE,
+)
+_OPERATORS = {
+    "=": "eq", "eq": "eq", "!=": "ne", "ne": "ne",
+    "<": "lt", "lt": "lt", "<=": "le", "le": "le",
+    ">": "gt", "gt": "gt", ">=": "ge", "ge": "ge",
+    "contains": "contains", "datestartswith": "datestartswith",
+}
+_COMPARE = {
+    "eq": operator.eq, "ne": operator.ne,
+    "lt": operator.lt, "le": operator.le,
+    "gt": operator.gt, "ge": operator.ge,
+    "contains": lambda cell, value: value in cell,
+    "datestartswith": lambda cell, value: cell.startswith(value),
+}
+
+def save_dataset(session_id, table, keys, source=None, sequence=None, params=None, status=None):
+    # Le jeu de la session n'est qu'une liste de clés vers le ColumnStore de
+    # l'informer source ; le navigateur ne reçoit qu'un jeton.
+    version = next(_versions)
+    dataset = {"keys": dict.fromkeys(keys), "source": source, "sequence": sequence,
+               "params": params, "status": status, "sent": None}
+    with _lock:
+        _datasets[(session_id, table)] = dataset
+        _datasets.move_to_end((session_id, table))
+        # Éviction par session : tous les jeux de la session la moins récente
+        while len({session for session, _ in _datasets}) > MAX_SESSIONS:
+            oldest = next(iter(_datasets))[0]
+            for key in [key for key in _datasets if key[0] == oldest]:
+                del _datasets[key]
+    return {"version": version, "count": len(dataset["keys"])}
+
+def apply_delta(session_id, table, upserts, removed, sequence, source=None):
+    # Applique les clés ajoutées/modifiées/supprimées au jeu de la session ;
+    # retourne None si rien n'a changé. La source du delta remplace la
+    # précédente : les lignes sont lues dans la génération de sa séquence
+    # (cache partagé), pas dans celle du premier chargement.
+    with _lock:
+        dataset = _datasets.get((session_id, table))
+        if dataset is None:
+            return None
+        dataset["sequence"] = sequence
+        if source is not None:
+            dataset["source"] = source
+        keys = dataset["keys"]
+        changed = bool(upserts)
+        for key in removed:
+            changed = key in keys or changed
+            keys.pop(key, None)
+        keys.update(dict.fromkeys(upserts))
+        if not changed:
+            return None
+        return {"version": next(_versions), "count": len(keys)}
+
+def dataset_since(session_id, table, params, incremental):
+    # Séquence à partir de laquelle un delta suffit pour cette session, ou None
+    # si le jeu doit être relu entièrement (premier chargement, autres paramètres).
+    with _lock:
+        dataset = _datasets.get((session_id, table))
+        if incremental and dataset and dataset["params"] == params:
+            return dataset["sequence"]
+        return None
+
+def store_changes(session_id, table, params, changes):
+    # Applique le résultat de get_*_changes au jeu serveur de la session. Sans
+    # changement, rien ne part vers le navigateur (no_update).
+    # Retourne (jeton du store, statut, statut modifié ?).
+    source, sequence, upserts, removed, status = changes
+    with _lock:
+        dataset = _datasets.get((session_id, table))
+        previous_status = dataset["status"] if dataset else None
+    if sequence is None:
+        token = no_update if dataset else save_dataset(session_id, table, [], status=status)
+        mode = "error"
+    elif removed is None:
+        token = save_dataset(session_id, table, upserts, source, sequence, params, status)
+        mode = "full"
+    else:
+        token = apply_delta(session_id, table, upserts, removed, sequence, source) or no_update
+        mode = "unchanged" if token is no_update else "delta"
+    # Part des rafraîchissements servis par delta plutôt que par rechargement complet
+    inc("freelens_dataset_updates_total", table=table, mode=mode)
+    if dataset is not None:
+        with _lock:
+            dataset["status"] = status
+    return token, status, dataset is None or status != previous_status
+
+def load_dataset(session_id, table):
+    # Retourne (store source, clés) du jeu de la session
+    with _lock:
+        dataset = _datasets.get((session_id, table))
+        if dataset is None or dataset["source"] is None:
+            return None, []
+        _datasets.move_to_end((session_id, table))
+        source, keys = dataset["source"], list(dataset["keys"])
+    # Store résolu hors du verrou des jeux : sa construction peut prendre
+    # d'autres verrous (relevé d'utilisation, caches des clusters)
+    return source.store, keys
+
+def page_update(session_id, table, page):
+    # Compare la page avec la dernière envoyée à la session : si les mêmes
+    # lignes sont affichées, seules celles qui ont changé partent (Patch).
+    with _lock:
+        dataset = _datasets.get((session_id, table))
+        sent = dataset["sent"] if dataset else None
+        if dataset is not None:
+            dataset["sent"] = page
+    if sent is None or [row["id"] for row in sent] != [row["id"] for row in page]:
+        return page
+    patch = Patch()
+    changed = False
+    for index, (old, new) in enumerate(zip(sent, page)):
+        if old != new:
+            patch[index] = new
+            changed = True
+    return patch if changed else no_update
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _split_terms(filter_query):
+    parts, start = [], 0
+    for match in _SEPARATOR_RE.finditer(filter_query):
+        if match.group("separator"):
+            parts.append(filter_query[start:match.start()])
+            start = match.end()
+    parts.append(filter_query[start:])
+    return parts
+
+def parse_filter_query(filter_query):
+    terms = []
+    if not filter_query:
+        return terms
+    for part in _split_terms(filter_query.strip()):
+        match = _TERM_RE.match(part)
+        if match is None:
+            raise ValueError(f"Filtre invalide: {part}")
+        column = match.group("column")
+        if match.group("blank"):
+            terms.append((column, "not_blank" if match.group("not") else "blank", False, None))
+            continue
+        op = match.group("op").lower()
+        insensitive = op[0] == "i" and op[1:] in _OPERATORS
+        if op[0] in "si" and op[1:] in _OPERATORS:
+            op = op[1:]
+        value = next(v for v in (match.group("dq"), match.group("sq"), match.group("bq"), match.group("bare")) if v is not None)
+        if match.group("dq") is not None or match.group("sq") is not None:
+            value = re.sub(r"\\(.)", r"\1", value)
+        terms.append((column, _OPERATORS[op], insensitive, value))
+    return terms
+
+def _predicate(op, insensitive, value):
+    if op == "blank":
+        return lambda cell: cell in (None, "")
+    if op == "not_blank":
+        return lambda cell: cell not in (None, "")
+    compare = _COMPARE[op]
+    number = _number(value)
+    text = str(value).lower() if insensitive else str(value)
+
+    def predicate(cell):
+        if cell is None:
+            return False
+        if op in ("contains", "datestartswith") or isinstance(cell, str) or number is None:
+            return compare(str(cell).lower() if insensitive else str(cell), text)
+        return compare(cell, number)
+    return predicate
+
+def _public(row):
+    public = {k: v for k, v in row.items() if k not in HIDDEN_FIELDS}
+    public["id"] = f"{row['namespace']}/{row['name']}" if row.get('namespace') else row['name']
+    if row.get('cluster'):
+        # Vue multi-clusters : le contexte préfixe l'identifiant (découpé par la droite)
+        public["id"] = f"{row['cluster']}/{public['id']}"
+    return public
+
+def query_dataset(session_id, table, filter_query, sort_by, page_current, page_size):
+    # Filtre, tri et pagination côté serveur, directement sur les colonnes du
+    # cache : seule la page visible est matérialisée et renvoyée au navigateur.
+    # Retourne (lignes, nombre de pages, page).
+    try:
+        terms = parse_filter_query(filter_query)
+    except ValueError:
+        return [], 1, 0
+    store, keys = load_dataset(session_id, table)
+    page_size = page_size or 15
+    if store is None:
+        return [], 1, 0
+    with store.lock:
+        slots = store.slots(keys)
+        for column, op, insensitive, value in terms:
+            slots = store.filter(slots, column, _predicate(op, insensitive, value))
+        for sort in reversed(sort_by or []):
+            slots = store.sort(slots, sort['column_id'], sort['direction'] == 'desc')
+        page_count = max(1, -(-len(slots) // page_size))
+        page_current = min(page_current or 0, page_count - 1)
+        start = page_current * page_size
+        page = [_public(row) for row in store.materialize(slots[start:start + page_size])]
+    observe("freelens_query_matched_rows", len(slots), buckets=ROWS_BUCKETS, table=table)
+    observe("freelens_query_page_rows", len(page), buckets=ROWS_BUCKETS, table=table)
+    return page, page_count, page_current
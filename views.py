@@ -0,0 +1,221 @@
+import functools
+from dash import dcc, html, dash_table
+from resources import RESOURCES
+
+# Registre des vues : chaque entrée de la barre latérale qui a une vue la
+# déclare ici. Une vue n'est construite (et ses données chargées) que lorsque
+# son entrée est activée pour la première fois ; elle reste ensuite dans la
+# page, masquée, pour être réaffichée sans rien recharger.
+VIEWS = {}
+DEFAULT_VIEW = "workloads-pods"
+
+def register_view(subitem_id, title, view_id, build, kinds=()):
+    # kinds : types de ressources à rafraîchir tant que la vue est affichée
+    VIEWS[subitem_id] = {"title": title, "view_id": view_id, "build": build, "kinds": tuple(kinds)}
+
+def resolve_view(subitem_id):
+    # Les entrées sans vue propre affichent la vue par défaut
+    return subitem_id if subitem_id in VIEWS else DEFAULT_VIEW
+
+def build_view(subitem_id):
+    view = VIEWS[subitem_id]
+    return html.Div(id=view["view_id"], style={'display': 'block'}, children=view["build"]())
+
+def data_kinds():
+    kinds = []
+    for view in VIEWS.values():
+        kinds.extend(kind for kind in view["kinds"] if kind not in kinds)
+    return kinds
+
+def _logs_panel(prefix):
+    # Logs du pod sélectionné : conteneur, historique (secondes / lignes) et
+    # sortie complétée au fil de l'eau par l'intervalle du panneau
+    return html.Div([
+        html.Div([
+            dcc.Dropdown(id=f'{prefix}-log-container', options=[], placeholder="Conteneur",
+                         clearable=False, className="log-container-selector"),
+            dcc.Input(id=f'{prefix}-log-since', type='number', min=1, placeholder="Depuis (s)",
+                      debounce=True, className="search-input"),
+            dcc.Input(id=f'{prefix}-log-tail', type='number', min=0, value=100, placeholder="Dernières lignes",
+                      debounce=True, className="search-input"),
+            html.Span(id=f'{prefix}-log-status', className="detail-value"),
+        ], className="header-controls"),
+        html.Pre(id=f'{prefix}-log-output', children=[], className="log-output"),
+        dcc.Interval(id=f'{prefix}-log-interval', interval=1000, disabled=True),
+    ], className="pod-logs")
+
+def _pods_view(table_id='pods-table', details_id='pod-details', clusters=False, logs_prefix='pod'):
+    # clusters : vue « tous les clusters », avec le contexte de chaque pod
+    cluster_columns = [{"name": "Cluster", "id": "cluster"}] if clusters else []
+    # Utilisation (metrics-server) : tableau des pods du cluster sélectionné seulement
+    usage_columns = [] if clusters else [
+        {"name": "CPU", "id": "cpu"},
+        {"name": "CPU %", "id": "cpu_limit_pct"},
+        {"name": "Memory", "id": "memory"},
+        {"name": "Memory %", "id": "memory_limit_pct"},
+    ]
+    return [
+        html.Div([
+            dash_table.DataTable(
+                id=table_id,
+                columns=cluster_columns + [
+                    {"name": "Name", "id": "name"},
+                    {"name": "Namespace", "id": "namespace"},
+                    {"name": "Containers", "id": "containers"},
+                    {"name": "Restarts", "id": "restarts"},
+                    {"name": "Controlled By", "id": "controlled_by"},
+                    {"name": "Node", "id": "node"},
+                    {"name": "QoS", "id": "qos"},
+                    {"name": "Age", "id": "age"},
+                    {"name": "Status", "id": "status"}
+                ] + usage_columns,
+                data=[],
+                style_header={'backgroundColor': '#2d2d2d', 'fontWeight': 'bold', 'border': '1px solid #444', 'color': '#e0e0e0'},
+                style_cell={'textAlign': 'left', 'padding': '8px', 'border': '1px solid #444', 'backgroundColor': '#1e1e1e', 'color': '#e0e0e0'},
+                style_data_conditional=[
+                    {'if': {'row_index': 'odd'}, 'backgroundColor': '#2d2d2d'},
+                    {'if': {'filter_query': '{status} = "Running"'}, 'color': '#4caf50'},
+                    {'if': {'filter_query': '{status} = "Pending"'}, 'color': '#ff9800'},
+                    {'if': {'filter_query': '{status} = "Failed"'}, 'color': '#f44336'}
+                ],
+                page_action='custom',
+                page_current=0,
+                page_size=15,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                style_table={'overflowX': 'auto'},
+                row_selectable='single'
+            )
+        ], className="table-container"),
+        html.Div(id=details_id, className="pod-details"),
+        _logs_panel(logs_prefix),
+    ]
+
+def _deployments_view():
+    return [
+        html.Div([
+            dash_table.DataTable(
+                id='deployments-table',
+                columns=[
+                    {"name": "Name", "id": "name"},
+                    {"name": "Namespace", "id": "namespace"},
+                    {"name": "Replicas", "id": "replicas"},
+                    {"name": "Up-to-date", "id": "up_to_date"},
+                    {"name": "Available", "id": "available"},
+                    {"name": "Age", "id": "age"},
+                    {"name": "Strategy", "id": "strategy"},
+                    {"name": "Labels", "id": "labels"}
+                ],
+                data=[],
+                style_header={'backgroundColor': '#2d2d2d', 'fontWeight': 'bold', 'border': '1px solid #444', 'color': '#e0e0e0'},
+                style_cell={'textAlign': 'left', 'padding': '8px', 'border': '1px solid #444', 'backgroundColor': '#1e1e1e', 'color': '#e0e0e0'},
+                style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': '#2d2d2d'}],
+                page_action='custom',
+                page_current=0,
+                page_size=15,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                style_table={'overflowX': 'auto'},
+                row_selectable='single'
+            )
+        ], className="table-container"),
+        html.Div(id="deployment-details", className="deployment-details"),
+    ]
+
+def _overview_view():
+    # Compteurs du cluster sélectionné ; overview-version : version des
+    # agrégats affichés, pour ne rien renvoyer tant qu'ils n'ont pas changé
+    return [
+        html.Div(id='overview-content', className="pod-details"),
+        dcc.Store(id='overview-version'),
+    ]
+
+register_view("workloads-overview", "Overview", "overview-view", _overview_view)
+register_view("workloads-pods", "Pods", "pods-view", _pods_view, kinds=["pods"])
+register_view("workloads-allpods", "Pods (all clusters)", "allpods-view",
+              functools.partial(_pods_view, 'allpods-table', 'allpods-details', clusters=True, logs_prefix='allpods'), kinds=["allpods"])
+register_view("workloads-deployments", "Deployments", "deployments-view", _deployments_view, kinds=["deployments"])
+
+def _events_view():
+    # Une ligne par (objet, raison) ; les plus récentes d'abord
+    return [
+        html.Div([
+            dash_table.DataTable(
+                id='events-table',
+                columns=[
+                    {"name": "Type", "id": "type"},
+                    {"name": "Reason", "id": "reason"},
+                    {"name": "Object", "id": "object"},
+                    {"name": "Namespace", "id": "namespace"},
+                    {"name": "Message", "id": "message"},
+                    {"name": "Source", "id": "source"},
+                    {"name": "Count", "id": "count"},
+                    {"name": "First Seen", "id": "first_seen_ago"},
+                    {"name": "Last Seen", "id": "last_seen_ago"}
+                ],
+                data=[],
+                style_header={'backgroundColor': '#2d2d2d', 'fontWeight': 'bold', 'border': '1px solid #444', 'color': '#e0e0e0'},
+                style_cell={'textAlign': 'left', 'padding': '8px', 'border': '1px solid #444', 'backgroundColor': '#1e1e1e', 'color': '#e0e0e0'},
+                style_data_conditional=[
+                    {'if': {'row_index': 'odd'}, 'backgroundColor': '#2d2d2d'},
+                    {'if': {'filter_query': '{type} = "Warning"'}, 'color': '#ff9800'}
+                ],
+                page_action='custom',
+                page_current=0,
+                page_size=15,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[{'column_id': 'last_seen_ago', 'direction': 'asc'}],
+                filter_action='custom',
+                filter_query='',
+                style_table={'overflowX': 'auto'}
+            )
+        ], className="table-container"),
+    ]
+
+register_view("events", "Events", "events-view", _events_view, kinds=["events"])
+
+def _resource_view(kind):
+    # Vue générique d'un type de resources.py : colonnes et couleurs de
+    # statut viennent de la spécification
+    spec = RESOURCES[kind]
+    columns = [{"name": "Name", "id": "name"}]
+    if spec["namespaced"]:
+        columns.append({"name": "Namespace", "id": "namespace"})
+    columns += [{"name": title, "id": column_id} for column_id, title, _, _ in spec["columns"]]
+    columns.append({"name": "Age", "id": "age"})
+    status_styles = [{'if': {'filter_query': f'{{status}} = "{status}"'}, 'color': color}
+                     for status, color in spec["status_colors"].items()]
+    return [
+        html.Div([
+            dash_table.DataTable(
+                id=f'{kind}-table',
+                columns=columns,
+                data=[],
+                style_header={'backgroundColor': '#2d2d2d', 'fontWeight': 'bold', 'border': '1px solid #444', 'color': '#e0e0e0'},
+                style_cell={'textAlign': 'left', 'padding': '8px', 'border': '1px solid #444', 'backgroundColor': '#1e1e1e', 'color': '#e0e0e0'},
+                style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': '#2d2d2d'}] + status_styles,
+                page_action='custom',
+                page_current=0,
+                page_size=15,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                style_table={'overflowX': 'auto'},
+                row_selectable='single'
+            )
+        ], className="table-container"),
+        html.Div(id=f"{kind}-details", className="resource-details"),
+    ]
+
+for _kind, _spec in RESOURCES.items():
+    register_view(_spec["subitem_id"], _spec["title"], f"{_kind}-view",
+                  functools.partial(_resource_view, _kind), kinds=[_kind])